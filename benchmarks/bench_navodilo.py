@@ -0,0 +1,95 @@
+"""
+Sestavljanje navodila pri velikih seznamih avtorjev: celotna bibliografija
+(format_bibliographies, kot prej) proti zgoščeni v proračunu žetonov.
+Preveri tudi, da navodilo ostane v proračunu, da ni podvojenih naslovov,
+da so dela vsakega avtorja od najnovejšega naprej in da se izpuščeno
+natančno povzame.
+
+    python benchmarks/bench_navodilo.py
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sis_bibliografija import AuthorBibliography, format_bibliographies  # noqa: E402
+from sis_navodilo import (PROMPT_TOKENS, STATIC_INSTRUCTIONS, build_prompt, estimate_tokens,  # noqa: E402
+                          format_dimensions)
+
+AUTHOR_COUNTS, WORKS, REPEAT = (1, 10, 50, 200), 40, 5
+DIMENSIONS = {"expertise": "Expert", "context": "Scientific Research", "profiles": ["Adventurers", "Researchers"],
+              "paradigms": ["Rationalism", "Empiricism"], "models": ["Concepts"], "approaches": ["Perspective shifting"],
+              "methods": [f"Method {i}" for i in range(30)], "tools": [f"Tool {i}" for i in range(30)]}
+
+
+def make_records(n_authors, seed=3):
+    """ORCID in Scholar zapisi; vsako peto delo je skupno s prejšnjim avtorjem, nekaj let manjka."""
+    rnd = random.Random(seed)
+    records, previous = [], []
+    for a in range(n_authors):
+        works = []
+        for w in range(WORKS):
+            if previous and w % 5 == 0:
+                works.append(previous[w])                   # skupno delo s prejšnjim avtorjem
+                continue
+            title = f"Work {a}-{w} " + " ".join(rnd.choice(["network", "causal", "emergent", "ontology"])
+                                                for _ in range(rnd.randint(3, 40)))
+            works.append(("n.d." if w % 13 == 0 else str(rnd.randint(1980, 2025)), title))
+        previous = list(works)
+        works.append(works[1])                              # dvojnik znotraj avtorja
+        source = "orcid" if a % 3 else "scholar"
+        records.append(AuthorBibliography(author=f"Author{a} Surname", source=source, works=works,
+                                          orcid_id=f"0000-0001-{a:04d}-0000" if source == "orcid" else ""))
+    return records
+
+
+def check(prompt, records, budget):
+    fixed = estimate_tokens(STATIC_INSTRUCTIONS)
+    assert fixed < budget
+    assert estimate_tokens(prompt.text) <= budget + 8, (estimate_tokens(prompt.text), budget)
+    lines = [ln for ln in prompt.biblio.splitlines() if ln.startswith("- [")]
+    titles = [ln.split("] ", 1)[1] for ln in lines]
+    assert len(titles) == len(set(titles)), "duplicate titles in compacted bibliography"
+    described = 0
+    for block in re.split(r"^--- ", prompt.biblio, flags=re.M)[1:]:
+        years = [int(y) for y in re.findall(r"^- \[(\d+)\]", block, re.M)]
+        assert years == sorted(years, reverse=True), "works not newest-first"
+        described += len(re.findall(r"^- \[", block, re.M))
+        more = re.search(r"\(\+(\d+) more works", block)
+        described += int(more.group(1)) if more else 0
+    stats = prompt.biblio_stats
+    if not stats["authors_omitted"]:
+        assert described == stats["works"], (described, stats)
+    assert stats["works"] + stats["duplicates"] == sum(len(r.works) for r in records)
+
+
+def main():
+    print(f"{'authors':>7s} {'full biblio':>12s} {'prompt':>8s} {'works':>11s} {'dups':>5s} {'omitted':>7s} {'build':>9s}")
+    for n in AUTHOR_COUNTS:
+        records = make_records(n)
+        legacy = estimate_tokens(format_bibliographies(records))
+        times = []
+        for _ in range(REPEAT):
+            t0 = time.perf_counter()
+            prompt = build_prompt(["Physics", "Linguistics"], DIMENSIONS, records, "How do hierarchies shape knowledge?")
+            times.append(time.perf_counter() - t0)
+        check(prompt, records, PROMPT_TOKENS)
+        s = prompt.biblio_stats
+        print(f"{n:7d} {legacy:9d} tk {prompt.tokens:5d} tk {s['works_included']:4d}/{s['works']:<6d} "
+              f"{s['duplicates']:5d} {s['authors_omitted']:7d} {min(times) * 1000:7.2f}ms")
+    # majhen proračun: vsak od 10 avtorjev dobi vsaj eno delo, preden kdo dobi drugo
+    prompt = build_prompt(["Physics"], {}, make_records(10), "q", budget=900)
+    check(prompt, make_records(10), 900)
+    assert all(re.search(r"^- \[", b, re.M) for b in re.split(r"^--- ", prompt.biblio, flags=re.M)[1:])
+    # predolg element ene dimenzije ne izrine naslednjih
+    dims = format_dimensions({"expertise": "Expert", "context": "goal " * 200, "methods": ["Delphi"], "tools": ["R"]}, budget=40)
+    assert dims.splitlines() == ["- EXPERTISE: Expert", "- CONTEXT / GOAL: (+1 more)", "- METHODOLOGIES: Delphi", "- TOOLS: R"], dims
+    assert estimate_tokens(dims) <= 40, estimate_tokens(dims)
+    print("checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Primerjava označevanja: stari zanki (regex na vozlišče/avtorja) proti
+enoprehodnemu Annotatorju na grafu z 200 vozlišči in besedilu z 10k besedami,
+nato še preverbe pravilnosti (primerjalni operatorji, ki niso HTML značke,
+krajše oznake, ko so daljše porabljene, obstoječe povezave).
+
+    python benchmarks/bench_oznacevanje.py
+"""
+import os
+import random
+import re
+import sys
+import time
+import urllib.parse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sis_oznacevanje import annotate_markdown  # noqa: E402
+
+N_NODES, N_WORDS, N_AUTHORS, REPEAT = 200, 10_000, 6, 5
+
+
+def make_workload(seed=7):
+    rnd = random.Random(seed)
+    vocab = [f"term{i}" for i in range(3000)]
+    nodes = []
+    for i in range(N_NODES):
+        words = rnd.sample(vocab[:600], rnd.choice([1, 1, 2, 3]))
+        nodes.append({"id": f"n{i}", "label": " ".join(w.capitalize() for w in words), "type": "Leaf"})
+    authors = [f"Author{i} Surname{i}" for i in range(N_AUTHORS)]
+    words = [rnd.choice(vocab) for _ in range(N_WORDS)]
+    for k in range(0, N_WORDS, 40):
+        words[k] = nodes[rnd.randrange(N_NODES)]["label"]
+    for k in range(17, N_WORDS, 500):
+        words[k] = rnd.choice(authors)
+    return " ".join(words), nodes, authors
+
+
+def legacy_annotate(main_markdown, nodes, authors):
+    """Prejšnja implementacija iz sis_aplikacija.py (za primerjavo)."""
+    for n in nodes:
+        lbl, nid = n["label"], n["id"]
+        g_url = urllib.parse.quote(lbl)
+        pattern = re.compile(re.escape(lbl), re.IGNORECASE)
+        replacement = f'<span id="{nid}"><a href="https://www.google.com/search?q={g_url}" target="_blank" class="semantic-node-highlight">{lbl}<i class="google-icon">↗</i></a></span>'
+        main_markdown = pattern.sub(replacement, main_markdown, count=1)
+    for auth_stripped in authors:
+        a_url = urllib.parse.quote(auth_stripped)
+        a_pattern = re.compile(re.escape(auth_stripped), re.IGNORECASE)
+        a_rep = f'<a href="https://www.google.com/search?q={a_url}" target="_blank" class="author-search-link">{auth_stripped}<i class="google-icon">↗</i></a>'
+        main_markdown = a_pattern.sub(a_rep, main_markdown)
+    return main_markdown
+
+
+def check():
+    nodes = [{"id": "q", "label": "Quantum"}, {"id": "qf", "label": "Quantum Field"}, {"id": "f", "label": "Field"}]
+    out = annotate_markdown("p < 0.05 where Quantum effects > 10", nodes)
+    assert '<span id="q">' in out and out.startswith("p < 0.05 where ") and out.endswith(" effects > 10"), out
+    out = annotate_markdown("Quantum Field, then Quantum Field, then Field", nodes)
+    assert re.findall(r'<span id="(\w+)">', out) == ["qf", "q", "f"], out
+    out = annotate_markdown('<a href="x">Quantum</a> and <b>Quantum</b>', nodes, ["Field"])
+    assert out.startswith('<a href="x">Quantum</a> and <b><span id="q">'), out
+    out = annotate_markdown("Field by Field", [], ["Field"])
+    assert out.count("author-search-link") == 2, out
+
+
+def best_of(fn, *args):
+    times = []
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    text, nodes, authors = make_workload()
+    legacy = best_of(legacy_annotate, text, nodes, authors)
+    single = best_of(annotate_markdown, text, nodes, authors)
+    print(f"workload: {N_NODES} nodes, {N_WORDS} words ({len(text)} chars), {N_AUTHORS} authors")
+    print(f"legacy per-node regex : {legacy * 1000:8.2f} ms")
+    print(f"single-pass annotator : {single * 1000:8.2f} ms  ({legacy / single:.1f}x)")
+    check()
+    print("checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Zagon in ponovno izvajanje sis_aplikacija.py (streamlit.testing AppTest) s
+proračunom časa. Vsak scenarij teče v svežem interpreterju, da je prvi zagon
+res hladen (uvozi sis_*, st.cache_resource, SQLite shrambe); streamlit sam
+je uvožen vnaprej, ker ga strežnik že ima naložen.
+
+    login    prijavna stran
+    main     prijavljen uporabnik, prazna poizvedba
+    inquiry  vpisana poizvedba (uvoz sis_sinteza, iskanje podobnih sintez)
+
+Ponovno izvajanje se meri s fazo "app_rerun" (sis_metrike), ki jo zapiše
+skripta sama: AppTest ob vsakem zagonu skripto znova prevede, strežnik pa
+prevedeno kodo hrani, zato je čas AppTest (stolpec "wall") le zgornja meja.
+Prijava se konča s st.stop() in ima le proračun hladnega zagona. Preveri še
+število elementov strani (vsak st.* klic je delta, ki jo strežnik pošlje ob
+vsakem ponovnem izvajanju) in da prijava in prazna stran ne uvozita težkih
+modulov (numpy, requests, openai, sis_sinteza). Izhodna koda je 1, če je
+proračun presežen.
+
+    python benchmarks/bench_zagon.py
+    python benchmarks/bench_zagon.py --scale 2      # počasnejši stroj
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "sis_aplikacija.py")
+sys.path.insert(0, ROOT)
+REPEAT = 15
+HEAVY = ("numpy", "requests", "openai", "sis_sinteza", "sis_opravila")
+LAZY_SCENARIOS = ("login", "main")
+QUERY = "How do hierarchies shape knowledge?"
+# scenarij -> (hladen zagon v ms, ponovno izvajanje skripte v ms, elementov strani)
+BUDGETS = {"login": (600, None, 30), "main": (650, 35, 80), "inquiry": (400, 35, 80)}
+
+
+def child(scenario):
+    from streamlit.testing.v1 import AppTest
+
+    from sis_metrike import METRICS
+
+    at = AppTest.from_file(APP, default_timeout=60)
+    if scenario != "login": at.session_state["authenticated"] = True
+    t = time.perf_counter()
+    at.run()
+    if scenario == "inquiry":
+        # prvi zagon brez poizvedbe je v "main"; tu se meri prva poizvedba
+        t = time.perf_counter()
+        at.text_area[0].input(QUERY).run()
+    cold = time.perf_counter() - t
+    assert not at.exception, at.exception
+    times = []
+    for _ in range(REPEAT):
+        t = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - t)
+    assert not at.exception, at.exception
+    script = {stage: p50 for stage, _, p50, _ in METRICS.summary()}.get("app_rerun")
+    print(json.dumps({"cold_ms": cold * 1000, "wall_ms": statistics.median(times) * 1000,
+                      "rerun_ms": script * 1000 if script is not None else None,
+                      "elements": sum(1 for _ in at.main) + sum(1 for _ in at.sidebar),
+                      "heavy": [m for m in HEAVY if m in sys.modules]}))
+
+
+def measure(scenario, cache_dir):
+    env = {**os.environ, "SIS_CACHE_DIR": cache_dir}
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", scenario], cwd=ROOT, env=env,
+                         capture_output=True, text=True, timeout=300)
+    if out.returncode:
+        raise RuntimeError(f"{scenario}: {out.stderr.strip()[-2000:]}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start and rerun budget of the Streamlit app.")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply all budgets (slower machines)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        child(args.child)
+        return 0
+
+    failures = []
+    fmt = lambda v: f"{v:7.1f}ms" if v is not None else f"{'-':>9s}"
+    print(f"{'scenario':9s} {'cold':>9s} {'budget':>9s} {'rerun':>9s} {'budget':>9s} {'wall':>9s} {'elements':>8s}  heavy imports")
+    with tempfile.TemporaryDirectory(prefix="sis-zagon-") as cache_dir:
+        for scenario, (cold_budget, rerun_budget, max_elements) in BUDGETS.items():
+            r = measure(scenario, cache_dir)
+            cold_budget *= args.scale
+            if rerun_budget is not None: rerun_budget *= args.scale
+            print(f"{scenario:9s} {fmt(r['cold_ms'])} {fmt(cold_budget)} {fmt(r['rerun_ms'])} {fmt(rerun_budget)} "
+                  f"{fmt(r['wall_ms'])} {r['elements']:8d}  {', '.join(r['heavy']) or '-'}")
+            if r["cold_ms"] > cold_budget: failures.append(f"{scenario}: cold start {r['cold_ms']:.0f}ms > {cold_budget:.0f}ms")
+            if rerun_budget is not None and r["rerun_ms"] > rerun_budget:
+                failures.append(f"{scenario}: rerun {r['rerun_ms']:.0f}ms > {rerun_budget:.0f}ms")
+            if r["elements"] > max_elements: failures.append(f"{scenario}: {r['elements']} elements > {max_elements}")
+            if scenario in LAZY_SCENARIOS and r["heavy"]:
+                failures.append(f"{scenario}: imported {', '.join(r['heavy'])} before the first inquiry")
+    for f in failures: print("FAIL", f)
+    if not failures: print("checks passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
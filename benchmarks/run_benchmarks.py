@@ -0,0 +1,248 @@
+"""
+Ponovljiva merjenja brez omrežja: cevovod sinteze proti lokalnim nadomestkom
+(benchmarks/stubs.py) in vroče funkcije posamično.
+
+    python benchmarks/run_benchmarks.py                         # izpiše rezultate
+    python benchmarks/run_benchmarks.py --save benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --compare benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --only annotation,graph_extraction
+
+Pri --compare se izpiše primerjava z osnovo; mediana, ki je več kot
+--threshold-krat (privzeto 1.25) in vsaj --min-delta-ms počasnejša, je
+regresija in izhodna koda je 1.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+from stubs import StubConfig, StubServer, make_graph, make_synthesis_text  # noqa: E402
+
+AUTHORS = ", ".join(f"Stub Author{i}" for i in range(6))
+SCIENCES = ["Physics", "Computer Science", "Linguistics"]
+
+
+def _prepare_environment(server, cache_dir):
+    """Preusmeri SIS na nadomestke; mora se zgoditi pred uvozom modulov sis_*."""
+    os.environ.update(server.env)
+    os.environ.update({
+        "SIS_CACHE_DIR": cache_dir,
+        # Omejevalnik ne sme meriti samega sebe
+        "SIS_LLM_RPM": "1000000", "SIS_LLM_TPM": "1000000000", "SIS_LLM_MAX_IN_FLIGHT": "64",
+    })
+
+
+def build_benchmarks(server):
+    from sis_analiza import analyze_graph
+    from sis_arhiv import SynthesisArchive
+    from sis_bibliografija import STREAM_CHUNK, JsonArrayItems, fetch_author_records, get_cache, select_works
+    from sis_graf import extract_semantic_graph
+    from sis_graf_znanja import KnowledgeGraph
+    from sis_navodilo import build_prompt
+    from sis_oznacevanje import annotate_markdown
+    from sis_postavitev import force_layout
+    from sis_prikaz import build_elements, cytoscape_html
+    from sis_sinteza import SynthesisRequest, make_client, run_synthesis
+    from bench_analiza import with_islands
+    from bench_navodilo import DIMENSIONS, make_records
+    from bench_oznacevanje import make_workload
+
+    text, graph = make_synthesis_text(words=3000, n_nodes=200, seed=1)
+    payload = text.split("### SEMANTIC_GRAPH_JSON", 1)[1]
+    truncated = payload[:int(len(payload) * 0.7)]
+    ann_text, ann_nodes, ann_authors = make_workload()
+    big = make_graph(200, seed=2)
+    elements = build_elements(big)
+    for i, el in enumerate(el for el in elements if "source" not in el["data"]):
+        el["position"] = {"x": float(i * 7 % 1200), "y": float(i * 13 % 600)}
+    merged = with_islands(10000)
+    many_authors = make_records(50)
+    node_ids = [n["id"] for n in big["nodes"]]
+    levels = [n["type"] for n in big["nodes"]]
+    edges = [(e["source"], e["target"]) for e in big["edges"]]
+
+    works_doc = json.dumps({"group": [{"work-summary": [{
+        "title": {"title": {"value": f"Work {i} " + "x" * 80}}, "publication-date": {"year": {"value": str(1990 + i % 35)}},
+    }]} for i in range(3000)]})
+
+    def orcid_works(order):
+        parser = JsonArrayItems("group")
+        groups = (item for i in range(0, len(works_doc), STREAM_CHUNK) for item in parser.feed(works_doc[i:i + STREAM_CHUNK]))
+        return select_works(groups, 5, order)
+
+    # Graf znanja s ~20k pojmi iz 100 sintez, ki se delno prekrivajo
+    kg = KnowledgeGraph(os.path.join(os.environ["SIS_CACHE_DIR"], "bench_kg.sqlite3"))
+    for s in range(100):
+        g = make_graph(400, seed=s)
+        for n in g["nodes"]: n["label"] = f"Concept {s * 200 + int(n['id'][1:])} Field"
+        kg.merge(g, source=f"seed{s}")
+    delta = make_graph(40, seed=1000)
+    hub = kg.find("Concept 10000 Field")["id"]
+
+    # Arhiv 1000 sintez s polno prozo za iskanje podobnih poizvedb
+    archive = SynthesisArchive(os.path.join(os.environ["SIS_CACHE_DIR"], "bench_archive.sqlite3"))
+    prose = text.split("### SEMANTIC_GRAPH_JSON", 1)[0]
+    topics = ["crime", "poverty", "migration", "climate", "energy", "quantum", "language", "cognition", "ecology",
+              "health", "education", "justice", "policy", "ethics", "networks", "hierarchies"]
+    for i in range(1000):
+        picked = [topics[(i * k) % len(topics)] for k in (1, 3, 5)]
+        archive.add(f"bench{i}", {"query": f"How do {picked[0]}, {picked[1]} and {picked[2]} interact ({i})?",
+                                  "sciences": [SCIENCES[i % 3], SCIENCES[(i + 1) % 3]], "expertise": "Expert"},
+                    {"text": text}, prose=prose)
+    similar_request = {"query": "How do crime and poverty interact with migration?", "sciences": SCIENCES[:2],
+                       "expertise": "Expert"}
+
+    client = make_client("stub-key")
+    request = SynthesisRequest(query="How do hierarchies shape knowledge?", authors=AUTHORS, sciences=SCIENCES)
+    fanout_request = SynthesisRequest(query="How do hierarchies shape knowledge?", authors=AUTHORS,
+                                      sciences=SCIENCES, fanout=True)
+
+    def bibliography_cold():
+        get_cache().clear()
+        return fetch_author_records(AUTHORS)
+
+    run_synthesis(request, client)      # napolni predpomnilnik za "pipeline_cached"
+
+    # ime -> (funkcija, ponovitve, opis)
+    return {
+        "orcid_works_record": (lambda: orcid_works("record"), 50, "first 5 of 3000 works, streamed"),
+        "orcid_works_year": (lambda: orcid_works("year"), 10, "newest 5 of 3000 works, streamed"),
+        "graph_extraction": (lambda: extract_semantic_graph(payload), 50, "200-node graph JSON"),
+        "graph_extraction_truncated": (lambda: extract_semantic_graph(truncated), 50, "200-node JSON cut at 70%"),
+        "annotation": (lambda: annotate_markdown(ann_text, ann_nodes, ann_authors), 10, "200 nodes, 10k words"),
+        "graph_analysis": (lambda: analyze_graph(big), 100, "components, PageRank, BT/NT cycles, 200 nodes"),
+        "graph_analysis_10k": (lambda: analyze_graph(merged), 10, "10k nodes with islands and dangling edges"),
+        "elements": (lambda: build_elements(big), 200, "200 nodes, PageRank sizes"),
+        "layout": (lambda: force_layout(node_ids, levels, edges), 5, "force layout, 200 nodes"),
+        "cytoscape_html": (lambda: cytoscape_html(elements, "bench", preset_layout=True), 200, "200 nodes, preset"),
+        "kg_merge": (lambda: kg.merge(delta), 20, "40-node graph into ~20k-node store"),
+        "kg_ancestors": (lambda: kg.ancestors(hub), 50, "BT/NT closure, ~20k-node store"),
+        "kg_subgraph": (lambda: kg.subgraph([hub], 2), 50, "depth 2 neighbourhood"),
+        "kg_search": (lambda: kg.search("concept 1"), 50, "label substring, ~20k nodes"),
+        "similar_search": (lambda: archive.search(similar_request), 50, "BM25 + TF-IDF rerank, 1000 syntheses"),
+        "prompt_build": (lambda: build_prompt(SCIENCES, DIMENSIONS, many_authors, "How do hierarchies shape knowledge?"),
+                         20, "50 authors x 40 works into the token budget"),
+        "bibliography_cold": (bibliography_cold, 5, "6 authors, empty cache"),
+        "bibliography_warm": (lambda: fetch_author_records(AUTHORS), 20, "6 authors, cached"),
+        "pipeline": (lambda: run_synthesis(request, client, force=True), 5, "end-to-end, non-streaming"),
+        "pipeline_stream": (lambda: run_synthesis(request, client, force=True, on_prose=lambda p: None), 5,
+                            "end-to-end, streaming"),
+        "pipeline_fanout": (lambda: run_synthesis(fanout_request, client, force=True), 5, "3 fields in parallel"),
+        "pipeline_cached": (lambda: run_synthesis(request, client), 20, "synthesis cache hit"),
+    }
+
+
+def measure(fn, repeat, warmup=1):
+    for _ in range(warmup): fn()
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return {"median_ms": statistics.median(times) * 1000, "min_ms": min(times) * 1000, "repeat": repeat}
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=5).stdout.strip()
+    except Exception:
+        return ""
+
+
+def run(only=None, config=None):
+    config = config or StubConfig()
+    server = StubServer(config).start()
+    try:
+        with tempfile.TemporaryDirectory(prefix="sis-bench-") as cache_dir:
+            _prepare_environment(server, cache_dir)
+            benchmarks = build_benchmarks(server)
+            results = {}
+            for name, (fn, repeat, desc) in benchmarks.items():
+                if only and name not in only: continue
+                results[name] = {**measure(fn, repeat), "desc": desc}
+                print(f"{name:28s} {results[name]['median_ms']:10.2f} ms  (min {results[name]['min_ms']:.2f}, "
+                      f"n={repeat})  {desc}", file=sys.stderr)
+    finally:
+        server.close()
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git": _git_revision(), "python": platform.python_version(),
+            "platform": platform.platform(), "stub": config.__dict__,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=1.25, min_delta_ms=1.0):
+    """Vrne (vrstice poročila, število regresij)."""
+    rows, regressions = [], 0
+    base = baseline.get("results", {})
+    for name, cur in current["results"].items():
+        old = base.get(name)
+        if old is None:
+            rows.append((name, cur["median_ms"], None, None, "new"))
+            continue
+        ratio = cur["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+        if ratio > threshold and cur["median_ms"] - old["median_ms"] >= min_delta_ms:
+            status, regressions = "REGRESSION", regressions + 1
+        elif ratio < 1 / threshold and old["median_ms"] - cur["median_ms"] >= min_delta_ms:
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append((name, cur["median_ms"], old["median_ms"], ratio, status))
+    for name in base:
+        if name not in current["results"]: rows.append((name, None, base[name]["median_ms"], None, "missing"))
+    return rows, regressions
+
+
+def format_report(rows, baseline_meta):
+    out = [f"baseline: {baseline_meta.get('created', '?')} (git {baseline_meta.get('git') or '?'})",
+           f"{'benchmark':28s} {'current':>11s} {'baseline':>11s} {'ratio':>7s}  status"]
+    for name, cur, old, ratio, status in rows:
+        fmt = lambda v: f"{v:9.2f}ms" if v is not None else f"{'-':>11s}"
+        out.append(f"{name:28s} {fmt(cur)} {fmt(old)} {f'{ratio:6.2f}x' if ratio is not None else '      -'}  {status}")
+    return "\n".join(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline SIS benchmarks against local service stand-ins.")
+    parser.add_argument("--save", metavar="PATH", help="write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a JSON baseline")
+    parser.add_argument("--only", default="", help="comma-separated benchmark names")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--latency", type=float, default=StubConfig.latency, help="stub response latency (s)")
+    parser.add_argument("--error-rate", type=float, default=StubConfig.error_rate, help="stub failure rate")
+    args = parser.parse_args(argv)
+
+    only = {n.strip() for n in args.only.split(",") if n.strip()}
+    current = run(only, StubConfig(latency=args.latency, error_rate=args.error_rate))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(current, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        print(f"saved {len(current['results'])} results to {args.save}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        rows, regressions = compare(current, baseline, args.threshold, args.min_delta_ms)
+        print(format_report(rows, baseline.get("meta", {})))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""
+Lokalni nadomestki zunanjih storitev za merjenje brez omrežja.
+
+En HTTP strežnik posnema:
+    POST /openai/v1/chat/completions       Groq (OpenAI) klepet, tudi stream=True (SSE)
+    GET  /orcid/v3.0/search/?q=...         ORCID iskanje
+    GET  /orcid/v3.0/<orcid>/works         ORCID povzetki del
+    GET  /orcid/v3.0/<orcid>/record        ORCID celoten zapis z deli
+    GET  /scholar/graph/v1/paper/search    Semantic Scholar iskanje člankov
+
+Zakasnitev, delež napak in velikost odgovorov nastavlja StubConfig. Samostojno:
+
+    python benchmarks/stubs.py --port 8900 --latency 0.3 --error-rate 0.05
+    SIS_LLM_BASE_URL=http://127.0.0.1:8900/openai/v1 \
+    SIS_ORCID_API=http://127.0.0.1:8900/orcid/v3.0 \
+    SIS_SCHOLAR_API=http://127.0.0.1:8900/scholar/graph/v1 streamlit run sis_aplikacija.py
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.parse
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+GRAPH_MARKER = "### SEMANTIC_GRAPH_JSON"
+LEVELS = ("Class", "Root", "Branch", "Leaf")
+REL_TYPES = ("BT", "NT", "AS", "RT", "EQ")
+
+
+@dataclass
+class StubConfig:
+    latency: float = 0.05           # s pred odgovorom (pri pretakanju do prvega koščka)
+    jitter: float = 0.0             # dodatna naključna zakasnitev 0..jitter
+    token_delay: float = 0.0        # s med koščki pretočnega odgovora
+    error_rate: float = 0.0         # delež zahtevkov, ki vrnejo error_status
+    error_status: int = 503
+    words: int = 1500               # dolžina proze odgovora LLM
+    nodes: int = 40                 # vozlišča grafa v odgovoru LLM
+    edges_per_node: float = 1.5
+    works: int = 20                 # dela v zapisu ORCID (skupine v /works)
+    papers: int = 3                 # zadetki Semantic Scholar
+    orcid_hit_rate: float = 1.0     # delež avtorjev z zadetkom v ORCID
+    seed: int = 0
+
+
+def make_graph(n_nodes, edges_per_node=1.5, seed=0):
+    rnd = random.Random(seed)
+    nodes = [{"id": f"n{i}", "label": f"Concept {i} Field", "type": LEVELS[min(3, i * 4 // max(1, n_nodes))],
+              "color": "#%06x" % rnd.randrange(0xFFFFFF)} for i in range(n_nodes)]
+    edges = []
+    for _ in range(int(n_nodes * edges_per_node)):
+        a, b = rnd.randrange(n_nodes), rnd.randrange(n_nodes)
+        if a != b: edges.append({"source": f"n{a}", "target": f"n{b}", "rel_type": rnd.choice(REL_TYPES)})
+    return {"nodes": nodes, "edges": edges}
+
+
+def make_synthesis_text(words=1500, n_nodes=40, edges_per_node=1.5, seed=0):
+    """Proza z omembami oznak vozlišč, oznaka in JSON grafa (kot odgovor modela)."""
+    rnd = random.Random(seed)
+    graph = make_graph(n_nodes, edges_per_node, seed)
+    vocab = ["synthesis", "hierarchy", "network", "causal", "model", "structure", "emergent", "system",
+             "knowledge", "analysis", "dynamics", "integration", "theory", "evidence", "method"]
+    out, labels = [], [n["label"] for n in graph["nodes"]] or ["Concept"]
+    for i in range(words):
+        out.append(rnd.choice(labels) if i % 25 == 0 else rnd.choice(vocab))
+        if i % 120 == 119: out.append("\n\n")
+    return " ".join(out) + "\n" + GRAPH_MARKER + "\n" + json.dumps(graph), graph
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "SISStub/1.0"
+    disable_nagle_algorithm = True      # sicer keep-alive doda ~40 ms (Nagle + zakasnjeni ACK)
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def cfg(self):
+        return self.server.config
+
+    def _delay(self):
+        extra = self.server.rnd_uniform(0, self.cfg.jitter) if self.cfg.jitter else 0.0
+        time.sleep(self.cfg.latency + extra)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items(): self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _maybe_fail(self):
+        if self.cfg.error_rate and self.server.rnd_uniform(0, 1) < self.cfg.error_rate:
+            self._delay()
+            headers = {"retry-after": "0.05"} if self.cfg.error_status == 429 else None
+            self._send_json(self.cfg.error_status, {"error": {"message": "injected stub failure"}}, headers)
+            return True
+        return False
+
+    def do_GET(self):
+        self.server.count()
+        url = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        if self._maybe_fail(): return
+        if url.path.startswith("/orcid/v3.0/search"):
+            self._delay()
+            name = (query.get("q") or [""])[0]
+            hit = self.server.stable_fraction(name) < self.cfg.orcid_hit_rate
+            ident = "0000-0002-%04d-%04d" % (zlib.crc32(name.encode("utf-8")) % 10000, len(name) % 10000)
+            self._send_json(200, {"num-found": int(hit), "result": [{"orcid-identifier": {"path": ident}}] if hit else []})
+        elif url.path.startswith("/orcid/v3.0/") and url.path.endswith(("/record", "/works")):
+            self._delay()
+            groups = [{"last-modified-date": {"value": 1700000000000 + i},
+                       "external-ids": {"external-id": [{"external-id-type": "doi", "external-id-value": f"10.1000/stub.{i}"}]},
+                       "work-summary": [{
+                           "put-code": 1000 + i, "type": "journal-article",
+                           "title": {"title": {"value": f"Stub work {i} on hierarchical knowledge"}},
+                           "publication-date": {"year": {"value": str(2025 - (i * 7) % 30)}},
+                       }]} for i in range(self.cfg.works)]
+            works = {"last-modified-date": {"value": 1700000000000}, "group": groups,
+                     "path": url.path.rsplit("/", 1)[0] + "/works"}
+            self._send_json(200, works if url.path.endswith("/works") else {"activities-summary": {"works": works}})
+        elif url.path.startswith("/scholar/graph/v1/paper/search"):
+            self._delay()
+            limit = min(self.cfg.papers, int((query.get("limit") or [self.cfg.papers])[0]))
+            self._send_json(200, {"total": limit, "data": [
+                {"paperId": f"p{i}", "title": f"Stub paper {i}", "year": 2024 - i} for i in range(limit)]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        self.server.count()
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": "not found"})
+            return
+        if self._maybe_fail(): return
+        text = self.server.synthesis_text
+        prompt_tokens = sum(len(m.get("content") or "") for m in body.get("messages", [])) // 4
+        completion_tokens = len(text) // 4
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        headers = {"x-ratelimit-remaining-requests": "1000", "x-ratelimit-remaining-tokens": "1000000"}
+        self._delay()
+        if not body.get("stream"):
+            self._send_json(200, {
+                "id": "chatcmpl-stub", "object": "chat.completion", "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": usage,
+            }, headers)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        for k, v in headers.items(): self.send_header(k, v)
+        self.end_headers()
+        self.close_connection = True
+        base = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": body.get("model", "stub")}
+        step = 16     # ≈ 4 žetoni na košček
+        for i in range(0, len(text), step):
+            chunk = {**base, "choices": [{"index": 0, "delta": {"content": text[i:i + step]}, "finish_reason": None}]}
+            self.wfile.write(b"data: " + json.dumps(chunk).encode("utf-8") + b"\n\n")
+            if self.cfg.token_delay: time.sleep(self.cfg.token_delay)
+        final = {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "x_groq": {"usage": usage}}
+        self.wfile.write(b"data: " + json.dumps(final).encode("utf-8") + b"\n\ndata: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        super().__init__((host, port), _Handler)
+        self.config = config or StubConfig()
+        self.synthesis_text, self.graph = make_synthesis_text(
+            self.config.words, self.config.nodes, self.config.edges_per_node, self.config.seed)
+        self.requests = 0
+        self._rnd = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def handle_error(self, request, client_address):
+        # Odjemalec sme prekiniti branje (npr. po prvih N delih ORCID)
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def rnd_uniform(self, a, b):
+        with self._lock:
+            return self._rnd.uniform(a, b)
+
+    def stable_fraction(self, key):
+        return random.Random(f"{self.config.seed}:{key}").random()
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+    @property
+    def base_url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    @property
+    def env(self):
+        """Spremenljivke okolja, ki preusmerijo SIS na ta strežnik."""
+        return {
+            "SIS_LLM_BASE_URL": f"{self.base_url}/openai/v1",
+            "SIS_ORCID_API": f"{self.base_url}/orcid/v3.0",
+            "SIS_SCHOLAR_API": f"{self.base_url}/scholar/graph/v1",
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="sis-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-ins for Groq, ORCID and Semantic Scholar.")
+    parser.add_argument("--port", type=int, default=8900)
+    for name, default in StubConfig.__dataclass_fields__.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default.default), default=default.default)
+    args = vars(parser.parse_args(argv))
+    port = args.pop("port")
+    server = StubServer(StubConfig(**args), port=port)
+    for k, v in server.env.items(): print(f"{k}={v}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
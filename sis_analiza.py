@@ -0,0 +1,204 @@
+"""
+Analitika semantičnega grafa (NumPy): povezljivost, središčnost, cikli.
+
+Med razčlenitvijo in izrisom graf dobi tabelarno sosednost (robovi kot
+polji src/dst, CSR z indptr za sprehode), nad katero je vse vektorizirano:
+    - odstranitev visečih povezav (neznan izvor/cilj), zank in dvojnikov,
+    - komponente z vektoriziranim union-find (pripenjanje korenov +
+      skakanje po kazalcih), otoki se povežejo z glavnim omrežjem,
+    - stopnja in PageRank (na neusmerjenem grafu) za velikost vozlišč,
+    - cikli v hierarhiji BT/NT (luščenje po Kahnu, nato sprehod po ostanku).
+Deluje tudi za združene grafe s tisoči vozlišč.
+"""
+import numpy as np
+
+from sis_graf import DEFAULT_REL_TYPE
+from sis_graf_znanja import BROADER_RELS, NARROWER_RELS
+
+BRIDGE_REL = "AS"               # vrsta sklepne povezave med otokom in glavnim omrežjem
+MIN_NODE_SIZE, MAX_NODE_SIZE = 45, 110
+MAX_CYCLES = 5
+
+
+class GraphArrays:
+    """Vozlišča kot indeksi 0..n-1 in veljavne povezave kot polja src/dst."""
+
+    def __init__(self, graph):
+        self.ids = [n["id"] for n in graph["nodes"]]
+        self.index = {nid: i for i, nid in enumerate(self.ids)}
+        self.n = len(self.ids)
+        raw = graph.get("edges", [])
+        rel_names = [e.get("rel_type") or DEFAULT_REL_TYPE for e in raw]
+        rel_codes = {r: k for k, r in enumerate(dict.fromkeys(rel_names))}
+        src = np.array([self.index.get(e["source"], -1) for e in raw], dtype=np.intp)
+        dst = np.array([self.index.get(e["target"], -1) for e in raw], dtype=np.intp)
+        rel = np.array([rel_codes[r] for r in rel_names], dtype=np.intp)
+        valid = (src >= 0) & (dst >= 0)
+        self.dropped = []       # opisi zavrženih povezav
+        for k in np.flatnonzero(~valid):
+            e = raw[k]
+            missing = e["source"] if src[k] < 0 else e["target"]
+            self.dropped.append(f"edge {e['source']} -> {e['target']} ({rel_names[k]}): unknown node '{missing}' dropped")
+        # zanke in dvojniki (izvor, cilj, vrsta) tiho odpadejo, prva pojavitev ostane
+        cand = np.flatnonzero(valid & (src != dst))
+        key = (src[cand] * self.n + dst[cand]) * max(1, len(rel_codes)) + rel[cand]
+        kept = cand[np.sort(np.unique(key, return_index=True)[1])]
+        self.src, self.dst = src[kept], dst[kept]
+        self.edges = [raw[k] for k in kept]
+        self.rels = [rel_names[k] for k in kept]
+
+
+def csr(n, src, dst):
+    """(indptr, stolpci) usmerjene sosednosti; nasledniki i so stolpci[indptr[i]:indptr[i+1]]."""
+    order = np.argsort(src, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.intp)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return indptr, dst[order]
+
+
+def _gather(indptr, rows):
+    """Indeksi v stolpce CSR za vse naslednike vrstic rows (brez zanke v Pythonu)."""
+    starts, counts = indptr[rows], indptr[rows + 1] - indptr[rows]
+    return np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+
+
+def components(n, src, dst):
+    """
+    Oznaka komponente (0..k-1, po padajoči velikosti) za vsako vozlišče.
+    Union-find brez zank v Pythonu: koreni krajišč se pripnejo na manjši
+    koren (np.minimum.at), nato se kazalci skrajšajo s skakanjem.
+    """
+    parent = np.arange(n)
+    while len(src):
+        ps, pd = parent[src], parent[dst]
+        if np.array_equal(ps, pd): break
+        np.minimum.at(parent, np.maximum(ps, pd), np.minimum(ps, pd))
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent): break
+            parent = grand
+    roots, labels, sizes = np.unique(parent, return_inverse=True, return_counts=True)
+    rank = np.empty(len(roots), dtype=np.intp)
+    rank[np.argsort(-sizes, kind="stable")] = np.arange(len(roots))
+    return rank[labels]
+
+
+def degree(n, src, dst):
+    return np.bincount(src, minlength=n) + np.bincount(dst, minlength=n)
+
+
+def pagerank(n, src, dst, damping=0.85, tol=1e-6, max_iter=100):
+    """PageRank na neusmerjenem grafu (vsaka povezava v obe smeri); vsota je 1."""
+    if n == 0: return np.zeros(0)
+    a, b = np.concatenate([src, dst]), np.concatenate([dst, src])
+    out = np.bincount(a, minlength=n).astype(float)
+    isolated = out == 0
+    inv = np.divide(1.0, out, out=np.zeros(n), where=~isolated)
+    pr = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        spread = np.bincount(b, weights=pr[a] * inv[a], minlength=n)
+        nxt = (1.0 - damping) / n + damping * (spread + pr[isolated].sum() / n)
+        done = np.abs(nxt - pr).sum() < tol
+        pr = nxt
+        if done: break
+    return pr
+
+
+def hierarchy_edges(arrays):
+    """Usmerjeni robovi ožji -> širši iz povezav BT/TT in obrnjenih NT."""
+    up = np.array([r in BROADER_RELS for r in arrays.rels], dtype=bool)
+    down = np.array([r in NARROWER_RELS for r in arrays.rels], dtype=bool)
+    return (np.concatenate([arrays.src[up], arrays.dst[down]]),
+            np.concatenate([arrays.dst[up], arrays.src[down]]))
+
+
+def hierarchy_cycles(n, src, dst, limit=MAX_CYCLES):
+    """
+    Do limit ciklov (seznami indeksov) v usmerjenem grafu src -> dst.
+    Kahnovo luščenje odstrani vse, kar leži na poteh brez ciklov (po frontah
+    z vhodno in nato izhodno stopnjo 0); vsako preostalo vozlišče ima
+    naslednika v ostanku, zato sprehod iz njega vedno zaključi cikel.
+    """
+    alive = np.ones(n, dtype=bool)
+    for a, b in ((src, dst), (dst, src)):
+        indptr, cols = csr(n, a, b)
+        pending = np.bincount(b, minlength=n)
+        frontier = np.flatnonzero(alive & (pending == 0))
+        while len(frontier):
+            alive[frontier] = False
+            succ = cols[_gather(indptr, frontier)]
+            if not len(succ): break
+            np.subtract.at(pending, succ, 1)
+            succ = np.unique(succ)
+            frontier = succ[alive[succ] & (pending[succ] == 0)]
+        # naslednji prehod lušči ponore le med preživelimi
+        keep = alive[src] & alive[dst]
+        src, dst = src[keep], dst[keep]
+    cycles = []
+    indptr, cols = csr(n, src, dst)
+    while len(cycles) < limit and alive.any():
+        path, pos, v = [], {}, int(np.flatnonzero(alive)[0])
+        while v not in pos:
+            pos[v] = len(path)
+            path.append(v)
+            nxt = [int(c) for c in cols[indptr[v]:indptr[v + 1]] if alive[c]]
+            if not nxt: break
+            v = nxt[0]
+        else:
+            cycles.append(path[pos[v]:])
+        alive[path] = False        # vsako vozlišče v največ enem poročanem ciklu
+    return cycles
+
+
+def node_centrality(graph, min_size=MIN_NODE_SIZE, max_size=MAX_NODE_SIZE):
+    """
+    {id: (velikost, stopnja)}; velikost sledi PageRank (koren razmerja do
+    največjega, da hubi ne prevladajo).
+    """
+    arrays = GraphArrays(graph)
+    if not arrays.n: return {}
+    pr = pagerank(arrays.n, arrays.src, arrays.dst)
+    sizes = np.rint(min_size + (max_size - min_size) * np.sqrt(pr / pr.max())).astype(int)
+    return dict(zip(arrays.ids, zip(sizes.tolist(), degree(arrays.n, arrays.src, arrays.dst).tolist())))
+
+
+def analyze_graph(graph, bridge=True):
+    """
+    Vrne (popravljen graf, poročilo, povzetek). Viseče povezave se zavržejo;
+    pri bridge=True se vsak otok poveže z glavnim omrežjem s sklepno povezavo
+    BRIDGE_REL ("inferred": True) med najsrednejšima vozliščema obeh delov.
+    Cikli BT/NT se le sporočijo. povzetek: nodes, edges, components, bridged,
+    dropped_edges, cycles, central (oznake 5 najsrednejših vozlišč).
+    """
+    arrays = GraphArrays(graph)
+    report = list(arrays.dropped)
+    labels = [n["label"] for n in graph["nodes"]]
+    edges = list(arrays.edges)
+    comp = components(arrays.n, arrays.src, arrays.dst)
+    n_comp = int(comp.max()) + 1 if arrays.n else 0
+    pr = pagerank(arrays.n, arrays.src, arrays.dst)
+
+    bridged = 0
+    if bridge and n_comp > 1:
+        # najsrednejše vozlišče vsake komponente: lexsort po (-pr) znotraj komponente
+        order = np.lexsort((-pr, comp))
+        firsts = order[np.flatnonzero(np.r_[True, comp[order][1:] != comp[order][:-1]])]
+        hub = arrays.ids[firsts[0]]
+        for i in firsts[1:]:
+            edges.append({"source": arrays.ids[i], "target": hub, "rel_type": BRIDGE_REL, "inferred": True})
+        bridged = n_comp - 1
+        island_nodes = int((comp > 0).sum())
+        report.append(f"{bridged} disconnected island(s) with {island_nodes} node(s) linked to "
+                      f"'{labels[firsts[0]]}' by inferred {BRIDGE_REL} edges")
+
+    cycles = hierarchy_cycles(arrays.n, *hierarchy_edges(arrays))
+    for cyc in cycles:
+        report.append("BT/NT hierarchy cycle: " + " -> ".join(labels[i] for i in cyc + cyc[:1]))
+
+    top = np.argsort(-pr, kind="stable")[:5]
+    summary = {
+        "nodes": arrays.n, "edges": len(edges), "components": n_comp, "bridged": bridged,
+        "dropped_edges": len(arrays.dropped), "cycles": len(cycles),
+        "central": [labels[i] for i in top],
+    }
+    return {"nodes": graph["nodes"], "edges": edges}, report, summary
@@ -1,13 +1,16 @@
 import streamlit as st
-import json
-import base64
-import requests
-import urllib.parse
-import re
 import time
 from datetime import datetime
-from openai import OpenAI
 import streamlit.components.v1 as components
+from sis_bibliografija import ORCID_WORK_ORDER, ORCID_WORKS_PER_AUTHOR, cache_stats
+from sis_graf_znanja import get_knowledge_graph
+from sis_metrike import METRICS, start_exporter
+from sis_vmesnik import CSS, get_ontology, get_ui_options, logo_html
+# sis_sinteza, sis_opravila, sis_prikaz in sis_postavitev (z njimi numpy in
+# odjemalec LLM) se uvozijo šele ob prvi poizvedbi ali izrisu grafa, zato
+# prijava in prazna stran ne čakata nanje.
+
+rerun_started = time.perf_counter()     # trajanje izvedbe skripte -> faza "app_rerun"
 
 # =========================================================
 # 0. KONFIGURACIJA IN NAPREDNI STILI (CSS)
@@ -19,81 +22,7 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Integracija CSS za vizualne poudarke, Google linke in gladko navigacijo
-st.markdown("""
-<style>
-    .semantic-node-highlight {
-        color: #2a9d8f;
-        font-weight: bold;
-        border-bottom: 2px solid #2a9d8f;
-        padding: 0 2px;
-        background-color: #f0fdfa;
-        border-radius: 4px;
-        transition: all 0.3s ease;
-        text-decoration: none !important;
-    }
-    .semantic-node-highlight:hover {
-        background-color: #ccfbf1;
-        color: #264653;
-        border-bottom: 2px solid #e76f51;
-    }
-    .author-search-link {
-        color: #1d3557;
-        font-weight: bold;
-        text-decoration: none;
-        border-bottom: 1px double #457b9d;
-        padding: 0 1px;
-    }
-    .author-search-link:hover {
-        color: #e63946;
-        background-color: #f1faee;
-    }
-    .google-icon {
-        font-size: 0.75em;
-        vertical-align: super;
-        margin-left: 2px;
-        color: #457b9d;
-        opacity: 0.8;
-    }
-    .stMarkdown {
-        line-height: 1.8;
-        font-size: 1.05em;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-def get_svg_base64(svg_str):
-    """Pretvori SVG v base64 format za prikaz slike."""
-    return base64.b64encode(svg_str.encode('utf-8')).decode('utf-8')
-
-# --- LOGOTIP: 3D RELIEF (Embedded SVG) ---
-SVG_3D_RELIEF = """
-<svg width="240" height="240" viewBox="0 0 240 240" xmlns="http://www.w3.org/2000/svg">
-    <defs>
-        <filter id="reliefShadow" x="-20%" y="-20%" width="150%" height="150%">
-            <feDropShadow dx="4" dy="4" stdDeviation="3" flood-color="#000" flood-opacity="0.4"/>
-        </filter>
-        <linearGradient id="pyramidSide" x1="0%" y1="0%" x2="100%" y2="100%">
-            <stop offset="0%" style="stop-color:#e0e0e0;stop-opacity:1" />
-            <stop offset="100%" style="stop-color:#bdbdbd;stop-opacity:1" />
-        </linearGradient>
-        <linearGradient id="treeGrad" x1="0%" y1="0%" x2="0%" y2="100%">
-            <stop offset="0%" style="stop-color:#66bb6a;stop-opacity:1" />
-            <stop offset="100%" style="stop-color:#2e7d32;stop-opacity:1" />
-        </linearGradient>
-    </defs>
-    <circle cx="120" cy="120" r="100" fill="#f0f0f0" stroke="#000000" stroke-width="4" filter="url(#reliefShadow)" />
-    <path d="M120 40 L50 180 L120 200 Z" fill="url(#pyramidSide)" />
-    <path d="M120 40 L190 180 L120 200 Z" fill="#9e9e9e" />
-    <rect x="116" y="110" width="8" height="70" rx="2" fill="#5d4037" />
-    <circle cx="120" cy="85" r="30" fill="url(#treeGrad)" filter="url(#reliefShadow)" />
-    <circle cx="95" cy="125" r="22" fill="#43a047" filter="url(#reliefShadow)" />
-    <circle cx="145" cy="125" r="22" fill="#43a047" filter="url(#reliefShadow)" />
-    <rect x="70" y="170" width="20" height="12" rx="2" fill="#1565c0" filter="url(#reliefShadow)" />
-    <rect x="150" y="170" width="20" height="12" rx="2" fill="#c62828" filter="url(#reliefShadow)" />
-    <rect x="110" y="185" width="20" height="12" rx="2" fill="#f9a825" filter="url(#reliefShadow)" />
-</svg>
-"""
+st.markdown(CSS, unsafe_allow_html=True)
 
 # --- AVTENTIKACIJA (LOGIN SISTEM) ---
 if 'authenticated' not in st.session_state:
@@ -102,7 +31,7 @@ if 'authenticated' not in st.session_state:
 def login_gate():
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        st.markdown(f'<div style="text-align:center"><img src="data:image/svg+xml;base64,{get_svg_base64(SVG_3D_RELIEF)}" width="200"></div>', unsafe_allow_html=True)
+        st.markdown(logo_html(200), unsafe_allow_html=True)
         st.title("🔐 SIS Access Control")
         st.info("Authorized access for user: GKKP")
         
@@ -134,133 +63,25 @@ if not st.session_state['authenticated']:
     st.stop()
 
 # --- CYTOSCAPE RENDERER Z HIERARHIJO IN INTERAKTIVNOSTJO ---
-def render_cytoscape_network(elements, container_id="cy"):
+def render_cytoscape_network(elements, container_id="cy", preset_layout=False):
     """
     Izriše interaktivno omrežje Cytoscape.js.
+    Pri preset_layout=True imajo vozlišča že izračunan "position" (sis_postavitev).
     """
-    cyto_html = f"""
-    <div id="{container_id}" style="width: 100%; height: 600px; background: #ffffff; border-radius: 15px; border: 1px solid #eee; box-shadow: 2px 2px 12px rgba(0,0,0,0.05);"></div>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/cytoscape/3.26.0/cytoscape.min.js"></script>
-    <script>
-        document.addEventListener('DOMContentLoaded', function() {{
-            var cy = cytoscape({{
-                container: document.getElementById('{container_id}'),
-                elements: {json.dumps(elements)},
-                style: [
-                    {{
-                        selector: 'node',
-                        style: {{
-                            'label': 'data(label)', 'text-valign': 'center', 'color': '#333',
-                            'background-color': 'data(color)', 'width': 'data(size)', 'height': 'data(size)',
-                            'font-size': '12px', 'font-weight': 'bold', 'text-outline-width': 2,
-                            'text-outline-color': '#fff', 'cursor': 'pointer', 'z-index': 'data(z_index)',
-                            'box-shadow': '0px 4px 6px rgba(0,0,0,0.1)'
-                        }}
-                    }},
-                    {{
-                        selector: 'node[type="Class"]',
-                        style: {{ 'shape': 'rectangle', 'border-width': 2, 'border-color': '#2a9d8f', 'background-color': '#f8f9fa' }}
-                    }},
-                    {{
-                        selector: 'edge',
-                        style: {{
-                            'width': 3, 'line-color': '#adb5bd', 'label': 'data(rel_type)',
-                            'font-size': '10px', 'font-weight': 'bold', 'color': '#2a9d8f',
-                            'target-arrow-color': '#adb5bd', 'target-arrow-shape': 'triangle',
-                            'curve-style': 'bezier', 'text-rotation': 'autorotate',
-                            'text-background-opacity': 1, 'text-background-color': '#ffffff',
-                            'text-background-padding': '2px', 'text-background-shape': 'roundrectangle'
-                        }}
-                    }}
-                ],
-                layout: {{ name: 'cose', padding: 50, animate: true, nodeRepulsion: 25000, idealEdgeLength: 120 }}
-            }});
-            
-            cy.on('tap', 'node', function(evt){{
-                var elementId = evt.target.id();
-                var target = window.parent.document.getElementById(elementId);
-                if (target) {{
-                    target.scrollIntoView({{behavior: "smooth", block: "center"}});
-                    target.style.backgroundColor = "#ffffcc";
-                    setTimeout(function(){{ target.style.backgroundColor = "transparent"; }}, 2500);
-                }}
-            }});
-        }});
-    </script>
-    """
-    components.html(cyto_html, height=630)
-
-# --- PRIDOBIVANJE BIBLIOGRAFIJ Z LETNICAMI ---
-def fetch_author_bibliographies(author_input):
-    """Zajame bibliografske podatke z letnicami preko ORCID in Scholar API baz."""
-    if not author_input: return ""
-    author_list = [a.strip() for a in author_input.split(",")]
-    comprehensive_biblio = ""
-    headers = {"Accept": "application/json"}
-    
-    for auth in author_list:
-        orcid_id = None
-        try:
-            search_url = f"https://pub.orcid.org/v3.0/search/?q={auth}"
-            s_res = requests.get(search_url, headers=headers, timeout=5).json()
-            if s_res.get('result'):
-                orcid_id = s_res['result'][0]['orcid-identifier']['path']
-        except: pass
-
-        if orcid_id:
-            try:
-                record_url = f"https://pub.orcid.org/v3.0/{orcid_id}/record"
-                r_res = requests.get(record_url, headers=headers, timeout=5).json()
-                works = r_res.get('activities-summary', {}).get('works', {}).get('group', [])
-                comprehensive_biblio += f"\n--- ORCID BIBLIOGRAPHY: {auth.upper()} ({orcid_id}) ---\n"
-                if works:
-                    for work in works[:5]:
-                        summary = work.get('work-summary', [{}])[0]
-                        title = summary.get('title', {}).get('title', {}).get('value', 'N/A')
-                        pub_date = summary.get('publication-date')
-                        year = pub_date.get('year').get('value', 'n.d.') if pub_date and pub_date.get('year') else "n.d."
-                        comprehensive_biblio += f"- [{year}] {title}\n"
-                else: comprehensive_biblio += "No public works found.\n"
-            except: pass
-        else:
-            try:
-                ss_url = f"https://api.semanticscholar.org/graph/v1/paper/search?query=author:\"{auth}\"&limit=3&fields=title,year"
-                ss_res = requests.get(ss_url, timeout=5).json()
-                papers = ss_res.get("data", [])
-                if papers:
-                    comprehensive_biblio += f"\n--- SCHOLAR BIBLIOGRAPHY: {auth.upper()} ---\n"
-                    for p in papers:
-                        comprehensive_biblio += f"- [{p.get('year','n.d.')}] {p['title']}\n"
-            except: pass
-    return comprehensive_biblio
+    from sis_prikaz import cytoscape_html
+    components.html(cytoscape_html(elements, container_id, preset_layout), height=630)
+
+def get_job_manager():
+    """Skupni upravljalnik opravil sinteze (sis_opravila uvozi sis_sinteza, zato šele ob uporabi)."""
+    from sis_opravila import get_job_manager as job_manager
+    return job_manager()
 
 # =========================================================
-# 1. POPOLNA MULTIDIMENZIONALNA ONTOLOGIJA (VSEH 16 DISCIPLIN)
+# 1. ONTOLOGIJA (KNOWLEDGE_BASE in seznami izbir v sis_vmesnik)
 # =========================================================
-KNOWLEDGE_BASE = {
-    "mental_approaches": ["Perspective shifting", "Induction", "Deduction", "Hierarchy", "Mini-max", "Whole and part", "Addition and composition", "Balance", "Abstraction and elimination", "Openness and closedness", "Bipolarity and dialectics", "Framework and foundation", "Pleasure and displeasure", "Similarity and difference", "Core (Attraction & Repulsion)", "Condensation", "Constant", "Associativity"],
-    "profiles": {"Adventurers": {"description": "Explorers of hidden patterns."}, "Applicators": {"description": "Efficiency focused."}, "Know-it-alls": {"description": "Systemic clarity."}, "Observers": {"description": "System monitors."}},
-    "paradigms": {"Empiricism": "Sensory experience.", "Rationalism": "Deductive logic.", "Constructivism": "Social build.", "Positivism": "Strict facts.", "Pragmatism": "Practical utility."},
-    "knowledge_models": {"Causal Connections": "Causality.", "Principles & Relations": "Fundamental laws.", "Episodes & Sequences": "Time-flow.", "Facts & Characteristics": "Raw data.", "Generalizations": "Frameworks.", "Glossary": "Definitions.", "Concepts": "Abstract constructs."},
-    "subject_details": {
-        "Physics": {"cat": "Natural", "methods": ["Modeling", "Simulation"], "tools": ["Accelerator", "Spectrometer"], "facets": ["Quantum", "Relativity"]},
-        "Chemistry": {"cat": "Natural", "methods": ["Synthesis", "Spectroscopy"], "tools": ["NMR", "Chromatography"], "facets": ["Organic", "Molecular"]},
-        "Biology": {"cat": "Natural", "methods": ["Sequencing", "CRISPR"], "tools": ["Microscope", "Bio-Incubator"], "facets": ["Genetics", "Ecology"]},
-        "Neuroscience": {"cat": "Natural", "methods": ["Neuroimaging", "Electrophys"], "tools": ["fMRI", "EEG"], "facets": ["Plasticity", "Synaptic"]},
-        "Psychology": {"cat": "Social", "methods": ["Trials", "Psychometrics"], "tools": ["fMRI", "Testing Kits"], "facets": ["Behavioral", "Cognitive"]},
-        "Sociology": {"cat": "Social", "methods": ["Ethnography", "Surveys"], "tools": ["Data Analytics", "Archives"], "facets": ["Stratification", "Dynamics"]},
-        "Computer Science": {"cat": "Formal", "methods": ["Algorithm Design", "Verification"], "tools": ["LLMGraphTransformer", "GPU Clusters", "Git"], "facets": ["AI", "Cybersecurity"]},
-        "Medicine": {"cat": "Applied", "methods": ["Clinical Trials", "Epidemiology"], "tools": ["MRI/CT", "Bio-Markers"], "facets": ["Immunology", "Pharmacology"]},
-        "Engineering": {"cat": "Applied", "methods": ["Prototyping", "FEA"], "tools": ["3D Printers", "CAD Software"], "facets": ["Robotics", "Nanotech"]},
-        "Library Science": {"cat": "Applied", "methods": ["Taxonomy", "Appraisal"], "tools": ["OPAC", "Metadata"], "facets": ["Retrieval", "Knowledge Org"]},
-        "Philosophy": {"cat": "Humanities", "methods": ["Socratic", "Phenomenology"], "tools": ["Logic Mapping", "Critical Analysis"], "facets": ["Epistemology", "Metaphysics"]},
-        "Linguistics": {"cat": "Humanities", "methods": ["Corpus Analysis", "Syntactic Parsing"], "tools": ["Praat", "NLTK Toolkit"], "facets": ["Socioling", "CompLing"]},
-        "Geography": {"cat": "Natural/Social", "methods": ["Spatial Analysis", "GIS"], "tools": ["ArcGIS"], "facets": ["Human Geo", "Physical Geo"]},
-        "Geology": {"cat": "Natural", "methods": ["Stratigraphy", "Mineralogy"], "tools": ["Seismograph"], "facets": ["Tectonics", "Petrology"]},
-        "Climatology": {"cat": "Natural", "methods": ["Climate Modeling"], "tools": ["Weather Stations"], "facets": ["Change Analysis"]},
-        "History": {"cat": "Humanities", "methods": ["Archival Research", "Historiography"], "tools": ["Archives"], "facets": ["Social History"]}
-    }
-}
+ONTOLOGY = get_ontology()
+UI_OPTIONS = get_ui_options()
+start_exporter()    # HTTP /metrics, če je nastavljen SIS_METRICS_PORT
 
 # =========================================================
 # 2. STREAMLIT INTERFACE KONSTRUKCIJA
@@ -271,7 +92,7 @@ if 'show_user_guide' not in st.session_state: st.session_state.show_user_guide =
 
 # --- STRANSKA VRSTICA ---
 with st.sidebar:
-    st.markdown(f'<div style="text-align:center"><img src="data:image/svg+xml;base64,{get_svg_base64(SVG_3D_RELIEF)}" width="220"></div>', unsafe_allow_html=True)
+    st.markdown(logo_html(220), unsafe_allow_html=True)
     st.header("⚙️ Control Panel")
     
     # VARNOSTNA NADGRADNJA: Ključ se ne shranjuje v serverske secrets
@@ -280,6 +101,12 @@ with st.sidebar:
         type="password", 
         help="Security: Your key is held only in the volatile memory of this session and is never stored on our servers."
     )
+    stream_output = st.toggle("⚡ Stream synthesis output", value=True, help="Render the dissertation progressively while tokens arrive.")
+    server_layout = st.toggle("🧭 Precompute graph layout", value=True, help="Lay out the semantic graph on the server (cached per graph) instead of animating it in the browser.")
+    fanout_mode = st.toggle("🔀 Parallel per-field synthesis", value=False, help="Write one section per selected science field concurrently and merge their graphs. Lower latency for 3+ fields.")
+    force_regenerate = st.checkbox("🔁 Force regenerate", value=False, help="Ignore cached results for identical inquiries and call the model again.")
+    show_knowledge_graph = st.toggle("🗺️ Knowledge graph explorer", value=False, help="Browse the concepts accumulated from all previous syntheses.")
+    show_performance = st.toggle("📈 Performance panel", value=False, help="Show per-stage latency (p50/p95) and token throughput of recent syntheses.")
     
     if st.button("📖 User Guide"):
         st.session_state.show_user_guide = not st.session_state.show_user_guide
@@ -298,24 +125,20 @@ with st.sidebar:
 
     st.divider()
     st.subheader("📚 Knowledge Explorer")
-    with st.expander("👤 User Profiles"):
-        for p, d in KNOWLEDGE_BASE["profiles"].items(): st.write(f"**{p}**: {d['description']}")
-    with st.expander("🧠 Mental Approaches"):
-        for a in KNOWLEDGE_BASE["mental_approaches"]: st.write(f"• {a}")
-    with st.expander("🌍 Scientific Paradigms"):
-        for p, d in KNOWLEDGE_BASE["paradigms"].items(): st.write(f"**{p}**: {d}")
-    with st.expander("🔬 Science Fields"):
-        for s in sorted(KNOWLEDGE_BASE["subject_details"].keys()): st.write(f"• **{s}**")
-    with st.expander("🏗️ Structural Models"):
-        for m, d in KNOWLEDGE_BASE["knowledge_models"].items(): st.write(f"**{m}**: {d}")
+    for title, body in UI_OPTIONS["explorer"]:
+        with st.expander(title): st.markdown(body)
     
     st.divider()
+    keep_synthesis = st.checkbox("📌 Keep synthesis on reset", key="keep_synthesis_on_reset", help="Keep the current (or running) synthesis when resetting the session.")
     # GUMB ZA RESETIRANJE (BREZ ODJAVE)
     if st.button("♻️ Reset Session", use_container_width=True):
         auth_state = st.session_state.get('authenticated', False)
-        # Pobrišemo vse razen statusa prijave
+        kept = {'authenticated'}
+        if keep_synthesis: kept |= {'synthesis_job', 'reused_synthesis', 'keep_synthesis_on_reset'}
+        elif 'synthesis_job' in st.session_state: get_job_manager().cancel(st.session_state['synthesis_job'])
+        # Pobrišemo vse razen statusa prijave (in po želji opravila sinteze)
         for key in list(st.session_state.keys()):
-            if key != 'authenticated':
+            if key not in kept:
                 del st.session_state[key]
         st.session_state['authenticated'] = auth_state
         # Ročno čiščenje polj povezanih s ključi
@@ -342,13 +165,16 @@ r1_c1, r1_c2, r1_c3 = st.columns([1, 2, 1])
 with r1_c2:
     target_authors = st.text_input("👤 Research Authors:", placeholder="Karl Petrič, Samo Kralj, Teodor Petrič", key="target_authors_key")
     st.caption("Active bibliographic analysis via ORCID (includes publication years).")
+with r1_c3:
+    works_per_author = st.number_input("📄 Works per author:", min_value=1, max_value=50, value=ORCID_WORKS_PER_AUTHOR)
+    newest_works = st.checkbox("Newest works first", value=ORCID_WORK_ORDER == "year", help="Pick each author's most recent ORCID works instead of the first ones listed in the record.")
 
 # ROW 2: CORE CONFIG (MINIMAL SETTINGS)
 r2_c1, r2_c2, r2_c3 = st.columns(3)
 with r2_c1:
-    sel_profiles = st.multiselect("1. User Profiles:", list(KNOWLEDGE_BASE["profiles"].keys()), default=["Adventurers"])
+    sel_profiles = st.multiselect("1. User Profiles:", UI_OPTIONS["profiles"], default=["Adventurers"])
 with r2_c2:
-    all_sciences = sorted(list(KNOWLEDGE_BASE["subject_details"].keys()))
+    all_sciences = UI_OPTIONS["sciences"]
     # PRIVZETO: Physics, Computer science in Linguistics
     sel_sciences = st.multiselect("2. Science Fields:", all_sciences, default=["Physics", "Computer Science", "Linguistics"])
 with r2_c3:
@@ -357,132 +183,219 @@ with r2_c3:
 # ROW 3: PARADIGMS & MODELS (Minimal settings)
 r3_c1, r3_c2, r3_c3 = st.columns(3)
 with r3_c1:
-    sel_models = st.multiselect("4. Structural Models:", list(KNOWLEDGE_BASE["knowledge_models"].keys()), default=["Concepts"])
+    sel_models = st.multiselect("4. Structural Models:", UI_OPTIONS["models"], default=["Concepts"])
 with r3_c2:
-    sel_paradigms = st.multiselect("5. Scientific Paradigms:", list(KNOWLEDGE_BASE["paradigms"].keys()), default=["Rationalism"])
+    sel_paradigms = st.multiselect("5. Scientific Paradigms:", UI_OPTIONS["paradigms"], default=["Rationalism"])
 with r3_c3:
     goal_context = st.selectbox("6. Context / Goal:", ["Scientific Research", "Problem Solving", "Educational", "Policy Making"])
 
 # ROW 4: APPROACHES, METHODS, TOOLS (Minimal settings)
 r4_c1, r4_c2, r4_c3 = st.columns(3)
 with r4_c1:
-    sel_approaches = st.multiselect("7. Mental Approaches:", KNOWLEDGE_BASE["mental_approaches"], default=["Perspective shifting"])
-
-agg_meth, agg_tool = [], []
-for s in sel_sciences:
-    if s in KNOWLEDGE_BASE["subject_details"]:
-        agg_meth.extend(KNOWLEDGE_BASE["subject_details"][s]["methods"])
-        agg_tool.extend(KNOWLEDGE_BASE["subject_details"][s]["tools"])
+    sel_approaches = st.multiselect("7. Mental Approaches:", UI_OPTIONS["approaches"], default=["Perspective shifting"])
 
 with r4_c2:
-    sel_methods = st.multiselect("8. Methodologies:", sorted(list(set(agg_meth))), default=[])
+    sel_methods = st.multiselect("8. Methodologies:", ONTOLOGY.union("methods", sel_sciences), default=[])
 with r4_c3:
-    sel_tools = st.multiselect("9. Specific Tools:", sorted(list(set(agg_tool))), default=[])
+    sel_tools = st.multiselect("9. Specific Tools:", ONTOLOGY.union("tools", sel_sciences), default=[])
 
 st.divider()
 user_query = st.text_area("❓ Your Synthesis Inquiry:", 
                          placeholder="Create a synergy and synthesized knowledge for better resolving global problems like crime, distress, mass migration and poverty",
                          height=150, key="user_query_key")
 
+# Zahtevek (in z njim uvoz sis_sinteza) šele, ko je poizvedba vpisana
+synthesis_request = None
+if user_query:
+    from sis_sinteza import SynthesisRequest
+    synthesis_request = SynthesisRequest(
+        query=user_query, authors=target_authors or "", sciences=sel_sciences,
+        profiles=sel_profiles, expertise=expertise, models=sel_models, paradigms=sel_paradigms,
+        context=goal_context, approaches=sel_approaches, methods=sel_methods, tools=sel_tools,
+        fanout=fanout_mode, works_per_author=int(works_per_author),
+        work_order="year" if newest_works else "record",
+    )
+
+# Prikazana sinteza (končano opravilo ali ponovno uporabljena iz arhiva)
+shown_result = None
+if 'synthesis_job' in st.session_state:
+    shown_job = get_job_manager().get(st.session_state['synthesis_job'])
+    if shown_job is not None and shown_job.result is not None: shown_result = shown_job.result
+elif 'reused_synthesis' in st.session_state:
+    from sis_sinteza import archived_result
+    shown_result = archived_result(st.session_state['reused_synthesis'])
+
+# Podobne pretekle sinteze (arhiv, nekaj ms) se pokažejo pred klicem modela; prikazana se izpusti
+similar_syntheses = []
+if user_query.strip():
+    from sis_sinteza import find_similar, synthesis_key
+    similar_syntheses = find_similar([synthesis_request], exclude={synthesis_key(shown_result)} if shown_result else ())[0]
+if similar_syntheses:
+    with st.expander(f"🔎 Similar previous syntheses ({len(similar_syntheses)})", expanded=similar_syntheses[0]["score"] >= 0.8):
+        st.caption("Reuse an archived synthesis instead of waiting for a new one.")
+        for hit in similar_syntheses:
+            s_c1, s_c2 = st.columns([6, 1])
+            with s_c1:
+                st.write(f"**{hit['score']:.0%}** · {hit['query'][:200]}")
+                st.caption(f"{datetime.fromtimestamp(hit['created']):%Y-%m-%d %H:%M} · " + ", ".join(hit["request"].get("sciences") or []))
+            with s_c2:
+                if st.button("♻️ Reuse", key=f"reuse_synthesis_{hit['id']}"):
+                    if 'synthesis_job' in st.session_state: get_job_manager().cancel(st.session_state.pop('synthesis_job'))
+                    st.session_state['reused_synthesis'] = hit['id']
+                    st.rerun()
+
 # =========================================================
 # 3. JEDRO SINTEZE: GROQ AI + INTERCONNECTED 12D GRAPH
 # =========================================================
+STAGE_LABELS = {
+    "bibliography": "📚 Fetching bibliographic metadata",
+    "llm": "🧠 Generating the synthesis",
+    "graph": "🕸️ Parsing the semantic graph",
+    "annotation": "🔗 Linking concepts and authors",
+}
+
+
+def render_synthesis_result(result, reused=False):
+    from sis_postavitev import precompute_positions
+    from sis_prikaz import build_elements
+    from sis_sinteza import GRAPH_MARKER
+    text_out, g_json, main_markdown = result.text, result.graph, result.markdown
+    graph_report, biblio = result.graph_report, result.biblio
+    st.subheader("📊 Synthesis Output")
+    for author, err in result.biblio_errors.items():
+        st.caption(f"⚠️ Bibliography for {author} unavailable: {err}")
+    if reused:
+        st.caption("♻️ Reused from the synthesis archive. Press Execute for a fresh answer.")
+    elif result.cached:
+        st.caption("♻️ Identical inquiry found in the synthesis cache. Tick \"Force regenerate\" in the sidebar for a fresh answer.")
+
+    st.markdown(main_markdown, unsafe_allow_html=True)
+
+    # --- VIZUALIZACIJA (Interconnected Graph) ---
+    if g_json:
+        st.subheader("🕸️ LLMGraphTransformer: Unified Interdisciplinary Network")
+        st.caption("Colorful nodes represent hierarchical concepts. Dimensions are associatively connected in one large network.")
+        analysis = result.analysis
+        if analysis:
+            st.caption(f"🧩 {analysis['nodes']} concepts · {analysis['edges']} links · {analysis['components']} component(s)"
+                       + (f" · {analysis['bridged']} island(s) bridged (dashed)" if analysis["bridged"] else "")
+                       + (f" · {analysis['cycles']} BT/NT cycle(s)" if analysis["cycles"] else "")
+                       + " · node size = centrality; most central: " + ", ".join(analysis["central"][:3]))
+        
+        with METRICS.span("elements"): elements = build_elements(g_json)
+        if server_layout:
+            with METRICS.span("layout"): precompute_positions(elements)
+        with METRICS.span("cytoscape_render"):
+            render_cytoscape_network(elements, "semantic_viz_full", preset_layout=server_layout)
+    elif GRAPH_MARKER in text_out:
+        st.warning("Graph data could not be parsed.")
+    if graph_report:
+        with st.expander(f"⚠️ Graph repair report ({len(graph_report)} issues)"):
+            for issue in graph_report: st.write(f"• {issue}")
+
+    if biblio:
+        with st.expander("📚 View Metadata Fetched from Research Databases"):
+            st.text(biblio)
+            c_tot = cache_stats()["total"]
+            st.caption(f"Bibliography cache: {c_tot['hits']} hits · {c_tot['stale']} stale · {c_tot['misses']} misses")
+            if result.sizes.get("prompt_sections"):
+                st.caption(f"Prompt: ~{sum(result.sizes['prompt_sections'].values())} tokens · "
+                           f"{result.sizes['biblio_works_included']} of {result.sizes['biblio_works']} works included")
+
+
+@st.fragment(run_every=0.5)
+def render_job_progress(job_id):
+    # Osvežuje se le ta del strani; ob koncu opravila celotna stran izriše rezultat
+    job = get_job_manager().get(job_id)
+    if job is None or job.done:
+        st.rerun()
+    with st.status(f"Synthesizing exhaustive interdisciplinary synergy ({job.elapsed:.0f}s)...", expanded=True):
+        if not job.stages: st.write("⏳ Waiting for a free synthesis worker...")
+        for i, (stage, at) in enumerate(job.stages):
+            st.write(f"{'✅' if i < len(job.stages) - 1 else '⏳'} {STAGE_LABELS.get(stage, stage)} · {at:.1f}s")
+    if job.cancel_requested:
+        st.caption("Cancelling...")
+    elif st.button("⏹️ Cancel synthesis"):
+        get_job_manager().cancel(job_id)
+        st.rerun()
+    if job.prose:
+        st.subheader("📊 Synthesis Output")
+        st.markdown(job.prose + " ▌")
+
+
 if st.button("🚀 Execute Multi-Dimensional Synthesis", use_container_width=True):
     if not api_key: st.error("Missing Groq API Key. Please provide your own key in the sidebar.")
     elif not user_query: st.warning("Please provide an inquiry.")
     else:
         try:
-            biblio = fetch_author_bibliographies(target_authors) if target_authors else ""
-            client = OpenAI(api_key=api_key, base_url="https://api.groq.com/openai/v1")
-            
-            # SISTEMSKO NAVODILO
-            sys_prompt = f"""
-            You are the SIS Synthesizer. Perform an exhaustive dissertation (1500+ words).
-            FIELDS: {", ".join(sel_sciences)}. CONTEXT AUTHORS: {biblio}.
-            
-            THESAURUS ALGORITHM (TT, BT, NT, AS, RT, EQ):
-            Organize knowledge using super-ordinate (TT), broader (BT), narrower (NT), associative (AS), relative (RT), and equivalent (EQ) links.
-            
-            HIERARCHY & INTERCONNECTIVITY:
-            1. Integrate dimensions into a cohesive dissertation focusing purely on the inquiry: {user_query}.
-            2. Connect nodes semantically and with high density to create ONE LARGE CONNECTED NETWORK.
-
-            STRICT FORMATTING & SPACE ALLOCATION:
-            - Focus 100% of the textual content on deep research, causal analysis, and innovative problem-solving synergy.
-            - DO NOT include descriptions of the map or lists of node definitions in the text. 
-            - End with '### SEMANTIC_GRAPH_JSON' followed by valid JSON only.
-            - JSON schema: {{"nodes": [{{"id": "n1", "label": "Text", "type": "Root|Branch|Leaf|Class", "color": "#hex"}}], "edges": [{{"source": "n1", "target": "n2", "rel_type": "BT|NT|AS|Inheritance|..."}}]}}
-            """
-            
-            with st.spinner('Synthesizing exhaustive interdisciplinary synergy (8–40s)...'):
-                response = client.chat.completions.create(
-                    model="llama-3.3-70b-versatile",
-                    messages=[{"role": "system", "content": sys_prompt}, {"role": "user", "content": user_query}],
-                    temperature=0.6, max_tokens=4000
-                )
-                
-                text_out = response.choices[0].message.content
-                parts = text_out.split("### SEMANTIC_GRAPH_JSON")
-                main_markdown = parts[0]
-                
-                # --- PROCESIRANJE BESEDILA (Google Search + Authors + Anchors) ---
-                if len(parts) > 1:
-                    try:
-                        g_json = json.loads(re.search(r'\{.*\}', parts[1], re.DOTALL).group())
-                        # 1. Koncepti -> Google Search + ID značka
-                        for n in g_json.get("nodes", []):
-                            lbl, nid = n["label"], n["id"]
-                            g_url = urllib.parse.quote(lbl)
-                            pattern = re.compile(re.escape(lbl), re.IGNORECASE)
-                            replacement = f'<span id="{nid}"><a href="https://www.google.com/search?q={g_url}" target="_blank" class="semantic-node-highlight">{lbl}<i class="google-icon">↗</i></a></span>'
-                            main_markdown = pattern.sub(replacement, main_markdown, count=1)
-                        
-                        # 2. Avtorji -> Google Search Link
-                        if target_authors:
-                            for auth_name in target_authors.split(","):
-                                auth_stripped = auth_name.strip()
-                                if auth_stripped:
-                                    a_url = urllib.parse.quote(auth_stripped)
-                                    a_pattern = re.compile(re.escape(auth_stripped), re.IGNORECASE)
-                                    a_rep = f'<a href="https://www.google.com/search?q={a_url}" target="_blank" class="author-search-link">{auth_stripped}<i class="google-icon">↗</i></a>'
-                                    main_markdown = a_pattern.sub(a_rep, main_markdown)
-                    except: pass
-
-                st.subheader("📊 Synthesis Output")
-                st.markdown(main_markdown, unsafe_allow_html=True)
-
-                # --- VIZUALIZACIJA (Interconnected Graph) ---
-                if len(parts) > 1:
-                    try:
-                        g_json = json.loads(re.search(r'\{.*\}', parts[1], re.DOTALL).group())
-                        st.subheader("🕸️ LLMGraphTransformer: Unified Interdisciplinary Network")
-                        st.caption("Colorful nodes represent hierarchical concepts. Dimensions are associatively connected in one large network.")
-                        
-                        elements = []
-                        for n in g_json.get("nodes", []):
-                            level = n.get("type", "Branch")
-                            size = 100 if level == "Class" else (90 if level == "Root" else (70 if level == "Branch" else 50))
-                            color = n.get("color", "#2a9d8f")
-                            elements.append({"data": {
-                                "id": n["id"], "label": n["label"], "color": color,
-                                "size": size, "z_index": 10 if level in ["Root", "Class"] else 1
-                            }})
-                        for e in g_json.get("edges", []):
-                            elements.append({"data": {
-                                "source": e["source"], "target": e["target"], "rel_type": e.get("rel_type", "AS")
-                            }})
-                        render_cytoscape_network(elements, "semantic_viz_full")
-                    except: st.warning("Graph data could not be parsed.")
-
-                if biblio:
-                    with st.expander("📚 View Metadata Fetched from Research Databases"):
-                        st.text(biblio)
-                
+            from sis_sinteza import make_client
+            client = make_client(api_key)
+            jobs = get_job_manager()
+            # Nova sinteza nadomesti morebitno še tekočo iz te seje
+            if 'synthesis_job' in st.session_state: jobs.cancel(st.session_state['synthesis_job'])
+            st.session_state['synthesis_job'] = jobs.submit(synthesis_request, client, force=force_regenerate, stream=stream_output)
+            st.session_state.pop('reused_synthesis', None)
         except Exception as e:
             st.error(f"Synthesis failed: {e}")
 
+synthesis_job = get_job_manager().get(st.session_state['synthesis_job']) if 'synthesis_job' in st.session_state else None
+if synthesis_job is not None:
+    from sis_opravila import CANCELLED, DONE, FAILED
+    if not synthesis_job.done:
+        render_job_progress(synthesis_job.id)
+    elif synthesis_job.status == DONE:
+        try:
+            render_synthesis_result(synthesis_job.result)
+        except Exception as e:
+            st.error(f"Synthesis failed: {e}")
+    elif synthesis_job.status == FAILED:
+        st.error(f"Synthesis failed: {synthesis_job.error}")
+    elif synthesis_job.status == CANCELLED:
+        st.info("Synthesis cancelled.")
+elif 'reused_synthesis' in st.session_state and shown_result is not None:
+    render_synthesis_result(shown_result, reused=True)
+
+if show_knowledge_graph:
+    knowledge_graph = get_knowledge_graph()
+    with st.expander("🗺️ Accumulated Knowledge Graph", expanded=True):
+        if knowledge_graph is None: st.caption("The knowledge graph store is disabled (SIS_KNOWLEDGE_GRAPH is empty).")
+        else:
+            kg_stats = knowledge_graph.stats()
+            st.caption(f"{kg_stats['nodes']} concepts · {kg_stats['edges']} links · merged from {kg_stats['syntheses']} syntheses")
+            kg_term = st.text_input("Find a concept:", key="kg_term", placeholder="e.g. Quantum")
+            kg_matches = knowledge_graph.search(kg_term) if kg_term else []
+            if kg_term and not kg_matches: st.caption("No matching concepts yet.")
+            if kg_matches:
+                kg_c1, kg_c2 = st.columns([3, 1])
+                with kg_c1:
+                    kg_node = st.selectbox("Concept:", kg_matches, format_func=lambda n: f"{n['label']} ({n['seen']}×)")
+                with kg_c2:
+                    kg_depth = st.slider("Depth:", 1, 3, 1)
+                kg_up = knowledge_graph.ancestors(kg_node["id"])
+                kg_down = knowledge_graph.descendants(kg_node["id"])
+                kg_names = knowledge_graph.nodes([i for i, _ in kg_up + kg_down])
+                st.write("**Broader (BT):** " + (", ".join(kg_names[i]["label"] for i, _ in kg_up) or "—"))
+                st.write("**Narrower (NT):** " + (", ".join(kg_names[i]["label"] for i, _ in kg_down) or "—"))
+                from sis_postavitev import precompute_positions
+                from sis_prikaz import build_elements
+                kg_elements = build_elements(knowledge_graph.subgraph([kg_node["id"]], kg_depth))
+                if server_layout: precompute_positions(kg_elements)
+                render_cytoscape_network(kg_elements, "knowledge_graph_viz", preset_layout=server_layout)
+
+if show_performance:
+    with st.expander(f"📈 Performance (last {METRICS.runs.maxlen} runs)", expanded=True):
+        stages = METRICS.summary()
+        if not stages: st.caption("No measurements yet. Run a synthesis first.")
+        else:
+            st.table([{"stage": stage, "samples": n, "p50 (s)": f"{p50:.3f}", "p95 (s)": f"{p95:.3f}"}
+                      for stage, n, p50, p95 in sorted(stages, key=lambda r: -r[3])])
+        if METRICS.runs:
+            st.caption("Recent syntheses (seconds per stage, tokens, tokens/s)")
+            st.dataframe(list(METRICS.runs)[::-1], use_container_width=True)
+
 st.divider()
 st.caption("SIS Universal Knowledge Synthesizer | v12.1 Organic Interdisciplinary Integration | 2026")
+METRICS.observe("app_rerun", time.perf_counter() - rerun_started)
 
 
 
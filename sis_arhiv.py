@@ -0,0 +1,203 @@
+"""
+Arhiv preteklih sintez z iskanjem podobnih poizvedb (SQLite FTS5 + TF-IDF).
+
+Vsaka sveža sinteza se shrani skupaj z izbirami (znanosti, profili,
+paradigme, modeli, pristopi ...). Iskanje poteka v dveh korakih:
+    1. FTS5 z BM25 (poizvedba, izbire, proza) izbere do CANDIDATES kandidatov,
+    2. NumPy TF-IDF kosinusna podobnost nad besedami poizvedbe in izbirami
+       jih razvrsti; izbire so posebne značilke "polje=vrednost".
+Dokumentne frekvence značilk se vodijo v tabeli terms ob vpisu, zato iskanje
+ne bere celotnega arhiva in traja nekaj milisekund tudi pri tisočih sintezah.
+"""
+import json
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+from sis_graf import normalize_label
+from sis_predpomnilnik import CACHE_DIR, SQLiteStore, chunks
+
+# Prazna vrednost SIS_SYNTHESIS_ARCHIVE izklopi arhiv
+ARCHIVE_PATH = os.environ.get("SIS_SYNTHESIS_ARCHIVE", os.path.join(CACHE_DIR, "synthesis_archive.sqlite3"))
+CANDIDATES = 50                 # kandidati iz BM25 za razvrščanje s TF-IDF
+MIN_SCORE = 0.3                 # spodnja meja podobnosti za prikaz
+LIST_FIELDS = ("sciences", "profiles", "paradigms", "models", "approaches", "methods", "tools")
+SCALAR_FIELDS = ("expertise", "context")
+BM25_WEIGHTS = (5.0, 2.0, 0.5)  # poizvedba, izbire, proza
+_MAX_QUERY_TERMS = 32
+
+STOPWORDS = frozenset(
+    "a about all also an and any are as at be been but by can could do does for from has have how in into is it "
+    "its like may more most not of on or our should such than that the their them then there these they this "
+    "those to was we what when where which while who why will with would".split())
+
+_WORD_RE = re.compile(r"\w+")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS syntheses ("
+    " id INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, created REAL NOT NULL,"
+    " query TEXT NOT NULL, request TEXT NOT NULL, features TEXT NOT NULL, result TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS terms (term TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS syntheses_fts USING fts5("
+    " query, selections, prose, content='', tokenize='unicode61 remove_diacritics 2')",
+)
+
+
+def tokenize(text):
+    """Besede brez naglasov in mašil (kot jih vidi FTS5 unicode61)."""
+    folded = unicodedata.normalize("NFKD", str(text).casefold())
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    return [w for w in _WORD_RE.findall(folded) if len(w) > 1 and w not in STOPWORDS]
+
+
+def request_features(request):
+    """
+    {značilka: pogostost} za TF-IDF: besede poizvedbe in izbire kot
+    "polje=vrednost". request je slovar polj SynthesisRequest.
+    """
+    feats = {}
+    for w in tokenize(request.get("query", "")):
+        feats[w] = feats.get(w, 0) + 1
+    for name in LIST_FIELDS:
+        for value in request.get(name) or ():
+            feats[f"{name}={normalize_label(value)}"] = 1
+    for name in SCALAR_FIELDS:
+        if request.get(name): feats[f"{name}={normalize_label(request[name])}"] = 1
+    return feats
+
+
+def _selections_text(request):
+    return " ".join(str(v) for name in LIST_FIELDS for v in request.get(name) or ())
+
+
+def _match_expression(request):
+    """FTS5 MATCH: ALI nad besedami poizvedbe in izbir (None, če ni nobene)."""
+    terms = list(dict.fromkeys(tokenize(request.get("query", "")) + tokenize(_selections_text(request))))
+    if not terms: return None
+    return " OR ".join(f'"{t}"' for t in terms[:_MAX_QUERY_TERMS])
+
+
+class SynthesisArchive(SQLiteStore):
+    def __init__(self, path=ARCHIVE_PATH, candidates=CANDIDATES):
+        super().__init__(path)
+        self.candidates = candidates
+        self._write_lock = threading.Lock()
+        for stmt in _SCHEMA: self._conn().execute(stmt)
+
+    # --- vpis ---
+    def add(self, key, request, result, prose=""):
+        """
+        Shrani sintezo (request in result sta slovarja) in vrne njen id; z enakim
+        key (npr. zgostitev odgovora) se ista sinteza ne shrani dvakrat (vrne None).
+        """
+        feats = request_features(request)
+        with self._write_lock:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO syntheses (key, created, query, request, features, result) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, time.time(), request.get("query", ""), json.dumps(request, ensure_ascii=False),
+                     json.dumps(feats, ensure_ascii=False), json.dumps(result, ensure_ascii=False)))
+                if not cur.rowcount:
+                    conn.execute("ROLLBACK")
+                    return None
+                entry_id = cur.lastrowid
+                conn.execute("INSERT INTO syntheses_fts (rowid, query, selections, prose) VALUES (?, ?, ?, ?)",
+                             (entry_id, request.get("query", ""), _selections_text(request), prose))
+                conn.executemany("INSERT INTO terms (term, df) VALUES (?, 1) ON CONFLICT (term) DO UPDATE SET df = df + 1",
+                                 [(f,) for f in feats])
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return entry_id
+
+    # --- iskanje ---
+    def search(self, request, limit=5, min_score=MIN_SCORE, exclude=()):
+        """
+        Najbolj podobne pretekle sinteze za request (slovar polj SynthesisRequest):
+        [{"id", "score", "query", "created", "request"}], najboljša najprej.
+        Sinteze s ključem iz exclude (npr. pravkar prikazana) se izpustijo.
+        """
+        return self.search_many([request], limit, min_score, exclude)[0]
+
+    def search_many(self, requests, limit=5, min_score=MIN_SCORE, exclude=()):
+        """Paketno iskanje: en seznam zadetkov na zahtevek, skupen priključek in IDF."""
+        conn = self._conn()
+        total = conn.execute("SELECT COUNT(*) FROM syntheses").fetchone()[0]
+        if not total: return [[] for _ in requests]
+        pools = []
+        for request in requests:
+            match = _match_expression(request)
+            ids = [r[0] for r in conn.execute(
+                "SELECT rowid FROM syntheses_fts WHERE syntheses_fts MATCH ? ORDER BY bm25(syntheses_fts, ?, ?, ?) LIMIT ?",
+                (match, *BM25_WEIGHTS, self.candidates))] if match else []
+            pools.append((request_features(request), ids))
+
+        rows = {}
+        wanted = sorted({i for _, ids in pools for i in ids})
+        for part in chunks(wanted):
+            for row in conn.execute(
+                    f"SELECT id, key, created, query, request, features FROM syntheses WHERE id IN ({','.join('?' * len(part))})", part):
+                if row[1] not in exclude: rows[row[0]] = (row[2], row[3], row[4], json.loads(row[5]))
+        vocab = sorted({f for feats, _ in pools for f in feats} | {f for r in rows.values() for f in r[3]})
+        df = {}
+        for part in chunks(vocab):
+            df.update(conn.execute(f"SELECT term, df FROM terms WHERE term IN ({','.join('?' * len(part))})", part))
+        return [self._rank(feats, [i for i in ids if i in rows], rows, df, total, limit, min_score)
+                for feats, ids in pools]
+
+    @staticmethod
+    def _rank(feats, ids, rows, df, total, limit, min_score):
+        """Kosinusna podobnost TF-IDF (log tf * idf) poizvedbe s kandidati."""
+        if not ids or not feats: return []
+        index = {f: j for j, f in enumerate(feats)}
+        idf_of = lambda f: math.log((total + 1) / (df.get(f, 0) + 1)) + 1.0
+        q = np.array([(1.0 + math.log(tf)) * idf_of(f) for f, tf in feats.items()])
+        matrix = np.zeros((len(ids), len(feats)))
+        norms = np.empty(len(ids))
+        for r, entry_id in enumerate(ids):
+            weights = []
+            for f, tf in rows[entry_id][3].items():
+                w = (1.0 + math.log(tf)) * idf_of(f)
+                weights.append(w)
+                j = index.get(f)
+                if j is not None: matrix[r, j] = w
+            norms[r] = math.sqrt(sum(w * w for w in weights)) or 1.0
+        scores = matrix @ q / (norms * (np.linalg.norm(q) or 1.0))
+        order = np.argsort(-scores, kind="stable")[:limit]
+        out = []
+        for r in order:
+            if scores[r] < min_score: break
+            created, query, request = rows[ids[r]][:3]
+            out.append({"id": ids[r], "score": float(scores[r]), "query": query, "created": created,
+                        "request": json.loads(request)})
+        return out
+
+    def get(self, entry_id):
+        """(request, result) shranjene sinteze ali None."""
+        row = self._conn().execute("SELECT request, result FROM syntheses WHERE id = ?", (entry_id,)).fetchone()
+        return (json.loads(row[0]), json.loads(row[1])) if row else None
+
+    def stats(self):
+        return {"syntheses": self._conn().execute("SELECT COUNT(*) FROM syntheses").fetchone()[0]}
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_synthesis_archive():
+    """Skupni arhiv sintez za ta proces (None, če je izklopljen)."""
+    global _archive
+    if not ARCHIVE_PATH: return None
+    with _archive_lock:
+        if _archive is None:
+            _archive = SynthesisArchive()
+        return _archive
@@ -0,0 +1,411 @@
+"""
+Sočasno pridobivanje bibliografij avtorjev (ORCID + Semantic Scholar).
+Iskanje ORCID id-jev, povzetki del in Scholar seznami so trajno predpomnjeni.
+
+Dela ORCID se berejo s končne točke /works (povzetki, ne celoten zapis) in se
+razčlenjujejo sproti: pri vrstnem redu "record" se prenos prekine po prvih
+ORCID_WORKS_PER_AUTHOR delih, pri "year" se hrani le najnovejših N.
+"""
+import codecs
+import heapq
+import json
+import os
+import re
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from sis_metrike import METRICS
+from sis_predpomnilnik import CACHE_DIR, PersistentCache
+
+# Naslova API-jev je mogoče preusmeriti (npr. na lokalne nadomestke v benchmarks/stubs.py)
+ORCID_API = os.environ.get("SIS_ORCID_API", "https://pub.orcid.org/v3.0")
+SCHOLAR_API = os.environ.get("SIS_SCHOLAR_API", "https://api.semanticscholar.org/graph/v1")
+
+REQUEST_TIMEOUT = 5      # sekunde na posamezen HTTP klic
+OVERALL_DEADLINE = 12    # sekunde za celoten nabor avtorjev
+MAX_WORKERS = 6
+
+# Največje število hkratnih zahtevkov na strežnik (javni API-ji imajo omejitve)
+HOST_LIMITS = {"pub.orcid.org": 4, "api.semanticscholar.org": 2}
+DEFAULT_HOST_LIMIT = 2
+
+# Svežina po vrsti zapisa (s) in dodatno okno, ko se postreže zastarelo vrednost
+CACHE_TTLS = {"orcid_id": 7 * 86400, "orcid_works": 86400, "scholar_works": 86400}
+CACHE_STALE_TTLS = {"orcid_id": 30 * 86400, "orcid_works": 7 * 86400, "scholar_works": 7 * 86400}
+# "Ni zadetka" v ORCID je le kratko svež: avtor medtem lahko dobi ORCID iD
+CACHE_NEGATIVE_TTLS = {"orcid_id": 3600}
+CACHE_MAX_ENTRIES = 20000
+
+ORCID_WORKS_PER_AUTHOR = int(os.environ.get("SIS_ORCID_WORKS", 5))
+ORCID_WORK_ORDER = os.environ.get("SIS_ORCID_WORK_ORDER", "record")    # "record" ali "year" (najnovejša)
+WORK_ORDERS = ("record", "year")
+STREAM_CHUNK = 16384
+
+_session = None
+_cache = None
+_session_lock = threading.Lock()
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+
+@dataclass
+class AuthorBibliography:
+    """Rezultat poizvedbe za enega avtorja."""
+    author: str
+    source: str = ""            # "orcid", "scholar" ali "" ob neuspehu
+    orcid_id: str = ""
+    works: list = field(default_factory=list)   # [(leto, naslov), ...]
+    error: str = ""
+    elapsed: float = 0.0
+
+
+def get_session():
+    """Vrne skupno keep-alive HTTP sejo z bazenom povezav (requests se uvozi ob prvem klicu)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=len(HOST_LIMITS) + 1, pool_maxsize=MAX_WORKERS)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            s.headers.update({"Accept": "application/json"})
+            _session = s
+        return _session
+
+
+def get_cache():
+    """Vrne skupni trajni predpomnilnik bibliografskih poizvedb."""
+    global _cache
+    with _session_lock:
+        if _cache is None:
+            _cache = PersistentCache(
+                os.path.join(CACHE_DIR, "bibliography.sqlite3"),
+                CACHE_TTLS, CACHE_STALE_TTLS, max_entries=CACHE_MAX_ENTRIES, negative_ttls=CACHE_NEGATIVE_TTLS,
+            )
+        return _cache
+
+
+def cache_stats():
+    return get_cache().stats()
+
+
+def _refresh_deadline():
+    return time.monotonic() + 2 * REQUEST_TIMEOUT
+
+
+def _host_slot(host):
+    with _host_slots_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(HOST_LIMITS.get(host, DEFAULT_HOST_LIMIT))
+        return _host_slots[host]
+
+
+def _get_json(url, params, deadline):
+    """GET z omejitvijo sočasnosti na strežnik in spoštovanjem skupnega roka."""
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("deadline exceeded")
+    host = urllib.parse.urlsplit(url).hostname or ""
+    slot = _host_slot(host)
+    if not slot.acquire(timeout=remaining):
+        raise TimeoutError("deadline exceeded while waiting for a connection slot")
+    outcome = "error"
+    try:
+        timeout = min(REQUEST_TIMEOUT, max(deadline - time.monotonic(), 0.1))
+        res = get_session().get(url, params=params, timeout=timeout)
+        METRICS.inc("sis_http_response_bytes_total", len(res.content), host=host)
+        outcome = str(res.status_code)
+        res.raise_for_status()
+        return res.json()
+    finally:
+        slot.release()
+        METRICS.inc("sis_http_requests_total", host=host, outcome=outcome)
+
+
+def _iter_text(url, params, deadline):
+    """Pretočni GET: sproti vrača dekodirane koščke telesa; prekinitev zapre povezavo."""
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("deadline exceeded")
+    host = urllib.parse.urlsplit(url).hostname or ""
+    slot = _host_slot(host)
+    if not slot.acquire(timeout=remaining):
+        raise TimeoutError("deadline exceeded while waiting for a connection slot")
+    outcome, received, res = "error", 0, None
+    try:
+        timeout = min(REQUEST_TIMEOUT, max(deadline - time.monotonic(), 0.1))
+        res = get_session().get(url, params=params, timeout=timeout, stream=True)
+        outcome = str(res.status_code)
+        res.raise_for_status()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        for chunk in res.iter_content(chunk_size=STREAM_CHUNK):
+            received += len(chunk)
+            yield decoder.decode(chunk)
+            if time.monotonic() > deadline:
+                raise TimeoutError("deadline exceeded while reading the response")
+        yield decoder.decode(b"", final=True)
+    finally:
+        if res is not None: res.close()
+        slot.release()
+        METRICS.inc("sis_http_response_bytes_total", received, host=host)
+        METRICS.inc("sis_http_requests_total", host=host, outcome=outcome)
+
+
+_SIGNIFICANT_RE = re.compile(r'[{}\[\]":]')
+_STRING_RE = re.compile(r'"(?:[^"\\]|\\.)*"')
+_SEPARATOR_RE = re.compile(r'[\s,]*')
+_DECODER = json.JSONDecoder()
+
+
+class JsonArrayItems:
+    """
+    Sproten razčlenjevalnik: iz JSON objekta po koščkih vrača elemente
+    tabele pod ključem key na vrhnji ravni. Do začetka tabele se besedilo
+    pregleduje po ločilih in nizih, elementi pa se dekodirajo z raw_decode
+    (v C). V pomnilniku je le nedokončan element, ne celoten dokument.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.done = False
+        self._buf = ""
+        self._pos = 0               # mesto v _buf, kjer se nadaljuje branje
+        self._depth = 0
+        self._last_key = None
+        self._in_array = False
+
+    def feed(self, text):
+        """Doda košček besedila in vrne seznam elementov, ki so se v njem zaključili."""
+        if self.done or not text: return []
+        buf, pos = self._buf[self._pos:] + text, 0
+        if not self._in_array:
+            pos = self._find_array(buf)
+        items = []
+        while self._in_array:
+            pos = _SEPARATOR_RE.match(buf, pos).end()
+            if pos >= len(buf): break
+            if buf[pos] == "]":
+                self.done = True
+                break
+            try:
+                item, end = _DECODER.raw_decode(buf, pos)
+            except ValueError:
+                break               # element se nadaljuje v naslednjem koščku
+            if end >= len(buf): break   # število na koncu koščka je lahko še nedokončano
+            items.append(item)
+            pos = end
+        self._buf, self._pos = buf, pos
+        if pos > STREAM_CHUNK:      # zavrzi prebrano
+            self._buf, self._pos = buf[pos:], 0
+        return items
+
+    def _find_array(self, buf):
+        """Pregleduje do "key": [ na vrhnji ravni; vrne mesto za [ ali mesto za nadaljevanje."""
+        scan = 0
+        while True:
+            m = _SIGNIFICANT_RE.search(buf, scan)
+            if m is None: return len(buf)
+            ch, i = m.group(), m.start()
+            if ch == '"':
+                sm = _STRING_RE.match(buf, i)
+                if sm is None: return i     # niz se nadaljuje v naslednjem koščku
+                if self._depth == 1: self._last_key = sm.group()[1:-1]
+                scan = sm.end()
+                continue
+            scan = i + 1
+            if ch == ":": continue
+            if ch in "{[":
+                self._depth += 1
+                if ch == "[" and self._depth == 2 and self._last_key == self.key:
+                    self._in_array = True
+                    return scan
+            else:
+                self._depth -= 1
+
+
+def _work_year_title(group):
+    summary = (group.get('work-summary') or [{}])[0]
+    title = ((summary.get('title') or {}).get('title') or {}).get('value', 'N/A')
+    pub_date = summary.get('publication-date')
+    year = pub_date.get('year').get('value', 'n.d.') if pub_date and pub_date.get('year') else "n.d."
+    return year, title
+
+
+def _year_key(year):
+    try:
+        return int(year)
+    except (TypeError, ValueError):
+        return -1   # "n.d." na konec
+
+
+def select_works(groups, limit=ORCID_WORKS_PER_AUTHOR, order=ORCID_WORK_ORDER):
+    """
+    Iz (pretočnega) zaporedja skupin del izbere največ limit (leto, naslov).
+    order="record" vzame prve in neha brati; "year" obdrži najnovejših limit.
+    """
+    if order not in WORK_ORDERS: raise ValueError(f"unknown ORCID work order '{order}'")
+    if limit <= 0: return []
+    if order == "record":
+        out = []
+        for group in groups:
+            out.append(_work_year_title(group))
+            if len(out) >= limit: break
+        return out
+    heap = []
+    for idx, group in enumerate(groups):
+        year, title = _work_year_title(group)
+        entry = (_year_key(year), -idx, year, title)     # ob enakem letu prej navedeno delo
+        if len(heap) < limit: heapq.heappush(heap, entry)
+        elif entry > heap[0]: heapq.heapreplace(heap, entry)
+    return [(year, title) for _, _, year, title in sorted(heap, reverse=True)]
+
+
+def _iter_json_items(url, params, key, deadline):
+    parser = JsonArrayItems(key)
+    chunks = _iter_text(url, params, deadline)
+    try:
+        for text in chunks:
+            yield from parser.feed(text)
+            if parser.done: return
+    finally:
+        chunks.close()
+
+
+def _orcid_search(auth, deadline):
+    with METRICS.span("orcid_search"):
+        s_res = _get_json(f"{ORCID_API}/search/", {"q": auth, "rows": 1}, deadline)
+    if s_res.get('result'):
+        return s_res['result'][0]['orcid-identifier']['path']
+    return None
+
+
+def _orcid_works(orcid_id, deadline, limit=ORCID_WORKS_PER_AUTHOR, order=ORCID_WORK_ORDER):
+    with METRICS.span("orcid_works"):
+        groups = _iter_json_items(f"{ORCID_API}/{orcid_id}/works", None, "group", deadline)
+        try:
+            return select_works(groups, limit, order)
+        finally:
+            groups.close()
+
+
+def _scholar_works(auth, deadline):
+    params = {"query": f'author:"{auth}"', "limit": 3, "fields": "title,year"}
+    with METRICS.span("scholar_search"):
+        ss_res = _get_json(f"{SCHOLAR_API}/paper/search", params, deadline)
+    return [(p.get('year') or 'n.d.', p.get('title', 'N/A')) for p in ss_res.get("data", [])]
+
+
+def _cached_orcid_search(auth, deadline):
+    return get_cache().get_or_fetch(
+        "orcid_id", auth.casefold(),
+        lambda: _orcid_search(auth, deadline),
+        lambda: _orcid_search(auth, _refresh_deadline()),
+    )
+
+
+def _cached_orcid_works(orcid_id, deadline, limit, order):
+    return get_cache().get_or_fetch(
+        "orcid_works", f"{orcid_id}:{limit}:{order}",
+        lambda: _orcid_works(orcid_id, deadline, limit, order),
+        lambda: _orcid_works(orcid_id, _refresh_deadline(), limit, order),
+    )
+
+
+def _cached_scholar_works(auth, deadline):
+    return get_cache().get_or_fetch(
+        "scholar_works", auth.casefold(),
+        lambda: _scholar_works(auth, deadline),
+        lambda: _scholar_works(auth, _refresh_deadline()),
+    )
+
+
+def _fetch_one(auth, deadline, works_per_author=ORCID_WORKS_PER_AUTHOR, order=ORCID_WORK_ORDER):
+    """ORCID iskanje + zapis, ob neuspehu iskanja Semantic Scholar."""
+    started = time.monotonic()
+    result = AuthorBibliography(author=auth)
+    try:
+        orcid_id, search_error = None, ""
+        try:
+            orcid_id = _cached_orcid_search(auth, deadline)
+        except Exception as e:
+            search_error = f"ORCID search failed: {e}"
+
+        if orcid_id:
+            result.source, result.orcid_id = "orcid", orcid_id
+            try:
+                result.works = _cached_orcid_works(orcid_id, deadline, works_per_author, order)
+            except Exception as e:
+                result.source, result.error = "", f"ORCID record failed: {e}"
+        else:
+            try:
+                result.works = _cached_scholar_works(auth, deadline)
+                result.source = "scholar" if result.works else ""
+                if not result.works:
+                    result.error = search_error or "no ORCID or Semantic Scholar match"
+            except Exception as e:
+                result.error = "; ".join(filter(None, [search_error, f"Semantic Scholar failed: {e}"]))
+    finally:
+        result.elapsed = time.monotonic() - started
+    return result
+
+
+def parse_author_list(author_input):
+    return [a.strip() for a in (author_input or "").split(",") if a.strip()]
+
+
+def fetch_author_records(author_input, deadline=OVERALL_DEADLINE, works_per_author=ORCID_WORKS_PER_AUTHOR,
+                         order=ORCID_WORK_ORDER):
+    """
+    Vzporedno zajame bibliografije vseh avtorjev.
+    Vrne seznam AuthorBibliography v vrstnem redu vnosa; nedokončani avtorji
+    ob izteku roka dobijo napako namesto rezultata. works_per_author in order
+    ("record" ali "year") določata izbor del ORCID.
+    """
+    author_list = parse_author_list(author_input)
+    if not author_list: return []
+    abs_deadline = time.monotonic() + deadline
+    pool = ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(author_list)), thread_name_prefix="biblio")
+    try:
+        futures = [pool.submit(_fetch_one, auth, abs_deadline, works_per_author, order) for auth in author_list]
+        wait(futures, timeout=deadline)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    records = []
+    for auth, fut in zip(author_list, futures):
+        if fut.done() and not fut.cancelled() and fut.exception() is None:
+            records.append(fut.result())
+        elif fut.done() and not fut.cancelled():
+            records.append(AuthorBibliography(author=auth, error=f"lookup failed: {fut.exception()}"))
+        else:
+            records.append(AuthorBibliography(author=auth, error=f"timed out after {deadline}s"))
+    return records
+
+
+def format_bibliographies(records):
+    """Oblikuje besedilo bibliografij za sistemsko navodilo."""
+    comprehensive_biblio = ""
+    for r in records:
+        if r.source == "orcid":
+            comprehensive_biblio += f"\n--- ORCID BIBLIOGRAPHY: {r.author.upper()} ({r.orcid_id}) ---\n"
+            if r.works:
+                for year, title in r.works:
+                    comprehensive_biblio += f"- [{year}] {title}\n"
+            else: comprehensive_biblio += "No public works found.\n"
+        elif r.source == "scholar":
+            comprehensive_biblio += f"\n--- SCHOLAR BIBLIOGRAPHY: {r.author.upper()} ---\n"
+            for year, title in r.works:
+                comprehensive_biblio += f"- [{year}] {title}\n"
+    return comprehensive_biblio
+
+
+def fetch_author_bibliographies(author_input):
+    """Zajame bibliografske podatke z letnicami preko ORCID in Scholar API baz."""
+    if not author_input: return ""
+    with METRICS.span("bibliography"):
+        return format_bibliographies(fetch_author_records(author_input))
@@ -0,0 +1,185 @@
+"""
+Semantični graf: strpen izluščevalnik JSON grafa iz odgovora LLM.
+
+Odgovor se razčleni enkrat. Če celoten JSON ni veljaven (dodatno besedilo,
+ograje ```json, odrezan odgovor pri max_tokens), se s pregledovalnikom, ki
+upošteva oklepaje in nize, ohrani najdaljša veljavna predpona vozlišč in
+povezav. Vse zavrženo se sporoči v GraphExtraction.dropped.
+"""
+import json
+import re
+from dataclasses import dataclass, field
+
+NODE_TYPES = ("Root", "Branch", "Leaf", "Class")
+DEFAULT_NODE_TYPE = "Branch"
+DEFAULT_REL_TYPE = "AS"
+
+_HEX_COLOR_RE = re.compile(r"^#(?:[0-9a-fA-F]{3}|[0-9a-fA-F]{6}|[0-9a-fA-F]{8})$")
+_decoder = json.JSONDecoder()
+
+
+@dataclass
+class GraphExtraction:
+    nodes: list = field(default_factory=list)
+    edges: list = field(default_factory=list)
+    dropped: list = field(default_factory=list)   # opisi zavrženih delov
+    recovered: bool = False                       # True, če JSON ni bil v celoti veljaven
+
+    @property
+    def ok(self):
+        return bool(self.nodes)
+
+    def as_dict(self):
+        return {"nodes": self.nodes, "edges": self.edges}
+
+
+def _scan_array(s, i):
+    """
+    Od '[' na indeksu i naprej vrne ([(začetek, konec), ...], zaprta) za celotne
+    elemente najvišje ravni. zaprta je False, če je vhod odrezan pred ']'.
+    """
+    n, spans = len(s), []
+    i += 1
+    while i < n:
+        while i < n and s[i] in " \t\r\n,": i += 1
+        if i >= n: break
+        if s[i] == "]": return spans, True
+        start, depth, in_str, esc = i, 0, False, False
+        while i < n:
+            c = s[i]
+            if in_str:
+                if esc: esc = False
+                elif c == "\\": esc = True
+                elif c == '"': in_str = False
+            elif c == '"': in_str = True
+            elif c in "{[": depth += 1
+            elif c in "}]":
+                if depth == 0:                        # ']' takoj za skalarjem: element se ne izgubi
+                    spans.append((start, i))
+                    return spans, True
+                depth -= 1
+                if depth == 0:
+                    i += 1
+                    break
+            elif c == "," and depth == 0: break
+            i += 1
+        else:
+            break                                     # odrezan element
+        spans.append((start, i))
+    return spans, False
+
+
+def _recover_items(s, key, report):
+    m = re.search(rf'"{key}"\s*:\s*\[', s)
+    if not m:
+        report.append(f"no '{key}' array found")
+        return []
+    spans, closed = _scan_array(s, m.end() - 1)
+    items = []
+    for start, end in spans:
+        try:
+            items.append(json.loads(s[start:end]))
+        except ValueError:
+            report.append(f"{key}[{len(items)}]: invalid JSON, rest of array dropped")
+            return items
+    if not closed:
+        report.append(f"'{key}' array truncated after {len(items)} items")
+    return items
+
+
+def _as_text(v):
+    if isinstance(v, (str, int, float)) and not isinstance(v, bool):
+        return str(v).strip()
+    return ""
+
+
+def _validate(raw_nodes, raw_edges, report):
+    nodes, seen = [], set()
+    for k, n in enumerate(raw_nodes):
+        if not isinstance(n, dict):
+            report.append(f"nodes[{k}]: not an object"); continue
+        nid, lbl = _as_text(n.get("id")), _as_text(n.get("label"))
+        if not nid or not lbl:
+            report.append(f"nodes[{k}]: missing id or label"); continue
+        if nid in seen:
+            report.append(f"nodes[{k}]: duplicate id '{nid}'"); continue
+        seen.add(nid)
+        node = {"id": nid, "label": lbl, "type": n.get("type", DEFAULT_NODE_TYPE)}
+        if node["type"] not in NODE_TYPES:
+            report.append(f"nodes[{k}]: unknown type '{node['type']}' set to {DEFAULT_NODE_TYPE}")
+            node["type"] = DEFAULT_NODE_TYPE
+        color = n.get("color")
+        if isinstance(color, str) and _HEX_COLOR_RE.match(color.strip()):
+            node["color"] = color.strip()
+        elif color is not None:
+            report.append(f"nodes[{k}]: invalid color '{color}' ignored")
+        nodes.append(node)
+
+    edges = []
+    for k, e in enumerate(raw_edges):
+        if not isinstance(e, dict):
+            report.append(f"edges[{k}]: not an object"); continue
+        src, tgt = _as_text(e.get("source")), _as_text(e.get("target"))
+        if not src or not tgt:
+            report.append(f"edges[{k}]: missing source or target"); continue
+        edges.append({"source": src, "target": tgt, "rel_type": _as_text(e.get("rel_type")) or DEFAULT_REL_TYPE})
+    return nodes, edges
+
+
+def extract_semantic_graph(payload):
+    """
+    Iz besedila za oznako grafa vrne GraphExtraction z veljavnimi vozlišči in
+    povezavami. Nikoli ne sproži izjeme zaradi slabega JSON.
+    """
+    result = GraphExtraction()
+    start = (payload or "").find("{")
+    if start < 0:
+        result.dropped.append("no JSON object found")
+        return result
+    s = payload[start:]
+    try:
+        obj, _ = _decoder.raw_decode(s)     # dopušča besedilo in ograje za objektom
+    except ValueError:
+        obj = None
+    if isinstance(obj, dict):
+        raw_nodes, raw_edges = obj.get("nodes") or [], obj.get("edges") or []
+        if not isinstance(raw_nodes, list): raw_nodes = []
+        if not isinstance(raw_edges, list): raw_edges = []
+    else:
+        result.recovered = True
+        raw_nodes = _recover_items(s, "nodes", result.dropped)
+        raw_edges = _recover_items(s, "edges", result.dropped)
+    result.nodes, result.edges = _validate(raw_nodes, raw_edges, result.dropped)
+    return result
+
+
+def normalize_label(label):
+    """Ključ za združevanje oznak: male črke, strnjeni presledki."""
+    return " ".join(str(label).casefold().split())
+
+
+def merge_graphs(graphs, prefixes=None):
+    """
+    Združi več grafov v enega. Id-ji vozlišč dobijo predpono grafa (privzeto
+    "g1_", "g2_", ...), vozlišča z enako normalizirano oznako se zlijejo v prvo
+    pojavitev, povezave se preslikajo in podvojene ali zančne izpustijo.
+    """
+    nodes, edges, by_label, seen_edges = [], [], {}, set()
+    for gi, g in enumerate(graphs):
+        if not g: continue
+        prefix = prefixes[gi] if prefixes else f"g{gi + 1}_"
+        remap = {}
+        for n in g.get("nodes", []):
+            key = normalize_label(n["label"])
+            if key not in by_label:
+                by_label[key] = prefix + n["id"]
+                nodes.append({**n, "id": by_label[key]})
+            remap[n["id"]] = by_label[key]
+        for e in g.get("edges", []):
+            src, tgt = remap.get(e["source"]), remap.get(e["target"])
+            if src is None or tgt is None or src == tgt: continue
+            k = (src, tgt, e.get("rel_type") or DEFAULT_REL_TYPE)
+            if k in seen_edges: continue
+            seen_edges.add(k)
+            edges.append({"source": src, "target": tgt, "rel_type": k[2]})
+    return {"nodes": nodes, "edges": edges}
@@ -0,0 +1,224 @@
+"""
+Trajni združeni graf znanja čez vse sinteze (SQLite).
+
+Vsak semantični graf sinteze se vlije v en polihierarhični graf: oznake se
+normalizirajo (sis_graf.normalize_label) in poiščejo preko 64-bitnega
+zgoščenega indeksa, povezave se združijo z UPSERT. Strošek zlivanja je
+sorazmeren z velikostjo novega grafa, ne zgodovine; ob zagonu se nič ne
+nalaga, poizvedbe (sosedi, predniki, potomci, podgraf) tečejo po indeksih.
+
+Smer BT/NT: povezava (A, B, "BT") pomeni, da je B širši pojem od A;
+(A, B, "NT") pomeni, da je B ožji pojem od A.
+"""
+import hashlib
+import os
+import threading
+import time
+
+from sis_graf import DEFAULT_NODE_TYPE, DEFAULT_REL_TYPE, normalize_label
+from sis_predpomnilnik import CACHE_DIR, SQLiteStore, chunks
+
+# Prazna vrednost SIS_KNOWLEDGE_GRAPH izklopi kopičenje
+KNOWLEDGE_GRAPH_PATH = os.environ.get("SIS_KNOWLEDGE_GRAPH", os.path.join(CACHE_DIR, "knowledge_graph.sqlite3"))
+BROADER_RELS = ("BT", "TT")     # cilj je širši pojem od izvora
+NARROWER_RELS = ("NT",)         # cilj je ožji pojem od izvora
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS nodes ("
+    " id INTEGER PRIMARY KEY, lhash INTEGER NOT NULL, lkey TEXT NOT NULL, label TEXT NOT NULL,"
+    " type TEXT NOT NULL, color TEXT, seen INTEGER NOT NULL DEFAULT 1,"
+    " first_seen REAL NOT NULL, last_seen REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS nodes_lhash ON nodes (lhash)",
+    "CREATE TABLE IF NOT EXISTS edges ("
+    " src INTEGER NOT NULL, dst INTEGER NOT NULL, rel TEXT NOT NULL, seen INTEGER NOT NULL DEFAULT 1,"
+    " PRIMARY KEY (src, dst, rel)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS edges_dst ON edges (dst, src)",
+    "CREATE TABLE IF NOT EXISTS sources ("
+    " key TEXT PRIMARY KEY, merged REAL NOT NULL, nodes INTEGER NOT NULL, edges INTEGER NOT NULL) WITHOUT ROWID",
+)
+
+
+def label_hash(key):
+    """64-bitni predznačeni zgoščeni ključ normalizirane oznake (za INTEGER indeks)."""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+def _node_dict(row):
+    return {"id": row[0], "label": row[1], "type": row[2], "color": row[3], "seen": row[4]}
+
+
+class KnowledgeGraph(SQLiteStore):
+    def __init__(self, path=KNOWLEDGE_GRAPH_PATH):
+        super().__init__(path)
+        self._write_lock = threading.Lock()
+        for stmt in _SCHEMA: self._conn().execute(stmt)
+
+    # --- zlivanje ---
+    def merge(self, graph, source=None):
+        """
+        Vlije graf {"nodes": [...], "edges": [...]} v shrambo in vrne preslikavo
+        lokalnih id-jev v id-je shrambe. Z enakim source se isti graf ne vlije
+        dvakrat (vrne None).
+        """
+        if not graph or not graph.get("nodes"): return {}
+        now = time.time()
+        local_key, first = {}, {}
+        for n in graph["nodes"]:
+            key = normalize_label(n.get("label", ""))
+            if not key: continue
+            local_key[n["id"]] = key
+            first.setdefault(key, n)
+
+        with self._write_lock:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if source and conn.execute("SELECT 1 FROM sources WHERE key = ?", (source,)).fetchone():
+                    conn.execute("ROLLBACK")
+                    return None
+                ids = self._resolve(conn, list(first))
+                conn.executemany("UPDATE nodes SET seen = seen + 1, last_seen = ? WHERE id = ?",
+                                 [(now, i) for i in ids.values()])
+                for key, n in first.items():
+                    if key in ids: continue
+                    cur = conn.execute(
+                        "INSERT INTO nodes (lhash, lkey, label, type, color, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (label_hash(key), key, str(n["label"]).strip(), n.get("type") or DEFAULT_NODE_TYPE,
+                         n.get("color"), now, now))
+                    ids[key] = cur.lastrowid
+                edges = set()
+                for e in graph.get("edges", []):
+                    if e.get("inferred"): continue      # premostitve otokov niso znanje
+                    src, dst = ids.get(local_key.get(e.get("source"))), ids.get(local_key.get(e.get("target")))
+                    if src is None or dst is None or src == dst: continue
+                    edges.add((src, dst, e.get("rel_type") or DEFAULT_REL_TYPE))
+                conn.executemany(
+                    "INSERT INTO edges (src, dst, rel) VALUES (?, ?, ?) "
+                    "ON CONFLICT (src, dst, rel) DO UPDATE SET seen = seen + 1", sorted(edges))
+                if source:
+                    conn.execute("INSERT INTO sources (key, merged, nodes, edges) VALUES (?, ?, ?, ?)",
+                                 (source, now, len(first), len(edges)))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return {local: ids[key] for local, key in local_key.items()}
+
+    def _resolve(self, conn, keys):
+        """{normalizirana oznaka: id} za že znane oznake (zgoščeni indeks + preverba trkov)."""
+        wanted = set(keys)
+        found = {}
+        for part in chunks([label_hash(k) for k in keys]):
+            rows = conn.execute(f"SELECT id, lkey FROM nodes WHERE lhash IN ({','.join('?' * len(part))})", part)
+            for node_id, key in rows:
+                if key in wanted: found[key] = node_id
+        return found
+
+    # --- poizvedbe ---
+    def find(self, label):
+        key = normalize_label(label)
+        row = self._conn().execute(
+            "SELECT id, label, type, color, seen FROM nodes WHERE lhash = ? AND lkey = ?", (label_hash(key), key)
+        ).fetchone()
+        return _node_dict(row) if row else None
+
+    def search(self, text, limit=20):
+        """Vozlišča, katerih oznaka vsebuje text, najpogostejša najprej."""
+        key = normalize_label(text).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        rows = self._conn().execute(
+            "SELECT id, label, type, color, seen FROM nodes WHERE lkey LIKE ? ESCAPE '\\' ORDER BY seen DESC, id LIMIT ?",
+            (f"%{key}%", limit))
+        return [_node_dict(r) for r in rows]
+
+    def nodes(self, node_ids):
+        out = {}
+        for part in chunks(list(node_ids)):
+            for row in self._conn().execute(
+                    f"SELECT id, label, type, color, seen FROM nodes WHERE id IN ({','.join('?' * len(part))})", part):
+                out[row[0]] = _node_dict(row)
+        return out
+
+    def neighbors(self, node_id, rels=None):
+        """[(sosed, rel, "out"|"in")] neposredni sosedi, neobvezno le za izbrane vrste povezav."""
+        conn = self._conn()
+        rel_sql = f" AND rel IN ({','.join('?' * len(rels))})" if rels else ""
+        params = (node_id,) + tuple(rels or ())
+        out = [(dst, rel, "out") for dst, rel in conn.execute(f"SELECT dst, rel FROM edges WHERE src = ?{rel_sql}", params)]
+        out += [(src, rel, "in") for src, rel in conn.execute(f"SELECT src, rel FROM edges WHERE dst = ?{rel_sql}", params)]
+        return out
+
+    def _closure(self, node_id, up_rels, down_rels, max_depth):
+        """Tranzitivno zaprtje po (izvor -> cilj) za up_rels in (cilj -> izvor) za down_rels."""
+        up_in, down_in = ",".join("?" * len(up_rels)), ",".join("?" * len(down_rels))
+        rows = self._conn().execute(
+            "WITH RECURSIVE walk(id, depth) AS ("
+            " SELECT ?, 0"
+            f" UNION SELECT e.dst, w.depth + 1 FROM walk w JOIN edges e ON e.src = w.id WHERE e.rel IN ({up_in}) AND w.depth < ?"
+            f" UNION SELECT e.src, w.depth + 1 FROM walk w JOIN edges e ON e.dst = w.id WHERE e.rel IN ({down_in}) AND w.depth < ?"
+            ") SELECT id, MIN(depth) FROM walk WHERE id != ? GROUP BY id ORDER BY 2, 1",
+            (node_id, *up_rels, max_depth, *down_rels, max_depth, node_id))
+        return [(i, d) for i, d in rows]
+
+    def ancestors(self, node_id, max_depth=10):
+        """[(id, razdalja)] širši pojmi po BT/TT in obratnih NT povezavah."""
+        return self._closure(node_id, BROADER_RELS, NARROWER_RELS, max_depth)
+
+    def descendants(self, node_id, max_depth=10):
+        """[(id, razdalja)] ožji pojmi po NT in obratnih BT/TT povezavah."""
+        return self._closure(node_id, NARROWER_RELS, BROADER_RELS, max_depth)
+
+    def subgraph(self, seeds, depth=1, limit=300):
+        """
+        Okolica vozlišč seeds do globine depth (največ limit vozlišč) v obliki
+        grafa sinteze; id-ji so "k<id>", tako da gre neposredno v build_elements.
+        """
+        conn = self._conn()
+        keep, frontier = set(), [s for s in seeds if s is not None]
+        keep.update(frontier[:limit])
+        for _ in range(depth):
+            nxt = []
+            for part in chunks(frontier):
+                marks = ",".join("?" * len(part))
+                for a, b in conn.execute(
+                        f"SELECT src, dst FROM edges WHERE src IN ({marks}) UNION ALL "
+                        f"SELECT src, dst FROM edges WHERE dst IN ({marks}) ORDER BY 1", part + part):
+                    for x in (a, b):
+                        if x not in keep and len(keep) < limit:
+                            keep.add(x)
+                            nxt.append(x)
+            frontier = nxt
+            if not frontier: break
+        nodes = self.nodes(keep)
+        edges = []
+        ids = sorted(keep)
+        for part in chunks(ids):
+            marks = ",".join("?" * len(part))
+            for src, dst, rel in conn.execute(f"SELECT src, dst, rel FROM edges WHERE src IN ({marks})", part):
+                if dst in keep: edges.append({"source": f"k{src}", "target": f"k{dst}", "rel_type": rel})
+        return {
+            "nodes": [{"id": f"k{i}", "label": nodes[i]["label"], "type": nodes[i]["type"],
+                       **({"color": nodes[i]["color"]} if nodes[i]["color"] else {})} for i in ids if i in nodes],
+            "edges": edges,
+        }
+
+    def stats(self):
+        conn = self._conn()
+        return {
+            "nodes": conn.execute("SELECT COUNT(*) FROM nodes").fetchone()[0],
+            "edges": conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0],
+            "syntheses": conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0],
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_knowledge_graph():
+    """Skupni trajni graf znanja za ta proces (None, če je izklopljen)."""
+    global _store
+    if not KNOWLEDGE_GRAPH_PATH: return None
+    with _store_lock:
+        if _store is None:
+            _store = KnowledgeGraph()
+        return _store
@@ -0,0 +1,267 @@
+"""
+Skupni odjemalec LLM z omejevanjem hitrosti.
+
+En odjemalec na (API ključ, base_url) za cel proces, ne glede na število
+Streamlit sej ali paketnih niti. Pred vsakim klicem se čaka v vrsti FIFO
+(pošteno med sejami), dokler ni prostega mesta med hkratnimi klici in dovolj
+žetonov v vedrih zahtevkov/min in žetonov/min. Glave x-ratelimit-* in
+Retry-After sproti popravljajo stanje vedra. Napake 429, 5xx in prekinjene
+povezave se ponovijo z eksponentnim odmikom z naključnim raztrosom.
+"""
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from types import SimpleNamespace
+
+RPM_LIMIT = float(os.environ.get("SIS_LLM_RPM", 30))          # zahtevkov na minuto
+TPM_LIMIT = float(os.environ.get("SIS_LLM_TPM", 12000))       # žetonov na minuto
+MAX_IN_FLIGHT = int(os.environ.get("SIS_LLM_MAX_IN_FLIGHT", 4))
+MAX_RETRIES = int(os.environ.get("SIS_LLM_MAX_RETRIES", 4))
+BACKOFF_BASE = 1.0      # sekunde
+BACKOFF_CAP = 30.0
+QUEUE_TIMEOUT = 120.0   # najdaljše čakanje v vrsti
+MAX_CLIENTS = int(os.environ.get("SIS_LLM_MAX_CLIENTS", 16))    # odjemalci (ključ, base_url) v procesu
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+class RateLimitTimeout(TimeoutError):
+    pass
+
+
+def parse_duration(value):
+    """'2m59.56s', '7.66s', '120ms' ali '3' (sekunde) -> sekunde."""
+    if value is None: return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts: return None
+    scale = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    return sum(float(n) * scale[u] for n, u in parts)
+
+
+def estimate_tokens(messages, max_tokens):
+    """Groba ocena (≈4 znaki na žeton) za rezervacijo v vedru."""
+    chars = sum(len(m.get("content") or "") for m in messages)
+    return chars // 4 + int(max_tokens or 0)
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.stamp = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_for(self, amount):
+        """Sekunde do trenutka, ko bo na voljo amount (omejeno s kapaciteto)."""
+        need = min(amount, self.capacity) - self.level
+        return 0.0 if need <= 0 else need / self.rate
+
+
+class RateLimiter:
+    """Vrsta FIFO pred vedroma zahtevkov/žetonov in omejitvijo hkratnih klicev."""
+
+    def __init__(self, rpm=RPM_LIMIT, tpm=TPM_LIMIT, max_in_flight=MAX_IN_FLIGHT):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._queue = deque()
+        self._cond = threading.Condition()
+
+    def acquire(self, tokens, timeout=QUEUE_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        ticket = object()
+        with self._cond:
+            self._queue.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self.requests.refill(now)
+                    self.tokens.refill(now)
+                    wait = None
+                    if self._queue[0] is ticket and self.in_flight < self.max_in_flight:
+                        wait = max(self.paused_until - now, self.requests.wait_for(1), self.tokens.wait_for(tokens))
+                        if wait <= 0:
+                            self.requests.level -= 1
+                            self.tokens.level -= min(tokens, self.tokens.capacity)
+                            self.in_flight += 1
+                            return
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise RateLimitTimeout(f"waited {timeout:.0f}s for an LLM rate-limit slot")
+                    self._cond.wait(min(remaining, wait if wait else 1.0))
+            finally:
+                if self._queue and ticket in self._queue: self._queue.remove(ticket)
+                self._cond.notify_all()
+
+    def release(self, token_correction=0):
+        """token_correction: dejanski minus rezervirani žetoni (vračilo, če < 0)."""
+        with self._cond:
+            self.in_flight -= 1
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level - token_correction)
+            self._cond.notify_all()
+
+    def pause(self, seconds):
+        with self._cond:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def observe_headers(self, headers):
+        """Uskladi vedra s strežnikovimi glavami x-ratelimit-*."""
+        if not headers: return
+        with self._cond:
+            now = time.monotonic()
+            remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+            if remaining_tokens is not None:
+                try:
+                    self.tokens.refill(now)
+                    self.tokens.level = min(self.tokens.level, float(remaining_tokens))
+                except ValueError:
+                    pass
+            for kind in ("requests", "tokens"):
+                if headers.get(f"x-ratelimit-remaining-{kind}") == "0":
+                    reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                    if reset: self.paused_until = max(self.paused_until, now + reset)
+
+
+def _retry_delay(attempt, retry_after=None):
+    backoff = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.5)
+    return max(backoff, retry_after or 0.0)
+
+
+def _is_retryable(exc):
+    import openai
+    if isinstance(exc, (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    return isinstance(exc, openai.APIStatusError) and exc.status_code >= 500
+
+
+def chunk_usage(chunk):
+    """Poročana poraba iz koščka pretočnega odgovora (usage ali Groqov x_groq.usage) ali None."""
+    usage = getattr(chunk, "usage", None)
+    if usage is None:
+        # Groq poročilo o porabi pošlje v x_groq zadnjega koščka
+        x_groq = getattr(chunk, "x_groq", None)
+        usage = x_groq.get("usage") if isinstance(x_groq, dict) else getattr(x_groq, "usage", None)
+    return usage
+
+
+def _total_tokens(usage):
+    if not usage: return None
+    return usage.get("total_tokens") if isinstance(usage, dict) else getattr(usage, "total_tokens", None)
+
+
+class _ReleasingStream:
+    """
+    Pretočni odgovor, ki sprosti mesto v omejevalniku, ko je prebran ali zaprt.
+    Rezervacija se popravi s porabo iz zadnjega koščka; brez nje z oceno
+    (znaki navodila in prejetega besedila / 4).
+    """
+
+    def __init__(self, stream, limiter, reserved, prompt_tokens):
+        self._stream, self._limiter, self._released = stream, limiter, False
+        self._reserved, self._prompt_tokens = reserved, prompt_tokens
+        self._chars, self._total = 0, None
+
+    def __iter__(self):
+        try:
+            for chunk in self._stream:
+                total = _total_tokens(chunk_usage(chunk))
+                if total: self._total = total
+                for choice in getattr(chunk, "choices", None) or ():
+                    self._chars += len(getattr(getattr(choice, "delta", None), "content", None) or "")
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            actual = self._total or self._prompt_tokens + self._chars // 4
+            try:
+                self._stream.close()
+            finally:
+                self._limiter.release(actual - self._reserved)
+
+
+class _Completions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, **kwargs):
+        return self._owner._create(**kwargs)
+
+
+class RateLimitedClient:
+    """Ovoj OpenAI odjemalca z istim vmesnikom client.chat.completions.create(...)."""
+
+    def __init__(self, api_key, base_url, limiter=None):
+        from openai import OpenAI
+        self._client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+        self.limiter = limiter or RateLimiter()
+        self.chat = SimpleNamespace(completions=_Completions(self))
+
+    def _create(self, **kwargs):
+        reserved = min(estimate_tokens(kwargs.get("messages", []), kwargs.get("max_tokens")), self.limiter.tokens.capacity)
+        attempt = 0
+        while True:
+            self.limiter.acquire(reserved)
+            try:
+                raw = self._client.chat.completions.with_raw_response.create(**kwargs)
+            except Exception as exc:
+                self.limiter.release(-reserved)     # neuspel klic žetonov ne porabi
+                headers = getattr(getattr(exc, "response", None), "headers", None)
+                self.limiter.observe_headers(headers)
+                if attempt >= MAX_RETRIES or not _is_retryable(exc):
+                    raise
+                retry_after = parse_duration(headers.get("retry-after")) if headers else None
+                if retry_after: self.limiter.pause(retry_after)
+                time.sleep(_retry_delay(attempt, retry_after))
+                attempt += 1
+                continue
+            self.limiter.observe_headers(raw.headers)
+            if kwargs.get("stream"):
+                return _ReleasingStream(raw.parse(), self.limiter, reserved,
+                                        estimate_tokens(kwargs.get("messages", []), 0))
+            try:
+                response = raw.parse()
+            except Exception:
+                self.limiter.release()
+                raise
+            usage = getattr(response, "usage", None)
+            self.limiter.release((usage.total_tokens - reserved) if usage and usage.total_tokens else 0)
+            return response
+
+
+_clients = OrderedDict()
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key, base_url):
+    """
+    Vrne skupni RateLimitedClient za (ključ, base_url) v tem procesu. Hrani se
+    največ MAX_CLIENTS nazadnje uporabljenih; izrinjen odjemalec deluje naprej
+    pri tistih, ki ga še držijo.
+    """
+    key = (hashlib.sha256(api_key.encode("utf-8")).hexdigest(), base_url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = RateLimitedClient(api_key, base_url)
+            while len(_clients) > MAX_CLIENTS: _clients.popitem(last=False)
+        else:
+            _clients.move_to_end(key)
+        return client
@@ -0,0 +1,197 @@
+"""
+Merjenje časov po fazah, porabe žetonov in velikosti podatkov.
+
+En register na proces (METRICS). Faze se merijo s span("ime") ali observe();
+vsaka meritev gre v histogram (izvoz Prometheus) in v kratek drseči seznam
+zadnjih RECENT_RUNS vrednosti za p50/p95 v aplikaciji. Zapis je nekaj
+seštevanj pod ključavnico, zato je merjenje vedno vključeno.
+
+Izvoz v besedilni obliki Prometheus:
+    SIS_METRICS_FILE=/pot/sis.prom   datoteka se osveži po vsaki sintezi
+    SIS_METRICS_PORT=9464            HTTP /metrics v niti ozadja
+"""
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RECENT_RUNS = int(os.environ.get("SIS_METRICS_RECENT", 50))
+METRICS_FILE = os.environ.get("SIS_METRICS_FILE", "")
+METRICS_PORT = int(os.environ.get("SIS_METRICS_PORT", 0) or 0)
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+
+_HELP = {
+    "sis_stage_seconds": ("histogram", "Duration of a synthesis or bibliography stage."),
+    "sis_synthesis_runs_total": ("counter", "Synthesis runs by outcome (fresh, cached, error)."),
+    "sis_llm_tokens_total": ("counter", "LLM tokens reported by the API (or estimated from stream chunks)."),
+    "sis_llm_tokens_per_second": ("gauge", "Completion tokens per second of the last fresh synthesis."),
+    "sis_payload_chars_total": ("counter", "Characters of prompts, responses and rendered markdown of fresh syntheses."),
+    "sis_prompt_tokens_estimated_total": ("counter", "Locally estimated system prompt tokens of fresh syntheses by section."),
+    "sis_http_requests_total": ("counter", "Bibliography HTTP requests by host and outcome."),
+    "sis_http_response_bytes_total": ("counter", "Bibliography HTTP response bytes by host."),
+}
+
+
+def percentile(values, q):
+    if not values: return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def _labels(labels):
+    if not labels: return ""
+    inner = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in sorted(labels))
+    return "{" + inner + "}"
+
+
+class Metrics:
+    def __init__(self, recent=RECENT_RUNS):
+        self._lock = threading.Lock()
+        self._hist = {}             # (ime, oznake) -> [števci vedrov..., vsota, število]
+        self._counters = {}         # (ime, oznake) -> vrednost
+        self._gauges = {}
+        self._recent = {}           # faza -> deque zadnjih trajanj
+        self._recent_size = recent
+        self.runs = deque(maxlen=recent)
+
+    def observe(self, stage, seconds):
+        key = ("sis_stage_seconds", (("stage", stage),))
+        idx = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            h = self._hist.get(key)
+            if h is None: h = self._hist[key] = [0] * (len(BUCKETS) + 2)
+            if idx < len(BUCKETS): h[idx] += 1
+            h[-2] += seconds
+            h[-1] += 1
+            rec = self._recent.get(stage)
+            if rec is None: rec = self._recent[stage] = deque(maxlen=self._recent_size)
+            rec.append(seconds)
+
+    @contextmanager
+    def span(self, stage):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - t)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def record_synthesis(self, timings, usage, sizes, cached):
+        """Zabeleži zaključeno sintezo: faze, žetone, velikosti in vrstico za pregled."""
+        for stage, seconds in timings.items():
+            if stage != "llm_sum": self.observe(stage, seconds)
+        self.inc("sis_synthesis_runs_total", outcome="cached" if cached else "fresh")
+        for kind in ("prompt", "completion"):
+            if usage.get(f"{kind}_tokens"): self.inc("sis_llm_tokens_total", usage[f"{kind}_tokens"], kind=kind)
+        if not cached:
+            for kind, n in sizes.items():
+                if kind.endswith("_chars"): self.inc("sis_payload_chars_total", n, kind=kind[:-6])
+            for section, n in sizes.get("prompt_sections", {}).items():
+                if n: self.inc("sis_prompt_tokens_estimated_total", n, section=section)
+        # Pri pretakanju je hitrost merjena od prvega žetona naprej
+        gen_time = timings.get("llm", 0.0) - timings.get("first_token", 0.0)
+        tps = usage.get("completion_tokens", 0) / gen_time if gen_time > 0 and not cached else 0.0
+        if tps: self.set("sis_llm_tokens_per_second", tps)
+        self.runs.append({
+            "time": datetime.now().strftime("%H:%M:%S"), "cached": cached,
+            **{k: round(v, 3) for k, v in timings.items()},
+            "prompt_est": sum(sizes.get("prompt_sections", {}).values()),
+            "tokens": usage.get("total_tokens", 0), "tokens_per_s": round(tps, 1),
+            "nodes": sizes.get("graph_nodes", 0),
+        })
+        self._export()
+
+    def summary(self):
+        """[(faza, število, p50, p95)] nad zadnjimi meritvami."""
+        with self._lock:
+            recent = {k: list(v) for k, v in self._recent.items()}
+        return [(stage, len(v), percentile(v, 0.5), percentile(v, 0.95)) for stage, v in recent.items()]
+
+    def prometheus_text(self):
+        with self._lock:
+            hist = {k: list(v) for k, v in self._hist.items()}
+            counters, gauges = dict(self._counters), dict(self._gauges)
+        lines, seen = [], set()
+
+        def header(name):
+            if name in seen: return
+            seen.add(name)
+            kind, text = _HELP.get(name, ("untyped", name))
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), h in sorted(hist.items()):
+            header(name)
+            acc = 0
+            for bound, n in zip(BUCKETS, h):
+                acc += n
+                lines.append(f"{name}_bucket{_labels(labels + (('le', repr(bound)),))} {acc}")
+            lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {h[-1]}")
+            lines.append(f"{name}_sum{_labels(labels)} {h[-2]:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {h[-1]}")
+        for (name, labels), v in sorted(counters.items()) + sorted(gauges.items()):
+            header(name)
+            lines.append(f"{name}{_labels(labels)} {v}")
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path):
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+    def _export(self):
+        if not METRICS_FILE: return
+        try:
+            self.write_file(METRICS_FILE)
+        except OSError:
+            pass    # izvoz ne sme zrušiti sinteze
+
+
+METRICS = Metrics()
+
+_server = None
+_server_lock = threading.Lock()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = METRICS.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_exporter(port=METRICS_PORT, host="0.0.0.0"):
+    """Zažene HTTP /metrics (enkrat na proces); port 0 izvoz izklopi."""
+    global _server
+    if not port: return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError:
+                return None     # vrata zasedena (npr. drug proces Streamlit)
+            threading.Thread(target=_server.serve_forever, name="metrics-exporter", daemon=True).start()
+        return _server
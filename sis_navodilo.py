@@ -0,0 +1,222 @@
+"""
+Sestavljanje sistemskega navodila z omejitvijo vhodnih žetonov.
+
+Navodilo ima stalno predpono (STATIC_INSTRUCTIONS, enaka za vse zahtevke,
+zato jo lahko ponudnik predpomni) in spremenljiv rep: znanosti, dimenzije,
+bibliografija, poizvedba in morebitni fokus razpršene sinteze. Žetoni se
+ocenijo lokalno (estimate_tokens); dimenzije in bibliografija dobijo vsaka
+svoj proračun znotraj skupnega, bibliografija pa se zgosti: dvojniki
+naslovov odpadejo, dela se razvrstijo po letu (najnovejša najprej), avtorji
+dobivajo dela izmenično, izpuščeno se povzame s številom in razponom let.
+"""
+import logging
+import math
+import os
+import re
+from dataclasses import dataclass, field
+
+PROMPT_TOKENS = int(os.environ.get("SIS_PROMPT_TOKENS", 2500))          # celotno sistemsko navodilo
+BIBLIO_TOKENS = int(os.environ.get("SIS_BIBLIO_TOKENS", 1500))          # največ za bibliografijo
+DIMENSION_TOKENS = int(os.environ.get("SIS_DIMENSION_TOKENS", 250))     # največ za dimenzije
+TITLE_CHARS = 160
+SUMMARY_RESERVE = 12            # žetoni, rezervirani za vrstico "(+n more works, leto–leto)" na avtorja
+
+log = logging.getLogger(__name__)
+
+STATIC_INSTRUCTIONS = """
+            You are the SIS Synthesizer. Perform an exhaustive dissertation (1500+ words) on the INQUIRY below,
+            drawing on the FIELDS, DIMENSIONS and CONTEXT AUTHORS given after these instructions.
+
+            THESAURUS ALGORITHM (TT, BT, NT, AS, RT, EQ):
+            Organize knowledge using super-ordinate (TT), broader (BT), narrower (NT), associative (AS), relative (RT), and equivalent (EQ) links.
+
+            HIERARCHY & INTERCONNECTIVITY:
+            1. Integrate dimensions into a cohesive dissertation focusing purely on the inquiry.
+            2. Connect nodes semantically and with high density to create ONE LARGE CONNECTED NETWORK.
+
+            STRICT FORMATTING & SPACE ALLOCATION:
+            - Focus 100% of the textual content on deep research, causal analysis, and innovative problem-solving synergy.
+            - DO NOT include descriptions of the map or lists of node definitions in the text.
+            - End with '### SEMANTIC_GRAPH_JSON' followed by valid JSON only.
+            - JSON schema: {"nodes": [{"id": "n1", "label": "Text", "type": "Root|Branch|Leaf|Class", "color": "#hex"}], "edges": [{"source": "n1", "target": "n2", "rel_type": "BT|NT|AS|Inheritance|..."}]}
+            """
+
+# (polje SynthesisRequest, oznaka v navodilu) po prednosti pri krajšanju
+DIMENSIONS = (
+    ("expertise", "EXPERTISE"), ("context", "CONTEXT / GOAL"), ("profiles", "USER PROFILES"),
+    ("paradigms", "PARADIGMS"), ("models", "STRUCTURAL MODELS"), ("approaches", "MENTAL APPROACHES"),
+    ("methods", "METHODOLOGIES"), ("tools", "TOOLS"),
+)
+
+_TOKEN_RE = re.compile(r"\d+|[^\W\d_]+|[^\w\s]+|_+")
+
+
+def estimate_tokens(text):
+    """
+    Lokalna ocena števila žetonov (brez tokenizatorja modela): besede do 6
+    črk so en žeton, daljše in ne-ASCII se delijo, števke po tri, ločila v
+    skupinah po dve. Vsota ocen vrstic je ocena celote.
+    """
+    n = 0
+    for m in _TOKEN_RE.finditer(text):
+        s = m.group()
+        if s[0].isdigit(): n += math.ceil(len(s) / 3)
+        elif s[0].isalpha(): n += math.ceil(len(s) / (6 if s.isascii() else 4))
+        else: n += math.ceil(len(s) / 2)
+    return n
+
+
+def _title_key(title):
+    return " ".join(re.findall(r"\w+", str(title).casefold()))
+
+
+def _year_sort_key(work):
+    year = str(work[0])
+    return (0, -int(year)) if year.isdigit() else (1, 0)
+
+
+def _header(record):
+    if record.source == "orcid": return f"--- {record.author.upper()} (ORCID {record.orcid_id}) ---"
+    return f"--- {record.author.upper()} (Scholar) ---"
+
+
+def compact_bibliography(records, budget=BIBLIO_TOKENS):
+    """
+    Vrne (besedilo, statistika) bibliografij AuthorBibliography v največ
+    budget ocenjenih žetonih. Naslov, ki se ponovi (tudi pri drugem avtorju),
+    se izpusti; vsak avtor dobi dela po vrsti od najnovejšega, avtorji pa
+    izmenično, da dolg seznam enega ne izrine ostalih. Avtor je sprejet le,
+    če se izpiše vsaj njegovo prvo delo; preostali se le preštejejo.
+    """
+    stats = {"authors": 0, "authors_omitted": 0, "works": 0, "works_included": 0, "duplicates": 0, "tokens": 0}
+    seen, authors = set(), []
+    for r in records:
+        if r.source not in ("orcid", "scholar"): continue
+        works = []
+        for year, title in r.works:
+            key = _title_key(title)
+            if not key: continue
+            if key in seen:
+                stats["duplicates"] += 1
+                continue
+            seen.add(key)
+            title = str(title).strip()
+            works.append((year, title if len(title) <= TITLE_CHARS else title[:TITLE_CHARS - 1].rstrip() + "…"))
+        works.sort(key=_year_sort_key)
+        stats["works"] += len(works)
+        authors.append({"record": r, "works": works, "lines": []})
+    stats["authors"] = len(authors)
+
+    used, included = 0, []
+    for a in authors:
+        first = [f"- [{y}] {t}" for y, t in a["works"][:1]]
+        cost = estimate_tokens(_header(a["record"])) + SUMMARY_RESERVE + sum(estimate_tokens(x) for x in first)
+        if used + cost > budget:
+            stats["authors_omitted"] += 1
+            continue
+        used += cost
+        a["lines"] = first
+        included.append(a)
+    full = False
+    for rnd in range(1, max((len(a["works"]) for a in included), default=0)):
+        for a in included:
+            if rnd >= len(a["works"]): continue
+            year, title = a["works"][rnd]
+            line = f"- [{year}] {title}"
+            cost = estimate_tokens(line)
+            if used + cost > budget:
+                full = True
+                break
+            used += cost
+            a["lines"].append(line)
+        if full: break
+
+    out = []
+    for a in included:
+        out.append(_header(a["record"]))
+        if a["record"].source == "orcid" and not a["works"]: out.append("No public works found.")
+        out.extend(a["lines"])
+        rest = a["works"][len(a["lines"]):]
+        if rest:
+            years = sorted(int(y) for y, _ in rest if str(y).isdigit())
+            span = f", {years[0]}–{years[-1]}" if years else ""
+            out.append(f"- (+{len(rest)} more works{span})")
+        stats["works_included"] += len(a["lines"])
+    if stats["authors_omitted"]:
+        out.append(f"(+{stats['authors_omitted']} more authors omitted for length)")
+    text = "\n".join(out)
+    stats["tokens"] = estimate_tokens(text)
+    return text, stats
+
+
+def format_dimensions(dimensions, budget=DIMENSION_TOKENS):
+    """
+    Vrstice "OZNAKA: a, b, c" za izbrane dimenzije (slovar polj SynthesisRequest).
+    Ob prekoračenju proračuna se seznami skrajšajo z "(+n more)"; dimenzija,
+    v katero ne gre noben element, ostane kot "OZNAKA: (+n more)" ali se
+    izpusti, naslednje pa se še poskusijo.
+    """
+    lines, used = [], 0
+    for name, label in DIMENSIONS:
+        value = dimensions.get(name)
+        items = [str(v) for v in value] if isinstance(value, (list, tuple)) else ([str(value)] if value else [])
+        if not items: continue
+        head = f"- {label}: "
+        kept = []
+        cost = estimate_tokens(head)
+        for i, item in enumerate(items):
+            extra = estimate_tokens(item) + 1
+            more = 4 if i < len(items) - 1 else 0       # prostor za "(+n more)"
+            if used + cost + extra + more > budget: break
+            kept.append(item)
+            cost += extra
+        if kept:
+            line = head + ", ".join(kept) + (f" (+{len(items) - len(kept)} more)" if len(kept) < len(items) else "")
+        else:
+            line = f"{head}(+{len(items)} more)"
+            if used + estimate_tokens(line) > budget: continue
+        lines.append(line)
+        used += estimate_tokens(line)
+    return "\n".join(lines)
+
+
+@dataclass
+class BuiltPrompt:
+    text: str
+    sections: dict = field(default_factory=dict)        # odsek -> ocenjeni žetoni
+    biblio: str = ""                                    # zgoščena bibliografija v navodilu
+    biblio_stats: dict = field(default_factory=dict)
+
+    @property
+    def tokens(self):
+        return sum(self.sections.values())
+
+
+def build_prompt(fields, dimensions, records, query, focus="", budget=PROMPT_TOKENS,
+                 biblio_budget=BIBLIO_TOKENS, dimension_budget=DIMENSION_TOKENS):
+    """
+    Sistemsko navodilo v proračunu budget: stalna predpona, znanosti, poizvedba
+    in fokus se ne krajšajo; dimenzije in bibliografija dobita, kar ostane
+    (vsaka največ svoj proračun, neporabljeno od dimenzij gre bibliografiji).
+    """
+    fields_text = f"FIELDS: {', '.join(fields)}."
+    query_text = f"INQUIRY: {query}"
+    sections = {
+        "instructions": estimate_tokens(STATIC_INSTRUCTIONS), "fields": estimate_tokens(fields_text),
+        "inquiry": estimate_tokens(query_text), "focus": estimate_tokens(focus),
+    }
+    # glave odsekov "DIMENSIONS:" in "CONTEXT AUTHORS:"
+    remaining = budget - sum(sections.values()) - 6
+    dims = format_dimensions(dimensions, min(dimension_budget, max(0, remaining)))
+    sections["dimensions"] = estimate_tokens(dims)
+    biblio, biblio_stats = compact_bibliography(records, min(biblio_budget, max(0, remaining - sections["dimensions"])))
+    sections["bibliography"] = estimate_tokens(biblio)
+    parts = [STATIC_INSTRUCTIONS, fields_text]
+    if dims: parts.append("DIMENSIONS:\n" + dims)
+    parts += ["CONTEXT AUTHORS:\n" + (biblio or "none"), query_text]
+    if focus: parts.append(focus)
+    prompt = BuiltPrompt("\n".join(parts), sections, biblio, biblio_stats)
+    log.info("system prompt ~%d tokens (%s); bibliography %d/%d works, %d duplicates", prompt.tokens,
+             ", ".join(f"{k}={v}" for k, v in sections.items() if v), biblio_stats["works_included"],
+             biblio_stats["works"], biblio_stats["duplicates"])
+    return prompt
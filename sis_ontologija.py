@@ -0,0 +1,188 @@
+"""
+Polihierarhična shramba ontologije za KNOWLEDGE_BASE in lastne ontologije.
+
+Vsak predmet (znanost), metoda, orodje, faceta in kategorija dobi celoštevilski
+id; id-ji so dodeljeni v abecednem vrstnem redu, zato je dekodiran bitni niz že
+urejen. Indeksi so Pythonova cela števila kot bitni nizi:
+
+    forward[kind][predmet]  -> bitni niz elementov (metod, orodij, ...)
+    inverse[kind][element]  -> bitni niz predmetov
+    ancestors / descendants -> tranzitivno zaprtje BT/NT med predmeti
+
+Unija za multiselect je tako en OR na izbrani predmet. Zgrajen indeks se
+serializira v CACHE_DIR in ob nespremenjenih virih naloži brez gradnje.
+"""
+import csv
+import hashlib
+import json
+import os
+import pickle
+
+from sis_predpomnilnik import CACHE_DIR
+
+KINDS = ("methods", "tools", "facets", "categories")
+INDEX_FORMAT = 1
+
+
+def _bits(values):
+    b = 0
+    for v in values: b |= 1 << v
+    return b
+
+
+def _iter_bits(b):
+    while b:
+        low = b & -b
+        yield low.bit_length() - 1
+        b ^= low
+
+
+def _split(value):
+    """Večvrednostno polje iz CSV/JSON: seznam ali niz ločen z ';' ali '|'."""
+    if value is None: return []
+    if isinstance(value, (list, tuple)): return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in str(value).replace("|", ";").split(";") if v.strip()]
+
+
+def _normalize_record(name, details):
+    return {
+        "name": name.strip(),
+        "methods": _split(details.get("methods")),
+        "tools": _split(details.get("tools")),
+        "facets": _split(details.get("facets")),
+        # "Natural/Social" pomeni članstvo v obeh kategorijah
+        "categories": [part.strip() for cat in _split(details.get("cat", details.get("category")))
+                       for part in cat.split("/") if part.strip()],
+        "broader": _split(details.get("bt", details.get("broader"))),
+    }
+
+
+class OntologyStore:
+    def __init__(self, records):
+        merged = {}
+        for r in records:
+            if not r["name"]: continue
+            cur = merged.setdefault(r["name"], {k: [] for k in KINDS + ("broader",)})
+            for k in KINDS + ("broader",):
+                cur[k].extend(v for v in r[k] if v not in cur[k])
+        # Predmeti, ki se pojavijo le kot BT, postanejo samostojni vozli
+        for details in list(merged.values()):
+            for parent in details["broader"]:
+                merged.setdefault(parent, {k: [] for k in KINDS + ("broader",)})
+
+        self.subjects = sorted(merged)
+        self.subject_id = {s: i for i, s in enumerate(self.subjects)}
+        self.vocab, self.vocab_id, self.forward, self.inverse = {}, {}, {}, {}
+        for kind in KINDS:
+            names = sorted({v for d in merged.values() for v in d[kind]})
+            ids = {v: i for i, v in enumerate(names)}
+            self.vocab[kind], self.vocab_id[kind] = names, ids
+            self.forward[kind] = [_bits(ids[v] for v in merged[s][kind]) for s in self.subjects]
+            inverse = [0] * len(names)
+            for sid, s in enumerate(self.subjects):
+                for v in merged[s][kind]: inverse[ids[v]] |= 1 << sid
+            self.inverse[kind] = inverse
+        self.broader = [_bits(self.subject_id[p] for p in merged[s]["broader"] if p != s) for s in self.subjects]
+        self._close()
+
+    def _close(self):
+        """Tranzitivno zaprtje BT (predniki) in NT (potomci); cikli so dopustni."""
+        n = len(self.subjects)
+        anc = list(self.broader)
+        changed = True
+        while changed:
+            changed = False
+            for i in range(n):
+                acc = anc[i]
+                for p in _iter_bits(anc[i]): acc |= anc[p]
+                acc &= ~(1 << i)
+                if acc != anc[i]:
+                    anc[i], changed = acc, True
+        desc = [0] * n
+        for i in range(n):
+            for p in _iter_bits(anc[i]): desc[p] |= 1 << i
+        self.ancestors, self.descendants = anc, desc
+
+    # --- poizvedbe ---
+    def _subject_bits(self, subjects, include_narrower=False):
+        b = 0
+        for s in subjects:
+            sid = self.subject_id.get(s)
+            if sid is None: continue
+            b |= 1 << sid
+            if include_narrower: b |= self.descendants[sid]
+        return b
+
+    def union(self, kind, subjects, include_narrower=False):
+        """Urejena unija elementov vrste kind za izbrane predmete."""
+        fwd, acc = self.forward[kind], 0
+        for sid in _iter_bits(self._subject_bits(subjects, include_narrower)): acc |= fwd[sid]
+        names = self.vocab[kind]
+        return [names[i] for i in _iter_bits(acc)]
+
+    def subjects_for(self, kind, item):
+        """Predmeti, ki vsebujejo element (npr. metoda -> znanosti)."""
+        iid = self.vocab_id[kind].get(item)
+        return [] if iid is None else [self.subjects[i] for i in _iter_bits(self.inverse[kind][iid])]
+
+    def ancestors_of(self, subject):
+        sid = self.subject_id.get(subject)
+        return [] if sid is None else [self.subjects[i] for i in _iter_bits(self.ancestors[sid])]
+
+    def descendants_of(self, subject):
+        sid = self.subject_id.get(subject)
+        return [] if sid is None else [self.subjects[i] for i in _iter_bits(self.descendants[sid])]
+
+    # --- serializacija ---
+    def save(self, path):
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as fh:
+            pickle.dump((INDEX_FORMAT, self.__dict__), fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load_index(cls, path):
+        with open(path, "rb") as fh:
+            fmt, state = pickle.load(fh)
+        if fmt != INDEX_FORMAT: raise ValueError(f"unsupported ontology index format {fmt}")
+        store = cls.__new__(cls)
+        store.__dict__.update(state)
+        return store
+
+
+def _records_from_mapping(mapping):
+    return [_normalize_record(name, details) for name, details in mapping.items()]
+
+
+def read_records(path):
+    """Prebere zapise predmetov iz JSON ali CSV datoteke."""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as fh:
+            return [_normalize_record(row.get("subject") or row.get("name") or "", row) for row in csv.DictReader(fh)]
+    with open(path, encoding="utf-8") as fh:
+        data = json.load(fh)
+    if isinstance(data, list):
+        return [_normalize_record(r.get("subject") or r.get("name") or "", r) for r in data]
+    return _records_from_mapping(data.get("subject_details", data))
+
+
+def load_ontology(kb=None, paths=(), index_dir=CACHE_DIR):
+    """
+    Zgradi (ali naloži serializiran) OntologyStore iz KNOWLEDGE_BASE in datotek.
+    Ključ indeksa je SHA-256 vsebine virov, zato sprememba vira sproži gradnjo.
+    """
+    h = hashlib.sha256(json.dumps([INDEX_FORMAT, kb.get("subject_details", kb) if kb else None], sort_keys=True).encode("utf-8"))
+    for p in paths:
+        with open(p, "rb") as fh: h.update(fh.read())
+    index_path = os.path.join(index_dir, f"ontology-{h.hexdigest()[:16]}.pickle")
+    if os.path.exists(index_path):
+        try:
+            return OntologyStore.load_index(index_path)
+        except Exception:
+            pass  # poškodovan ali star indeks se preprosto zgradi znova
+    records = _records_from_mapping(kb.get("subject_details", kb)) if kb else []
+    for p in paths: records.extend(read_records(p))
+    store = OntologyStore(records)
+    os.makedirs(index_dir, exist_ok=True)
+    store.save(index_path)
+    return store
@@ -0,0 +1,139 @@
+"""
+Sinteze kot opravila v ozadju.
+
+JobManager (en na proces) izvaja run_synthesis na lastnem bazenu niti, tako da
+skripta Streamlit ne čaka 8–40 s v nitki seje. Stran hrani le id opravila v
+st.session_state, periodično bere stanje (faza, delna proza) in ob koncu izriše
+rezultat. Opravilo je mogoče preklicati; preklic se upošteva na meji faz in
+med pretakanjem odgovora.
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sis_sinteza import run_synthesis
+
+JOB_WORKERS = int(os.environ.get("SIS_JOB_WORKERS", 4))
+JOB_RETENTION = float(os.environ.get("SIS_JOB_RETENTION", 6 * 3600))   # sekunde dosegljivosti zaključenega opravila
+MAX_JOBS = 500
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class SynthesisJob:
+    def __init__(self, request, stream):
+        self.id = uuid.uuid4().hex
+        self.request = request
+        self.stream = stream
+        self.status = QUEUED
+        self.stage = ""
+        self.stages = []            # [(faza, začetek v s od ustvaritve), ...]
+        self.prose = ""             # delna proza med pretakanjem
+        self.result = None
+        self.error = ""
+        self.created = time.time()
+        self.finished = None
+        self._cancel = threading.Event()
+
+    @property
+    def done(self):
+        return self.status in FINISHED
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.time()) - self.created
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _check(self):
+        if self._cancel.is_set(): raise JobCancelled()
+
+    def _on_stage(self, stage):
+        self._check()
+        self.stage = stage
+        self.stages.append((stage, time.time() - self.created))
+
+    def _on_prose(self, prose):
+        self._check()
+        self.prose = prose
+
+
+class JobManager:
+    def __init__(self, workers=JOB_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="synthesis-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, request, client, force=False, stream=True):
+        """Uvrsti sintezo v vrsto in vrne id opravila."""
+        job = SynthesisJob(request, stream)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._pool.submit(self._run, job, client, force)
+        return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job and not job.done:
+            job.cancel()
+            if job.status == QUEUED:
+                job.finished, job.status = time.time(), CANCELLED
+
+    def _run(self, job, client, force):
+        if job.done: return                 # preklicano še v vrsti
+        job.status = status = RUNNING
+        try:
+            job._check()
+            job.result = run_synthesis(job.request, client, force=force,
+                                       on_prose=job._on_prose if job.stream else None,
+                                       on_stage=job._on_stage)
+            status = DONE
+        except JobCancelled:
+            status = CANCELLED
+        except Exception as e:
+            status, job.error = FAILED, str(e)
+        finally:
+            # finished pred končnim stanjem: job.done naj nikoli ne velja brez časa konca (_prune)
+            job.finished = time.time()
+            job.stage = job.status = status
+
+    def _prune(self):
+        now = time.time()
+        for jid, job in list(self._jobs.items()):
+            if job.done and job.finished is not None and now - job.finished > JOB_RETENTION:
+                del self._jobs[jid]
+        excess = len(self._jobs) - MAX_JOBS + 1
+        if excess > 0:
+            oldest = sorted((job for job in self._jobs.values() if job.done and job.finished is not None),
+                            key=lambda job: job.finished)
+            for job in oldest[:excess]: del self._jobs[job.id]
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """Skupni upravljalnik opravil za ta proces."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
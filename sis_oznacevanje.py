@@ -0,0 +1,124 @@
+"""
+Označevanje besedila sinteze: pojmi iz grafa in avtorji v enem prehodu.
+
+Vse oznake (vozlišča grafa in imena avtorjev) se indeksirajo po prvi besedi;
+besedilo se prebere enkrat, na vsaki besedi pa se preverijo le kandidati z
+enako prvo besedo, od najdaljšega proti najkrajšemu, zato "Quantum Field"
+prevlada nad "Quantum"; ko so pojavitve daljše oznake porabljene, se na istem
+mestu uporabi krajša. HTML značke in vsebina obstoječih <a> povezav se
+preskočijo, tako da se povezave nikoli ne gnezdijo.
+"""
+import html
+import re
+import urllib.parse
+
+_TAG_RE = re.compile(r"</?[A-Za-z][^>]*>")
+_ANCHOR_OPEN_RE = re.compile(r"<a[\s>]", re.IGNORECASE)
+_ANCHOR_CLOSE_RE = re.compile(r"</a\s*>", re.IGNORECASE)
+_WORD_RE = re.compile(r"\w+")
+
+
+def _lower_same_length(text):
+    """Male črke brez spremembe dolžine (indeksi ostanejo poravnani z izvirnikom)."""
+    low = text.lower()
+    if len(low) == len(text): return low
+    return "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+
+def concept_link(label, node_id):
+    g_url = urllib.parse.quote(label)
+    return (f'<span id="{html.escape(node_id)}"><a href="https://www.google.com/search?q={g_url}" target="_blank" '
+            f'class="semantic-node-highlight">{html.escape(label)}<i class="google-icon">↗</i></a></span>')
+
+
+def author_link(name):
+    a_url = urllib.parse.quote(name)
+    return (f'<a href="https://www.google.com/search?q={a_url}" target="_blank" '
+            f'class="author-search-link">{html.escape(name)}<i class="google-icon">↗</i></a>')
+
+
+class Annotator:
+    """
+    Večvzorčni označevalnik. Prva pojavitev oznake vozlišča dobi sidro z id
+    vozlišča; vse pojavitve avtorjev dobijo povezavo na iskanje.
+    """
+
+    def __init__(self, nodes=(), authors=()):
+        self._nodes = {}     # oznaka (male črke) -> [(id, oznaka), ...] v vrstnem redu grafa
+        self._authors = {}   # ime (male črke) -> ime
+        for n in nodes:
+            lbl, nid = str(n.get("label", "")).strip(), str(n.get("id", ""))
+            if lbl and nid:
+                self._nodes.setdefault(_lower_same_length(lbl), []).append((nid, lbl))
+        for a in authors:
+            a = a.strip()
+            if a: self._authors.setdefault(_lower_same_length(a), a)
+        # prva beseda -> kandidati (od najdaljšega); oznake brez začetne besede gredo v regex
+        self._index, fallback = {}, []
+        for term in sorted(set(self._nodes) | set(self._authors), key=lambda t: (-len(t), t)):
+            first = _WORD_RE.match(term)
+            if first: self._index.setdefault(first.group(0), []).append(term)
+            else: fallback.append(re.escape(term))
+        self._fallback = re.compile("|".join(fallback), re.IGNORECASE) if fallback else None
+
+    def _find(self, segment):
+        """
+        Vrne kandidate po mestih: (začetek, [(konec, ključ), ...]) v vrstnem
+        redu besedila, kandidati na mestu od najdaljšega proti najkrajšemu.
+        """
+        low = _lower_same_length(segment)
+        hits = []
+        for m in _WORD_RE.finditer(low):
+            start, found = m.start(), []
+            for term in self._index.get(m.group(0), ()):
+                end = start + len(term)
+                if not low.startswith(term, start): continue
+                if _WORD_RE.match(term[-1]) and _WORD_RE.match(low, end): continue
+                found.append((end, term))
+            if found: hits.append((start, found))
+        if self._fallback:
+            hits.extend((m.start(), [(m.end(), _lower_same_length(m.group(0)))]) for m in self._fallback.finditer(segment))
+            hits.sort(key=lambda h: (h[0], -h[1][0][0]))
+        return hits
+
+    def _link_segment(self, segment, pending):
+        out, pos = [], 0
+        for start, candidates in self._find(segment):
+            if start < pos: continue
+            for end, key in candidates:
+                queue = pending.get(key)
+                if queue:
+                    nid, lbl = queue.pop(0)
+                    link = concept_link(lbl, nid)
+                    break
+                if key in self._authors:
+                    link = author_link(self._authors[key])
+                    break
+            else:
+                continue
+            out.append(segment[pos:start])
+            out.append(link)
+            pos = end
+        out.append(segment[pos:])
+        return "".join(out)
+
+    def annotate(self, text):
+        if not (self._index or self._fallback) or not text: return text
+        pending = {k: list(v) for k, v in self._nodes.items()}
+        out, pos, anchor_depth = [], 0, 0
+        for tag in _TAG_RE.finditer(text):
+            segment = text[pos:tag.start()]
+            out.append(segment if anchor_depth else self._link_segment(segment, pending))
+            t = tag.group(0)
+            if _ANCHOR_OPEN_RE.match(t): anchor_depth += 1
+            elif anchor_depth and _ANCHOR_CLOSE_RE.match(t): anchor_depth -= 1
+            out.append(t)
+            pos = tag.end()
+        tail = text[pos:]
+        out.append(tail if anchor_depth else self._link_segment(tail, pending))
+        return "".join(out)
+
+
+def annotate_markdown(markdown, nodes=(), authors=()):
+    """Vrne besedilo s povezavami na pojme grafa in avtorje."""
+    return Annotator(nodes, authors).annotate(markdown)
@@ -0,0 +1,171 @@
+"""
+Paketni (headless) zagon sinteze za JSONL opravila.
+
+    python sis_paketno.py jobs.jsonl results.jsonl --workers 4
+
+Vsaka vrstica vhoda je JSON objekt s polji SynthesisRequest (query, authors,
+sciences, ...). id se vzame iz "id", "job_id" ali "request_id"; poizvedba iz
+"query", "inquiry" ali "body". Rezultati se sproti dodajajo v izhodno datoteko,
+ki je hkrati kontrolna točka: ob ponovnem zagonu se uspešna opravila preskočijo.
+Z --reuse-similar se opravilo, ki ima v arhivu dovolj podobno preteklo sintezo,
+ne pošlje modelu; rezultat se vzame iz arhiva (polje "reused_from").
+Za preizkus z lokalnim OpenAI-združljivim strežnikom uporabi --base-url.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+from sis_metrike import percentile
+from sis_sinteza import (DEFAULT_MODEL, LLM_BASE_URL, SynthesisRequest, archived_result, find_similar, make_client,
+                         run_synthesis)
+
+
+def read_jobs(path):
+    """Vrne seznam (id, SynthesisRequest) iz JSONL datoteke."""
+    jobs, seen = [], set()
+    with open(path, encoding="utf-8") as fh:
+        for lineno, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line: continue
+            data = json.loads(line)
+            job_id = str(data.get("id") or data.get("job_id") or data.get("request_id") or f"job-{lineno}")
+            if job_id in seen: raise ValueError(f"{path}:{lineno}: duplicate job id '{job_id}'")
+            seen.add(job_id)
+            query = data.get("query") or data.get("inquiry") or data.get("body") or ""
+            if not query: raise ValueError(f"{path}:{lineno}: job '{job_id}' has no query")
+            jobs.append((job_id, SynthesisRequest.from_dict({**data, "query": query})))
+    return jobs
+
+
+def read_checkpoint(path):
+    """id-ji opravil, ki so v izhodni datoteki že uspešno zaključena."""
+    done = set()
+    if not os.path.exists(path): return done
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue    # nedokončana zadnja vrstica po prekinitvi
+            if rec.get("status") == "ok": done.add(rec.get("id"))
+    return done
+
+
+class _ResultWriter:
+    def __init__(self, path):
+        self._fh = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._fh.write(line + "\n")
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+
+    def close(self):
+        self._fh.close()
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def run_job(job_id, request, client, force=False):
+    record = {"id": job_id, "started_at": _now()}
+    t = time.perf_counter()
+    try:
+        result = run_synthesis(request, client, force=force)
+        record.update(status="ok", result=result.as_dict(), timings=result.timings)
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {e}", timings={"total": time.perf_counter() - t})
+    record["finished_at"] = _now()
+    return record
+
+
+def reuse_job(job_id, hit):
+    """Zapis rezultata iz arhiva za zadetek find_similar (None, če ga ni več)."""
+    result = archived_result(hit["id"])
+    if result is None: return None
+    now = _now()
+    return {"id": job_id, "started_at": now, "status": "ok", "result": result.as_dict(), "timings": {"total": 0.0},
+            "reused_from": {"archive_id": hit["id"], "score": round(hit["score"], 4), "query": hit["query"]},
+            "finished_at": now}
+
+
+def run_batch(jobs, output_path, client, workers=4, force=False, log=sys.stderr, reuse_similar=None):
+    """
+    Izvede opravila s omejenim bazenom niti; vrne seznam zapisov rezultatov.
+    reuse_similar: najmanjša podobnost (0-1), pri kateri se namesto klica modela
+    uporabi pretekla sinteza iz arhiva; None izklopi ponovno uporabo.
+    """
+    done = read_checkpoint(output_path)
+    pending = [(jid, req) for jid, req in jobs if jid not in done]
+    if done: print(f"resuming: {len(done)} done, {len(pending)} pending", file=log)
+    writer = _ResultWriter(output_path)
+    records, total = [], len(pending)
+    started = time.perf_counter()
+    try:
+        if reuse_similar is not None and pending and not force:
+            hits = find_similar([req for _, req in pending], limit=1, min_score=reuse_similar)
+            remaining = []
+            for (jid, req), found in zip(pending, hits):
+                rec = reuse_job(jid, found[0]) if found else None
+                if rec is None:
+                    remaining.append((jid, req))
+                    continue
+                writer.write(rec)
+                records.append(rec)
+                print(f"[{len(records)}/{total}] {jid}: reused archive #{found[0]['id']} "
+                      f"({found[0]['score']:.0%} similar)", file=log)
+            pending = remaining
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="batch") as pool:
+            futures = {pool.submit(run_job, jid, req, client, force): jid for jid, req in pending}
+            for fut in as_completed(futures):
+                rec = fut.result()
+                writer.write(rec)
+                records.append(rec)
+                print(f"[{len(records)}/{total}] {rec['id']}: {rec['status']} "
+                      f"({rec['timings'].get('total', 0):.2f}s)", file=log)
+    finally:
+        writer.close()
+
+    wall = time.perf_counter() - started
+    totals = [r["timings"].get("total", 0.0) for r in records if r["status"] == "ok"]
+    failed = sum(1 for r in records if r["status"] != "ok")
+    print(f"done: {len(records) - failed} ok, {failed} failed in {wall:.1f}s; "
+          f"per job p50 {percentile(totals, 0.5):.2f}s, p95 {percentile(totals, 0.95):.2f}s", file=log)
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless SIS batch synthesis over a JSONL file of jobs.")
+    parser.add_argument("input", help="JSONL file of jobs")
+    parser.add_argument("output", help="JSONL file for results (also the resume checkpoint)")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent jobs (default 4)")
+    parser.add_argument("--api-key", default=os.environ.get("GROQ_API_KEY", ""), help="defaults to $GROQ_API_KEY")
+    parser.add_argument("--base-url", default=LLM_BASE_URL,
+                        help="OpenAI-compatible endpoint (defaults to $SIS_LLM_BASE_URL or Groq)")
+    parser.add_argument("--model", default=None, help=f"override model for all jobs (default {DEFAULT_MODEL})")
+    parser.add_argument("--force", action="store_true", help="ignore cached synthesis results")
+    parser.add_argument("--reuse-similar", type=float, default=None, metavar="SCORE",
+                        help="reuse an archived synthesis at least this similar (0-1) instead of calling the model")
+    args = parser.parse_args(argv)
+
+    if not args.api_key:
+        parser.error("missing API key: pass --api-key or set GROQ_API_KEY")
+    jobs = read_jobs(args.input)
+    if args.model:
+        for _, req in jobs: req.model = args.model
+    records = run_batch(jobs, args.output, make_client(args.api_key, args.base_url), args.workers, args.force,
+                        reuse_similar=args.reuse_similar)
+    return 1 if any(r["status"] != "ok" for r in records) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Postavitev semantičnega grafa na strežniku (NumPy).
+
+Vektoriziran Fruchterman-Reingold z vodoravnimi pasovi po ravni vozlišča
+(Class > Root > Branch > Leaf). Izračunani položaji se pošljejo Cytoscape
+kot 'preset' postavitev, zato brskalnik ne računa cose ob vsakem izrisu.
+Položaji se predpomnijo po zgoščeni vrednosti grafa.
+"""
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from sis_predpomnilnik import CACHE_DIR, PersistentCache
+
+LEVEL_RANK = {"Class": 0, "Root": 1, "Branch": 2, "Leaf": 3}
+LAYOUT_VERSION = 1          # povečaj ob spremembi algoritma (razveljavi predpomnilnik)
+LAYOUT_TTL = 90 * 86400
+MEMORY_ITEMS = 256
+
+_memory = {}
+_lock = threading.Lock()
+_disk = None
+
+
+def graph_hash(elements):
+    """Zgoščena vrednost strukture grafa (vozlišča, ravni, povezave)."""
+    nodes, edges = [], []
+    for el in elements:
+        d = el["data"]
+        if "source" in d: edges.append((d["source"], d["target"]))
+        else: nodes.append((d["id"], d.get("type", "")))
+    payload = json.dumps([LAYOUT_VERSION, sorted(nodes), sorted(edges)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def force_layout(node_ids, levels, edges, iterations=150, width=1200.0, level_gap=160.0, seed=0):
+    """
+    Vrne {id: (x, y)}. levels: seznam ravni (kot v LEVEL_RANK), edges: pari id-jev.
+    Odboj med vsemi pari je izračunan matrično (O(n^2) na korak), privlak
+    po povezavah z np.add.at, os y pa vleče proti pasu ravni.
+    """
+    n = len(node_ids)
+    if n == 0: return {}
+    index = {nid: i for i, nid in enumerate(node_ids)}
+    pairs = np.array([(index[s], index[t]) for s, t in edges if s in index and t in index and s != t], dtype=np.intp).reshape(-1, 2)
+    rank = np.array([LEVEL_RANK.get(lv, 2) for lv in levels], dtype=float)
+    band_y = rank * level_gap
+
+    width = width * max(1.0, np.sqrt(n / 100.0))    # večji grafi dobijo širše platno
+    iterations = min(iterations, max(40, 20000 // n))
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(0, width, n)
+    y = band_y + rng.uniform(-level_gap / 4, level_gap / 4, n)
+    k2 = width * (level_gap * (rank.max() + 1)) / n
+    k = np.sqrt(k2)
+    temp = width / 10.0
+    for _ in range(iterations):
+        dx = x[:, None] - x[None, :]
+        dy = y[:, None] - y[None, :]
+        w = k2 / np.maximum(dx * dx + dy * dy, 1e-2)
+        np.fill_diagonal(w, 0.0)
+        disp_x = (dx * w).sum(axis=1)
+        disp_y = (dy * w).sum(axis=1)
+        if len(pairs):
+            ex = x[pairs[:, 0]] - x[pairs[:, 1]]
+            ey = y[pairs[:, 0]] - y[pairs[:, 1]]
+            f = np.sqrt(ex * ex + ey * ey) / k
+            np.add.at(disp_x, pairs[:, 0], -ex * f)
+            np.add.at(disp_x, pairs[:, 1], ex * f)
+            np.add.at(disp_y, pairs[:, 0], -ey * f)
+            np.add.at(disp_y, pairs[:, 1], ey * f)
+        disp_y += (band_y - y) * 2.0
+        length = np.sqrt(disp_x * disp_x + disp_y * disp_y) + 1e-9
+        step = np.minimum(length, temp) / length
+        x = np.clip(x + disp_x * step, 0, width)
+        y += disp_y * step
+        temp *= 0.97
+    pos = np.column_stack([x, y])
+    pos -= pos.min(axis=0)
+    return {nid: (round(float(x), 1), round(float(y), 1)) for nid, (x, y) in zip(node_ids, pos)}
+
+
+def _disk_cache():
+    global _disk
+    with _lock:
+        if _disk is None:
+            _disk = PersistentCache(os.path.join(CACHE_DIR, "layout.sqlite3"), {"layout": LAYOUT_TTL}, max_entries=2000)
+        return _disk
+
+
+def precompute_positions(elements):
+    """
+    Cytoscape elementom vozlišč doda "position" (na mestu) in jih vrne.
+    Položaji se predpomnijo v pomnilniku in na disku po graph_hash.
+    """
+    key = graph_hash(elements)
+    with _lock:
+        positions = _memory.get(key)
+    if positions is None:
+        positions = _disk_cache().get("layout", key)
+    if positions is None:
+        nodes = [el["data"] for el in elements if "source" not in el["data"]]
+        edges = [(el["data"]["source"], el["data"]["target"]) for el in elements if "source" in el["data"]]
+        positions = force_layout([d["id"] for d in nodes], [d.get("type", "") for d in nodes], edges,
+                                 seed=int(key[:8], 16))
+        _disk_cache().put("layout", key, positions)
+    with _lock:
+        _memory[key] = positions
+        while len(_memory) > MEMORY_ITEMS:
+            _memory.pop(next(iter(_memory)))
+    for el in elements:
+        p = None if "source" in el["data"] else positions.get(el["data"]["id"])
+        if p: el["position"] = {"x": p[0], "y": p[1]}
+    return elements
@@ -0,0 +1,170 @@
+"""
+Trajni predpomnilnik (SQLite) s TTL po vrsti zapisa, LRU omejitvijo velikosti
+in postrežbo zastarelih vrednosti med osveževanjem v ozadju.
+Deluje preko Streamlit sej in procesov (WAL način, en priključek na nit).
+SQLiteStore in chunks sta skupna tudi grafu znanja in arhivu sintez.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+CACHE_DIR = os.environ.get("SIS_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".sis_cache"))
+
+SQL_BATCH = 500                 # največ parametrov v enem IN (...)
+
+_MISS = object()
+
+
+def chunks(seq, n=SQL_BATCH):
+    """Zaporedje po kosih za poizvedbe WHERE ... IN (...)."""
+    for i in range(0, len(seq), n): yield seq[i:i + n]
+
+
+class SQLiteStore:
+    """Osnova shramb SQLite: en priključek na nit, WAL način, brez implicitnih transakcij."""
+    timeout = 30
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+class PersistentCache(SQLiteStore):
+    """
+    Ključ-vrednost shramba z JSON vrednostmi, razdeljena po vrstah (kind).
+
+    ttls:        {kind: sekunde svežine}
+    stale_ttls:  {kind: dodatne sekunde, ko se zastarela vrednost še postreže}
+    negative_ttls: {kind: sekunde svežine zapisa None (npr. "ni zadetka")}
+    max_entries: zgornja meja števila zapisov; presežek se izloči po LRU
+    """
+    timeout = 10
+
+    def __init__(self, path, ttls, stale_ttls=None, max_entries=5000, default_ttl=3600, negative_ttls=None):
+        super().__init__(path)
+        self.ttls = dict(ttls)
+        self.stale_ttls = dict(stale_ttls or {})
+        self.negative_ttls = dict(negative_ttls or {})
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._inflight = set()
+        self._refresher = None
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " kind TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL,"
+            " PRIMARY KEY (kind, key))"
+        )
+        self._conn().execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+
+    def _count(self, kind, outcome):
+        with self._lock:
+            c = self._counters.setdefault(kind, {"hits": 0, "stale": 0, "misses": 0})
+            c[outcome] += 1
+
+    def stats(self):
+        """Števci zadetkov/zgrešitev po vrstah za ta proces."""
+        with self._lock:
+            per_kind = {k: dict(v) for k, v in self._counters.items()}
+        total = {"hits": 0, "stale": 0, "misses": 0}
+        for v in per_kind.values():
+            for k in total: total[k] += v[k]
+        entries = self._conn().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        return {"total": total, "kinds": per_kind, "entries": entries}
+
+    def lookup(self, kind, key):
+        """Vrne (vrednost, stanje), stanje je "fresh", "stale" ali None ob zgrešitvi."""
+        row = self._conn().execute(
+            "SELECT value, created FROM cache WHERE kind = ? AND key = ?", (kind, key)
+        ).fetchone()
+        if row is None:
+            return _MISS, None
+        age = time.time() - row[1]
+        ttl = self.ttls.get(kind, self.default_ttl)
+        if row[0] == "null" and kind in self.negative_ttls: ttl = self.negative_ttls[kind]
+        if age > ttl + self.stale_ttls.get(kind, 0):
+            return _MISS, None
+        self._conn().execute("UPDATE cache SET accessed = ? WHERE kind = ? AND key = ?", (time.time(), kind, key))
+        return json.loads(row[0]), ("fresh" if age <= ttl else "stale")
+
+    def get(self, kind, key, default=None):
+        value, state = self.lookup(kind, key)
+        return default if state is None else value
+
+    def put(self, kind, key, value):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (kind, key, value, created, accessed) VALUES (?, ?, ?, ?, ?)",
+            (kind, key, json.dumps(value), now, now),
+        )
+        self._evict(conn)
+
+    def delete(self, kind, key):
+        self._conn().execute("DELETE FROM cache WHERE kind = ? AND key = ?", (kind, key))
+
+    def clear(self, kind=None):
+        if kind is None: self._conn().execute("DELETE FROM cache")
+        else: self._conn().execute("DELETE FROM cache WHERE kind = ?", (kind,))
+
+    def _evict(self, conn):
+        excess = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM cache WHERE rowid IN (SELECT rowid FROM cache ORDER BY accessed ASC LIMIT ?)",
+                (excess,),
+            )
+
+    def _refresh_in_background(self, kind, key, refresh):
+        with self._lock:
+            if (kind, key) in self._inflight:
+                return
+            self._inflight.add((kind, key))
+            if self._refresher is None:
+                self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+
+        def run():
+            try:
+                self.put(kind, key, refresh())
+            except Exception:
+                pass  # zastarela vrednost ostane do naslednjega poskusa
+            finally:
+                with self._lock:
+                    self._inflight.discard((kind, key))
+
+        self._refresher.submit(run)
+
+    def get_or_fetch(self, kind, key, fetch, refresh=None):
+        """
+        Vrne svežo vrednost iz predpomnilnika, zastarelo vrednost (in sproži
+        osvežitev v ozadju) ali pa pokliče fetch() in rezultat shrani.
+        Napake iz fetch() se ob zgrešitvi posredujejo klicatelju.
+        """
+        value, state = self.lookup(kind, key)
+        if state == "fresh":
+            self._count(kind, "hits")
+            return value
+        if state == "stale":
+            self._count(kind, "stale")
+            self._refresh_in_background(kind, key, refresh or fetch)
+            return value
+        self._count(kind, "misses")
+        value = fetch()
+        self.put(kind, key, value)
+        return value
@@ -0,0 +1,99 @@
+"""
+Priprava prikaza semantičnega grafa: elementi Cytoscape.js iz grafa sinteze
+in HTML gradnika. Brez Streamlita, da se da meriti in preizkušati ločeno.
+"""
+import json
+
+from sis_analiza import node_centrality
+
+# Vendiran Cytoscape.js (static/, strežen preko enableStaticServing v .streamlit/config.toml);
+# cdnjs iste različice se naloži le, če lokalne datoteke ni ali je brskalnik ne izvede
+CYTOSCAPE_VERSION = "3.34.1"
+CYTOSCAPE_SRC = "app/static/cytoscape.min.js"
+CYTOSCAPE_CDN_URL = f"https://cdnjs.cloudflare.com/ajax/libs/cytoscape/{CYTOSCAPE_VERSION}/cytoscape.min.js"
+
+
+def build_elements(graph):
+    """
+    Vozlišča in povezave grafa sinteze kot elementi Cytoscape.js. Velikost
+    vozlišča sledi središčnosti (PageRank); povezave do neznanih vozlišč
+    se izpustijo, sklepne ("inferred") so črtkane.
+    """
+    elements = []
+    centrality = node_centrality(graph)
+    for n in graph["nodes"]:
+        level = n.get("type", "Branch")
+        size, deg = centrality[n["id"]]
+        color = n.get("color", "#2a9d8f")
+        elements.append({"data": {
+            "id": n["id"], "label": n["label"], "type": level, "color": color,
+            "size": size, "degree": deg, "z_index": 10 if level in ["Root", "Class"] else 1
+        }})
+    for e in graph["edges"]:
+        if e["source"] not in centrality or e["target"] not in centrality: continue
+        data = {"source": e["source"], "target": e["target"], "rel_type": e.get("rel_type", "AS")}
+        if e.get("inferred"): data["inferred"] = True
+        elements.append({"data": data})
+    return elements
+
+
+def cytoscape_html(elements, container_id="cy", preset_layout=False):
+    """HTML z interaktivnim omrežjem Cytoscape.js (za components.html)."""
+    layout = "{ name: 'preset', padding: 50, fit: true }" if preset_layout else \
+             "{ name: 'cose', padding: 50, animate: true, nodeRepulsion: 25000, idealEdgeLength: 120 }"
+    cyto_html = f"""
+    <div id="{container_id}" style="width: 100%; height: 600px; background: #ffffff; border-radius: 15px; border: 1px solid #eee; box-shadow: 2px 2px 12px rgba(0,0,0,0.05);"></div>
+    <script src="{CYTOSCAPE_SRC}"></script>
+    <script>window.cytoscape || document.write('<script src="{CYTOSCAPE_CDN_URL}"><\\/script>');</script>
+    <script>
+        document.addEventListener('DOMContentLoaded', function() {{
+            var cy = cytoscape({{
+                container: document.getElementById('{container_id}'),
+                elements: {json.dumps(elements)},
+                style: [
+                    {{
+                        selector: 'node',
+                        style: {{
+                            'label': 'data(label)', 'text-valign': 'center', 'color': '#333',
+                            'background-color': 'data(color)', 'width': 'data(size)', 'height': 'data(size)',
+                            'font-size': '12px', 'font-weight': 'bold', 'text-outline-width': 2,
+                            'text-outline-color': '#fff', 'cursor': 'pointer', 'z-index': 'data(z_index)',
+                            'box-shadow': '0px 4px 6px rgba(0,0,0,0.1)'
+                        }}
+                    }},
+                    {{
+                        selector: 'node[type="Class"]',
+                        style: {{ 'shape': 'rectangle', 'border-width': 2, 'border-color': '#2a9d8f', 'background-color': '#f8f9fa' }}
+                    }},
+                    {{
+                        selector: 'edge',
+                        style: {{
+                            'width': 3, 'line-color': '#adb5bd', 'label': 'data(rel_type)',
+                            'font-size': '10px', 'font-weight': 'bold', 'color': '#2a9d8f',
+                            'target-arrow-color': '#adb5bd', 'target-arrow-shape': 'triangle',
+                            'curve-style': 'bezier', 'text-rotation': 'autorotate',
+                            'text-background-opacity': 1, 'text-background-color': '#ffffff',
+                            'text-background-padding': '2px', 'text-background-shape': 'roundrectangle'
+                        }}
+                    }},
+                    {{
+                        selector: 'edge[?inferred]',
+                        style: {{ 'line-style': 'dashed', 'width': 2, 'target-arrow-shape': 'none' }}
+                    }}
+                ],
+                layout: {layout}
+            }});
+            
+            cy.on('tap', 'node', function(evt){{
+                var elementId = evt.target.id();
+                var target = window.parent.document.getElementById(elementId);
+                if (target) {{
+                    target.scrollIntoView({{behavior: "smooth", block: "center"}});
+                    target.style.backgroundColor = "#ffffcc";
+                    setTimeout(function(){{ target.style.backgroundColor = "transparent"; }}, 2500);
+                }}
+            }});
+        }});
+    </script>
+    """
+    return cyto_html
@@ -0,0 +1,555 @@
+"""
+Jedro sinteze: cevovod (bibliografija -> navodilo -> LLM -> graf -> označevanje),
+pretočno branje odgovora LLM, ločevanje besedila od grafa in vsebinsko
+naslovljen predpomnilnik celotnih rezultatov sinteze.
+
+Modul ne uvaža Streamlita; uporabljata ga sis_aplikacija.py in sis_paketno.py.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+
+from sis_analiza import analyze_graph
+from sis_arhiv import get_synthesis_archive
+from sis_bibliografija import (ORCID_WORK_ORDER, ORCID_WORKS_PER_AUTHOR, fetch_author_records,
+                               format_bibliographies, parse_author_list)
+from sis_graf import extract_semantic_graph, merge_graphs
+from sis_graf_znanja import get_knowledge_graph
+from sis_llm import chunk_usage, get_client
+from sis_metrike import METRICS
+from sis_navodilo import build_prompt
+from sis_oznacevanje import annotate_markdown
+from sis_predpomnilnik import CACHE_DIR, PersistentCache
+
+GRAPH_MARKER = "### SEMANTIC_GRAPH_JSON"
+
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+LLM_BASE_URL = os.environ.get("SIS_LLM_BASE_URL", GROQ_BASE_URL)
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+DEFAULT_TEMPERATURE = 0.6
+DEFAULT_MAX_TOKENS = 4000
+
+# Stopnje predpomnilnika rezultatov; 0 izklopi posamezno stopnjo
+SYNTHESIS_MEMORY_ITEMS = int(os.environ.get("SIS_SYNTHESIS_MEMORY_ITEMS", 64))
+SYNTHESIS_DISK_ITEMS = int(os.environ.get("SIS_SYNTHESIS_DISK_ITEMS", 2000))
+SYNTHESIS_TTL = int(os.environ.get("SIS_SYNTHESIS_TTL", 30 * 86400))
+
+
+class GraphMarkerSplitter:
+    """
+    Sprejema koščke pretočnega odgovora in jih loči na prozo (pred oznako
+    GRAPH_MARKER) in JSON grafa (za njo). Konec proze, ki bi lahko bil
+    začetek oznake, se zadrži, dokler ni jasno, ali oznaka sledi.
+    """
+
+    def __init__(self, marker=GRAPH_MARKER):
+        self.marker = marker
+        self._prose = []
+        self._graph = []
+        self._pending = ""
+        self.found_marker = False
+
+    def feed(self, chunk):
+        """Doda košček in vrne novo prozo, ki jo je varno takoj izrisati."""
+        if not chunk: return ""
+        if self.found_marker:
+            self._graph.append(chunk)
+            return ""
+        buf = self._pending + chunk
+        idx = buf.find(self.marker)
+        if idx >= 0:
+            self.found_marker = True
+            self._pending = ""
+            self._graph.append(buf[idx + len(self.marker):])
+            return self._emit(buf[:idx])
+        # Zadrži najdaljši rep, ki je predpona oznake
+        keep = 0
+        for k in range(min(len(self.marker) - 1, len(buf)), 0, -1):
+            if self.marker.startswith(buf[-k:]):
+                keep = k
+                break
+        self._pending = buf[len(buf) - keep:] if keep else ""
+        return self._emit(buf[:len(buf) - keep])
+
+    def finish(self):
+        """Zaključi tok; zadržan rep brez oznake se vrne kot proza."""
+        tail, self._pending = self._pending, ""
+        return self._emit(tail)
+
+    def _emit(self, text):
+        if text: self._prose.append(text)
+        return text
+
+    @property
+    def prose(self):
+        return "".join(self._prose)
+
+    @property
+    def graph_text(self):
+        return "".join(self._graph)
+
+    @property
+    def text(self):
+        """Celoten odgovor v izvirni obliki (kot pri nepretočnem klicu)."""
+        if self.found_marker:
+            return self.prose + self.marker + self.graph_text
+        return self.prose + self._pending
+
+
+def usage_dict(usage):
+    """Poraba žetonov iz objekta ali slovarja usage v slovar (ali {})."""
+    if not usage: return {}
+    get = usage.get if isinstance(usage, dict) else (lambda k: getattr(usage, k, None))
+    return {k: int(get(k) or 0) for k in ("prompt_tokens", "completion_tokens", "total_tokens")}
+
+
+def iter_stream_text(stream, usage=None):
+    """
+    Iz pretočnega odgovora OpenAI API vrača le besedilne koščke.
+    Če je podan slovar usage, se vanj zapiše poročana poraba žetonov; brez
+    poročila je completion_tokens ocenjen s številom koščkov.
+    """
+    chunks = 0
+    for chunk in stream:
+        if usage is not None:
+            reported = chunk_usage(chunk)
+            if reported: usage.update(usage_dict(reported))
+        if not chunk.choices: continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            chunks += 1
+            yield delta
+    if usage is not None and not usage.get("completion_tokens"):
+        usage["completion_tokens"] = chunks
+        usage["total_tokens"] = usage.get("prompt_tokens", 0) + chunks
+
+
+def synthesis_cache_key(sys_prompt, user_query, model, temperature, max_tokens):
+    """SHA-256 nad vsem, kar določa odgovor modela."""
+    payload = json.dumps([sys_prompt, user_query, model, float(temperature), int(max_tokens)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SynthesisCache:
+    """
+    Dvostopenjski predpomnilnik rezultatov sinteze: LRU v pomnilniku procesa
+    in trajni SQLite na disku. Vrednost je slovar s ključi "text" (surov
+    odgovor), "graph" (razčlenjen graf ali None) in "markdown" (označeno besedilo).
+    """
+
+    def __init__(self, memory_items=SYNTHESIS_MEMORY_ITEMS, disk_items=SYNTHESIS_DISK_ITEMS,
+                 ttl=SYNTHESIS_TTL, path=None):
+        self.memory_items = memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = None
+        if disk_items > 0:
+            self._disk = PersistentCache(
+                path or os.path.join(CACHE_DIR, "synthesis.sqlite3"),
+                {"synthesis": ttl}, max_entries=disk_items,
+            )
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+    def _remember(self, key, value):
+        if self.memory_items <= 0: return
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.hits["memory"] += 1
+                return value
+        value = self._disk.get("synthesis", key) if self._disk else None
+        if value is not None:
+            self.hits["disk"] += 1
+            self._remember(key, value)
+            return value
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if self._disk: self._disk.put("synthesis", key, value)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._memory.pop(key, None)
+        if self._disk: self._disk.delete("synthesis", key)
+
+
+_synthesis_cache = None
+_synthesis_cache_lock = threading.Lock()
+
+
+def get_synthesis_cache():
+    """Vrne skupni predpomnilnik rezultatov sinteze za ta proces."""
+    global _synthesis_cache
+    with _synthesis_cache_lock:
+        if _synthesis_cache is None:
+            _synthesis_cache = SynthesisCache()
+        return _synthesis_cache
+
+
+# =========================================================
+# CEVOVOD SINTEZE
+# =========================================================
+@dataclass
+class SynthesisRequest:
+    """Vse izbire ene sinteze (ustrezajo poljem v aplikaciji)."""
+    query: str
+    authors: str = ""
+    sciences: list = field(default_factory=list)
+    profiles: list = field(default_factory=list)
+    expertise: str = "Expert"
+    models: list = field(default_factory=list)
+    paradigms: list = field(default_factory=list)
+    context: str = "Scientific Research"
+    approaches: list = field(default_factory=list)
+    methods: list = field(default_factory=list)
+    tools: list = field(default_factory=list)
+    model: str = DEFAULT_MODEL
+    temperature: float = DEFAULT_TEMPERATURE
+    max_tokens: int = DEFAULT_MAX_TOKENS
+    fanout: bool = False        # vzporedne delne sinteze po znanostih (map-reduce)
+    works_per_author: int = ORCID_WORKS_PER_AUTHOR
+    work_order: str = ORCID_WORK_ORDER      # "record" ali "year" (najnovejša dela)
+
+    @classmethod
+    def from_dict(cls, data):
+        known = {k: v for k, v in data.items() if k in cls.__dataclass_fields__}
+        return cls(**known)
+
+
+@dataclass
+class SynthesisResult:
+    text: str                                       # surov odgovor modela
+    markdown: str                                   # označena proza
+    graph: dict = None                              # {"nodes": [...], "edges": [...]} ali None
+    graph_report: list = field(default_factory=list)
+    biblio: str = ""
+    biblio_errors: dict = field(default_factory=dict)   # avtor -> napaka
+    cached: bool = False
+    timings: dict = field(default_factory=dict)         # faza -> sekunde
+    usage: dict = field(default_factory=dict)           # žetoni (prompt/completion/total) svežih klicev
+    sizes: dict = field(default_factory=dict)           # velikosti navodila, odgovora, grafa
+    analysis: dict = field(default_factory=dict)        # povezljivost, cikli, središčni pojmi (sis_analiza)
+
+    def as_dict(self):
+        return asdict(self)
+
+
+def build_system_prompt(request, records, fields=None, focus=""):
+    """
+    Sistemsko navodilo za model v proračunu žetonov (sis_navodilo.BuiltPrompt);
+    records so AuthorBibliography, fields privzeto request.sciences.
+    """
+    return build_prompt(request.sciences if fields is None else fields, asdict(request), records, request.query,
+                        focus=focus)
+
+
+def make_client(api_key, base_url=LLM_BASE_URL):
+    """Skupni OpenAI-združljiv odjemalec z omejevanjem hitrosti (Groq ali lokalni strežnik)."""
+    return get_client(api_key, base_url)
+
+
+def _stage(on_stage, name):
+    if on_stage: on_stage(name)
+
+
+def _fetch_bibliography(request, timings, on_stage=None):
+    _stage(on_stage, "bibliography")
+    t = time.perf_counter()
+    biblio_records = fetch_author_records(request.authors, works_per_author=request.works_per_author,
+                                          order=request.work_order) if request.authors else []
+    timings["bibliography"] = time.perf_counter() - t
+    return biblio_records, format_bibliographies(biblio_records), {r.author: r.error for r in biblio_records if r.error}
+
+
+def _add_usage(total, usage):
+    for k, v in usage.items(): total[k] = total.get(k, 0) + v
+
+
+def _sizes(prompts, text, markdown, graph):
+    sections = {}
+    for p in prompts: _add_usage(sections, p.sections)
+    return {
+        "prompt_chars": sum(len(p.text) for p in prompts), "response_chars": len(text), "markdown_chars": len(markdown),
+        "biblio_chars": sum(len(p.biblio) for p in prompts), "prompt_sections": sections,
+        "biblio_works": prompts[0].biblio_stats["works"], "biblio_works_included": prompts[0].biblio_stats["works_included"],
+        "graph_nodes": len(graph["nodes"]) if graph else 0, "graph_edges": len(graph["edges"]) if graph else 0,
+    }
+
+
+def _generate(sys_prompt, request, client, cache, force, on_prose, timings, max_tokens=None, annotate=True,
+              on_stage=None, usage=None):
+    """
+    En klic modela z razčlenitvijo grafa (in označevanjem), s predpomnilnikom.
+    Vrne (zapis, iz_predpomnilnika); zapis ima ključe text, graph, graph_report,
+    markdown in analysis. Analitika grafa se izvede le skupaj z označevanjem
+    (delni grafi razpršene sinteze se analizirajo šele po združitvi).
+    Poraba žetonov svežega klica se prišteje v slovar usage.
+    """
+    max_tokens = max_tokens or request.max_tokens
+    cache_key = synthesis_cache_key(sys_prompt, request.query, request.model, request.temperature, max_tokens)
+    cached = None if force else cache.get(cache_key)
+    if cached:
+        return cached, True
+
+    _stage(on_stage, "llm")
+    t = time.perf_counter()
+    llm_args = dict(
+        model=request.model,
+        messages=[{"role": "system", "content": sys_prompt}, {"role": "user", "content": request.query}],
+        temperature=request.temperature, max_tokens=max_tokens
+    )
+    call_usage = {}
+    if on_prose:
+        # Pretočni izris proze; JSON grafa za oznako se le zbira
+        splitter = GraphMarkerSplitter()
+        stream = client.chat.completions.create(stream=True, **llm_args)
+        try:
+            for delta in iter_stream_text(stream, call_usage):
+                if "first_token" not in timings: timings["first_token"] = time.perf_counter() - t
+                if splitter.feed(delta): on_prose(splitter.prose)
+        finally:
+            stream.close()      # tudi ob preklicu iz on_prose: sprosti povezavo in omejevalnik takoj
+        splitter.finish()
+        text_out = splitter.text
+    else:
+        response = client.chat.completions.create(**llm_args)
+        text_out = response.choices[0].message.content or ""
+        call_usage = usage_dict(getattr(response, "usage", None))
+    timings["llm"] = time.perf_counter() - t
+    if usage is not None: _add_usage(usage, call_usage)
+
+    # --- GRAF (enkratno, strpno razčlenjevanje) ---
+    _stage(on_stage, "graph")
+    t = time.perf_counter()
+    parts = text_out.split(GRAPH_MARKER, 1)
+    g_json, graph_report, analysis = None, [], {}
+    if len(parts) > 1:
+        extraction = extract_semantic_graph(parts[1])
+        g_json = extraction.as_dict() if extraction.ok else None
+        graph_report = extraction.dropped
+    timings["graph"] = time.perf_counter() - t
+    if g_json and annotate:
+        t = time.perf_counter()
+        g_json, issues, analysis = analyze_graph(g_json)
+        graph_report = graph_report + issues
+        timings["analysis"] = time.perf_counter() - t
+
+    # --- PROCESIRANJE BESEDILA (Google Search + Authors + Anchors) ---
+    if annotate: _stage(on_stage, "annotation")
+    t = time.perf_counter()
+    main_markdown = parts[0]
+    if annotate:
+        main_markdown = annotate_markdown(main_markdown, g_json["nodes"] if g_json else [], parse_author_list(request.authors))
+    timings["annotation"] = time.perf_counter() - t
+
+    record = {"text": text_out, "graph": g_json, "graph_report": graph_report, "markdown": main_markdown,
+              "analysis": analysis}
+    cache.put(cache_key, record)
+    return record, False
+
+
+def run_synthesis(request, client, force=False, on_prose=None, cache=None, on_stage=None):
+    """
+    Izvede celotno sintezo in vrne SynthesisResult.
+    on_prose(besedilo) se kliče med pretakanjem z dosedanjo prozo; brez njega
+    je klic modela nepretočen. force=True obide predpomnilnik rezultatov.
+    on_stage(faza) se kliče ob začetku faz "bibliography", "llm", "graph" in
+    "annotation"; izjema iz povratnih klicev prekine sintezo (preklic opravila).
+    Pri request.fanout in več znanostih se izvede run_fanout_synthesis.
+    """
+    try:
+        if request.fanout and len(request.sciences) > 1:
+            result = run_fanout_synthesis(request, client, force=force, on_prose=on_prose, cache=cache, on_stage=on_stage)
+        else:
+            result = _run_single(request, client, force, on_prose, cache, on_stage)
+    except Exception:
+        METRICS.inc("sis_synthesis_runs_total", outcome="error")
+        raise
+    if not result.cached:
+        if result.graph: _accumulate(result)
+        _archive(request, result)
+    METRICS.record_synthesis(result.timings, result.usage, result.sizes, result.cached)
+    return result
+
+
+def synthesis_key(result):
+    """Ključ sinteze v grafu znanja in arhivu (zgostitev besedila odgovora)."""
+    return hashlib.sha256(result.text.encode("utf-8")).hexdigest()
+
+
+def _accumulate(result):
+    """Vlije graf sveže sinteze v trajni graf znanja (enkrat na besedilo odgovora)."""
+    store = get_knowledge_graph()
+    if store is None: return
+    t = time.perf_counter()
+    try:
+        store.merge(result.graph, source=synthesis_key(result))
+    except sqlite3.Error as e:
+        result.graph_report.append(f"knowledge graph merge failed: {e}")
+    result.timings["kg_merge"] = time.perf_counter() - t
+
+
+ARCHIVED_FIELDS = ("text", "markdown", "graph", "graph_report", "biblio", "biblio_errors", "analysis")
+
+
+def _archive(request, result):
+    """Shrani svežo sintezo v arhiv za iskanje podobnih poizvedb."""
+    archive = get_synthesis_archive()
+    if archive is None: return
+    t = time.perf_counter()
+    data = result.as_dict()
+    try:
+        archive.add(synthesis_key(result), asdict(request),
+                    {k: data[k] for k in ARCHIVED_FIELDS}, prose=result.text.split(GRAPH_MARKER, 1)[0])
+    except sqlite3.Error as e:
+        result.graph_report.append(f"synthesis archive write failed: {e}")
+    result.timings["archive"] = time.perf_counter() - t
+
+
+def find_similar(requests, limit=5, min_score=None, exclude=()):
+    """
+    Pretekle sinteze, podobne vsakemu od requests (seznam SynthesisRequest);
+    en seznam zadetkov na zahtevek, glej SynthesisArchive.search_many.
+    exclude so ključi sintez (synthesis_key), ki se ne vrnejo.
+    """
+    archive = get_synthesis_archive()
+    if archive is None: return [[] for _ in requests]
+    kwargs = {} if min_score is None else {"min_score": min_score}
+    with METRICS.span("similar_search"):
+        return archive.search_many([asdict(r) for r in requests], limit, exclude=exclude, **kwargs)
+
+
+def archived_result(entry_id):
+    """SynthesisResult iz arhiva (brez klica modela) ali None."""
+    archive = get_synthesis_archive()
+    entry = archive.get(entry_id) if archive is not None else None
+    if entry is None: return None
+    return SynthesisResult(**{k: v for k, v in entry[1].items() if k in ARCHIVED_FIELDS}, cached=True)
+
+
+def _run_single(request, client, force, on_prose, cache, on_stage):
+    timings, usage = {}, {}
+    started = time.perf_counter()
+    cache = cache or get_synthesis_cache()
+    biblio_records, biblio, biblio_errors = _fetch_bibliography(request, timings, on_stage)
+
+    t = time.perf_counter()
+    prompt = build_system_prompt(request, biblio_records)
+    timings["prompt"] = time.perf_counter() - t
+    record, cached = _generate(prompt.text, request, client, cache, force, on_prose, timings, on_stage=on_stage, usage=usage)
+    timings["total"] = time.perf_counter() - started
+    return SynthesisResult(
+        text=record["text"], markdown=record["markdown"], graph=record["graph"],
+        # kopija: zapis si deli seznam s predpomnilnikom v pomnilniku, _accumulate in _archive pa vanj dopisujeta
+        graph_report=list(record.get("graph_report", [])), biblio=biblio, analysis=record.get("analysis", {}),
+        biblio_errors=biblio_errors, cached=cached, timings=timings, usage=usage,
+        sizes=_sizes([prompt], record["text"], record["markdown"], record["graph"]),
+    )
+
+
+# --- MAP-REDUCE: vzporedne delne sinteze po znanostih ---
+FANOUT_MAX_TOKENS = 2000
+FANOUT_MAX_WORKERS = 6
+FANOUT_FOCUS = """
+            FOCUS: This is one section of a multi-field synthesis written in parallel.
+            Treat the inquiry strictly through {field} (700+ words); the other fields ({others}) are covered elsewhere,
+            but name explicit bridges to them. The semantic graph should cover this field's concepts and those bridges.
+            """
+
+
+def build_fanout_prompt(field, request, records):
+    others = ", ".join(s for s in request.sciences if s != field) or "none"
+    return build_system_prompt(request, records, fields=[field], focus=FANOUT_FOCUS.format(field=field, others=others))
+
+
+def run_fanout_synthesis(request, client, force=False, on_prose=None, cache=None, max_workers=FANOUT_MAX_WORKERS,
+                         on_stage=None):
+    """
+    Map: za vsako znanost vzporeden krajši klic z lastnim delnim grafom.
+    Reduce: deterministično združevanje - proza po razdelkih v vrstnem redu
+    znanosti, grafi z merge_graphs (preslikava id-jev, združevanje oznak).
+    on_prose prejme sproti sestavljeno prozo zaključenih razdelkov; z njim so
+    tudi podklici pretočni in ga kličejo ob vsakem koščku, tako da preklic
+    (izjema iz on_prose) ne čaka na konec razdelka.
+    """
+    timings = {}
+    started = time.perf_counter()
+    cache = cache or get_synthesis_cache()
+    biblio_records, biblio, biblio_errors = _fetch_bibliography(request, timings, on_stage)
+    fields = list(request.sciences)
+
+    _stage(on_stage, "llm")
+    t = time.perf_counter()
+    records, any_fresh = [None] * len(fields), False
+    sub_timings = [{} for _ in fields]
+    sub_usage = [{} for _ in fields]
+    prompts = [build_fanout_prompt(f, request, biblio_records) for f in fields]
+
+    def sections_so_far():
+        return "\n\n".join(f"## {fields[i]}\n\n{r['text'].split(GRAPH_MARKER, 1)[0].strip()}"
+                             for i, r in enumerate(records) if r)
+
+    # podklic objavi le zaključene razdelke; klic on_prose služi preverjanju preklica
+    sub_prose = (lambda _prose: on_prose(sections_so_far())) if on_prose else None
+
+    def one(i):
+        return _generate(prompts[i].text, request, client, cache, force, sub_prose, sub_timings[i],
+                         max_tokens=min(FANOUT_MAX_TOKENS, request.max_tokens), annotate=False, usage=sub_usage[i])
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(fields))), thread_name_prefix="fanout") as pool:
+        futures = {pool.submit(one, i): i for i in range(len(fields))}
+        try:
+            for fut in as_completed(futures):
+                record, was_cached = fut.result()
+                records[futures[fut]] = record
+                any_fresh = any_fresh or not was_cached
+                if on_prose: on_prose(sections_so_far())
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)   # ob napaki/preklicu ne začenjaj novih klicev
+            raise
+    timings["llm"] = time.perf_counter() - t
+    timings["llm_sum"] = sum(sub.get("llm", 0.0) for sub in sub_timings)
+    usage = {}
+    for sub in sub_usage: _add_usage(usage, sub)
+
+    _stage(on_stage, "graph")
+    t = time.perf_counter()
+    graph = merge_graphs([r["graph"] for r in records], prefixes=[f"f{i + 1}_" for i in range(len(fields))])
+    graph_report = [f"{fields[i]}: {issue}" for i, r in enumerate(records) for issue in r.get("graph_report", [])]
+    timings["graph"] = time.perf_counter() - t
+    analysis = {}
+    if graph["nodes"]:
+        t = time.perf_counter()
+        graph, issues, analysis = analyze_graph(graph)
+        graph_report += issues
+        timings["analysis"] = time.perf_counter() - t
+
+    _stage(on_stage, "annotation")
+    t = time.perf_counter()
+    prose = sections_so_far()
+    markdown = annotate_markdown(prose, graph["nodes"], parse_author_list(request.authors))
+    timings["annotation"] = time.perf_counter() - t
+    timings["total"] = time.perf_counter() - started
+    text = prose + "\n" + GRAPH_MARKER + "\n" + json.dumps(graph, ensure_ascii=False)
+    return SynthesisResult(
+        text=text, markdown=markdown, graph=graph if graph["nodes"] else None, graph_report=graph_report,
+        biblio=biblio, biblio_errors=biblio_errors, cached=not any_fresh, timings=timings, usage=usage, analysis=analysis,
+        sizes=_sizes(prompts, text, markdown, graph),
+    )
@@ -0,0 +1,162 @@
+"""
+Statični deli uporabniškega vmesnika: CSS, logotip, KNOWLEDGE_BASE in iz
+ontologije izpeljani seznami izbir.
+
+Streamlit ob vsaki interakciji znova izvede sis_aplikacija.py, uvoženi moduli
+pa ostanejo naloženi. Zato je vse tu izračunano enkrat na proces: base64
+logotipa ob uvozu, ontologija in seznami s st.cache_resource, katerih ključ
+(izvorna koda funkcije) Streamlit izračuna ob okrasitvi, torej tudi le ob
+uvozu in ne ob vsakem ponovnem izvajanju skripte.
+"""
+import base64
+import os
+from functools import lru_cache
+
+import streamlit as st
+
+from sis_ontologija import load_ontology
+
+# Integracija CSS za vizualne poudarke, Google linke in gladko navigacijo
+CSS = """
+<style>
+    .semantic-node-highlight {
+        color: #2a9d8f;
+        font-weight: bold;
+        border-bottom: 2px solid #2a9d8f;
+        padding: 0 2px;
+        background-color: #f0fdfa;
+        border-radius: 4px;
+        transition: all 0.3s ease;
+        text-decoration: none !important;
+    }
+    .semantic-node-highlight:hover {
+        background-color: #ccfbf1;
+        color: #264653;
+        border-bottom: 2px solid #e76f51;
+    }
+    .author-search-link {
+        color: #1d3557;
+        font-weight: bold;
+        text-decoration: none;
+        border-bottom: 1px double #457b9d;
+        padding: 0 1px;
+    }
+    .author-search-link:hover {
+        color: #e63946;
+        background-color: #f1faee;
+    }
+    .google-icon {
+        font-size: 0.75em;
+        vertical-align: super;
+        margin-left: 2px;
+        color: #457b9d;
+        opacity: 0.8;
+    }
+    .stMarkdown {
+        line-height: 1.8;
+        font-size: 1.05em;
+    }
+</style>
+"""
+
+
+def get_svg_base64(svg_str):
+    """Pretvori SVG v base64 format za prikaz slike."""
+    return base64.b64encode(svg_str.encode('utf-8')).decode('utf-8')
+
+
+# --- LOGOTIP: 3D RELIEF (Embedded SVG) ---
+SVG_3D_RELIEF = """
+<svg width="240" height="240" viewBox="0 0 240 240" xmlns="http://www.w3.org/2000/svg">
+    <defs>
+        <filter id="reliefShadow" x="-20%" y="-20%" width="150%" height="150%">
+            <feDropShadow dx="4" dy="4" stdDeviation="3" flood-color="#000" flood-opacity="0.4"/>
+        </filter>
+        <linearGradient id="pyramidSide" x1="0%" y1="0%" x2="100%" y2="100%">
+            <stop offset="0%" style="stop-color:#e0e0e0;stop-opacity:1" />
+            <stop offset="100%" style="stop-color:#bdbdbd;stop-opacity:1" />
+        </linearGradient>
+        <linearGradient id="treeGrad" x1="0%" y1="0%" x2="0%" y2="100%">
+            <stop offset="0%" style="stop-color:#66bb6a;stop-opacity:1" />
+            <stop offset="100%" style="stop-color:#2e7d32;stop-opacity:1" />
+        </linearGradient>
+    </defs>
+    <circle cx="120" cy="120" r="100" fill="#f0f0f0" stroke="#000000" stroke-width="4" filter="url(#reliefShadow)" />
+    <path d="M120 40 L50 180 L120 200 Z" fill="url(#pyramidSide)" />
+    <path d="M120 40 L190 180 L120 200 Z" fill="#9e9e9e" />
+    <rect x="116" y="110" width="8" height="70" rx="2" fill="#5d4037" />
+    <circle cx="120" cy="85" r="30" fill="url(#treeGrad)" filter="url(#reliefShadow)" />
+    <circle cx="95" cy="125" r="22" fill="#43a047" filter="url(#reliefShadow)" />
+    <circle cx="145" cy="125" r="22" fill="#43a047" filter="url(#reliefShadow)" />
+    <rect x="70" y="170" width="20" height="12" rx="2" fill="#1565c0" filter="url(#reliefShadow)" />
+    <rect x="150" y="170" width="20" height="12" rx="2" fill="#c62828" filter="url(#reliefShadow)" />
+    <rect x="110" y="185" width="20" height="12" rx="2" fill="#f9a825" filter="url(#reliefShadow)" />
+</svg>
+"""
+
+LOGO_BASE64 = get_svg_base64(SVG_3D_RELIEF)
+
+
+@lru_cache(maxsize=None)
+def logo_html(width):
+    """Sredinsko poravnan logotip kot <img> z vdelanim base64 SVG."""
+    return f'<div style="text-align:center"><img src="data:image/svg+xml;base64,{LOGO_BASE64}" width="{width}"></div>'
+
+
+# =========================================================
+# POPOLNA MULTIDIMENZIONALNA ONTOLOGIJA (VSEH 16 DISCIPLIN)
+# =========================================================
+KNOWLEDGE_BASE = {
+    "mental_approaches": ["Perspective shifting", "Induction", "Deduction", "Hierarchy", "Mini-max", "Whole and part", "Addition and composition", "Balance", "Abstraction and elimination", "Openness and closedness", "Bipolarity and dialectics", "Framework and foundation", "Pleasure and displeasure", "Similarity and difference", "Core (Attraction & Repulsion)", "Condensation", "Constant", "Associativity"],
+    "profiles": {"Adventurers": {"description": "Explorers of hidden patterns."}, "Applicators": {"description": "Efficiency focused."}, "Know-it-alls": {"description": "Systemic clarity."}, "Observers": {"description": "System monitors."}},
+    "paradigms": {"Empiricism": "Sensory experience.", "Rationalism": "Deductive logic.", "Constructivism": "Social build.", "Positivism": "Strict facts.", "Pragmatism": "Practical utility."},
+    "knowledge_models": {"Causal Connections": "Causality.", "Principles & Relations": "Fundamental laws.", "Episodes & Sequences": "Time-flow.", "Facts & Characteristics": "Raw data.", "Generalizations": "Frameworks.", "Glossary": "Definitions.", "Concepts": "Abstract constructs."},
+    "subject_details": {
+        "Physics": {"cat": "Natural", "methods": ["Modeling", "Simulation"], "tools": ["Accelerator", "Spectrometer"], "facets": ["Quantum", "Relativity"]},
+        "Chemistry": {"cat": "Natural", "methods": ["Synthesis", "Spectroscopy"], "tools": ["NMR", "Chromatography"], "facets": ["Organic", "Molecular"]},
+        "Biology": {"cat": "Natural", "methods": ["Sequencing", "CRISPR"], "tools": ["Microscope", "Bio-Incubator"], "facets": ["Genetics", "Ecology"]},
+        "Neuroscience": {"cat": "Natural", "methods": ["Neuroimaging", "Electrophys"], "tools": ["fMRI", "EEG"], "facets": ["Plasticity", "Synaptic"]},
+        "Psychology": {"cat": "Social", "methods": ["Trials", "Psychometrics"], "tools": ["fMRI", "Testing Kits"], "facets": ["Behavioral", "Cognitive"]},
+        "Sociology": {"cat": "Social", "methods": ["Ethnography", "Surveys"], "tools": ["Data Analytics", "Archives"], "facets": ["Stratification", "Dynamics"]},
+        "Computer Science": {"cat": "Formal", "methods": ["Algorithm Design", "Verification"], "tools": ["LLMGraphTransformer", "GPU Clusters", "Git"], "facets": ["AI", "Cybersecurity"]},
+        "Medicine": {"cat": "Applied", "methods": ["Clinical Trials", "Epidemiology"], "tools": ["MRI/CT", "Bio-Markers"], "facets": ["Immunology", "Pharmacology"]},
+        "Engineering": {"cat": "Applied", "methods": ["Prototyping", "FEA"], "tools": ["3D Printers", "CAD Software"], "facets": ["Robotics", "Nanotech"]},
+        "Library Science": {"cat": "Applied", "methods": ["Taxonomy", "Appraisal"], "tools": ["OPAC", "Metadata"], "facets": ["Retrieval", "Knowledge Org"]},
+        "Philosophy": {"cat": "Humanities", "methods": ["Socratic", "Phenomenology"], "tools": ["Logic Mapping", "Critical Analysis"], "facets": ["Epistemology", "Metaphysics"]},
+        "Linguistics": {"cat": "Humanities", "methods": ["Corpus Analysis", "Syntactic Parsing"], "tools": ["Praat", "NLTK Toolkit"], "facets": ["Socioling", "CompLing"]},
+        "Geography": {"cat": "Natural/Social", "methods": ["Spatial Analysis", "GIS"], "tools": ["ArcGIS"], "facets": ["Human Geo", "Physical Geo"]},
+        "Geology": {"cat": "Natural", "methods": ["Stratigraphy", "Mineralogy"], "tools": ["Seismograph"], "facets": ["Tectonics", "Petrology"]},
+        "Climatology": {"cat": "Natural", "methods": ["Climate Modeling"], "tools": ["Weather Stations"], "facets": ["Change Analysis"]},
+        "History": {"cat": "Humanities", "methods": ["Archival Research", "Historiography"], "tools": ["Archives"], "facets": ["Social History"]}
+    }
+}
+
+
+@st.cache_resource
+def get_ontology():
+    """Indeksirana ontologija: KNOWLEDGE_BASE + datoteke iz SIS_ONTOLOGY_PATH (JSON/CSV)."""
+    extra = [p for p in os.environ.get("SIS_ONTOLOGY_PATH", "").split(os.pathsep) if p]
+    return load_ontology(KNOWLEDGE_BASE, extra)
+
+
+@st.cache_resource
+def get_ui_options():
+    """
+    Seznami izbir in besedila Knowledge Explorerja iz ontologije, enkrat na
+    proces; en markdown na razdelek namesto st.write za vsak element.
+    """
+    ontology = get_ontology()
+    return {
+        "profiles": list(KNOWLEDGE_BASE["profiles"]),
+        "models": list(KNOWLEDGE_BASE["knowledge_models"]),
+        "paradigms": list(KNOWLEDGE_BASE["paradigms"]),
+        "approaches": list(KNOWLEDGE_BASE["mental_approaches"]),
+        "sciences": list(ontology.subjects),
+        "explorer": [
+            ("👤 User Profiles", "\n\n".join(f"**{p}**: {d['description']}" for p, d in KNOWLEDGE_BASE["profiles"].items())),
+            ("🧠 Mental Approaches", "\n\n".join(f"• {a}" for a in KNOWLEDGE_BASE["mental_approaches"])),
+            ("🌍 Scientific Paradigms", "\n\n".join(f"**{p}**: {d}" for p, d in KNOWLEDGE_BASE["paradigms"].items())),
+            ("🔬 Science Fields", "\n\n".join(f"• **{s}**" for s in ontology.subjects)),
+            ("🏗️ Structural Models", "\n\n".join(f"**{m}**: {d}" for m, d in KNOWLEDGE_BASE["knowledge_models"].items())),
+        ],
+    }